@@ -0,0 +1,73 @@
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from sqlite_store import SQLiteStore
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+LEDGER_FILE = os.getenv("APPLIED_LEDGER_FILE", os.path.join(N8N_FILES_DIR, "hh_applied.sqlite3"))
+
+# Outcomes after which applying again makes no sense
+APPLIED_STATUSES = ("success", "skipped")
+
+
+class AppliedLedger(SQLiteStore):
+    """
+    Local record of apply outcomes per vacancy ID.
+
+    The applied IDs are also kept in memory, so lookups never touch the disk.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS applied (
+            vacancy_id INTEGER PRIMARY KEY,
+            url        TEXT NOT NULL,
+            status     TEXT NOT NULL,
+            message    TEXT,
+            applied_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = LEDGER_FILE):
+        super().__init__(path)
+        with self._lock:
+            rows = self._conn.execute("SELECT vacancy_id, status, applied_at FROM applied").fetchall()
+        self._status: Dict[int, tuple] = {row["vacancy_id"]: (row["status"], row["applied_at"]) for row in rows}
+
+    def is_applied(self, vacancy_id: Optional[int]) -> bool:
+        entry = self._status.get(vacancy_id)
+        return entry is not None and entry[0] in APPLIED_STATUSES
+
+    def record(self, vacancy_id: int, url: str, result: Dict[str, Any]):
+        status = result.get("status", "unknown")
+        # A failed attempt must not hide an earlier successful one
+        if status not in APPLIED_STATUSES and self.is_applied(vacancy_id):
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO applied (vacancy_id, url, status, message, applied_at) VALUES (?, ?, ?, ?, ?)",
+                (vacancy_id, url, status, result.get("message"), now),
+            )
+            self._status[vacancy_id] = (status, now)
+
+    def annotate(self, vacancy_data: List[Dict[str, Any]], exclude: bool = False) -> List[Dict[str, Any]]:
+        """Set "applied" on every card; with exclude=True drop the applied ones."""
+        selected = []
+        for data in vacancy_data:
+            data["applied"] = self.is_applied(data.get("vacancy_id"))
+            if not (exclude and data["applied"]):
+                selected.append(data)
+        return selected
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._status),
+            "applied": sum(1 for status, _ in self._status.values() if status in APPLIED_STATUSES),
+        }
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from rate_limiter import LIMITER
+from sqlite_store import SQLiteStore
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+JOBS_FILE = os.getenv("APPLY_JOBS_FILE", os.path.join(N8N_FILES_DIR, "hh_jobs.sqlite3"))
+BATCH_CONCURRENCY = int(os.getenv("APPLY_BATCH_CONCURRENCY", 1))
+BATCH_DELAY = float(os.getenv("APPLY_BATCH_DELAY", 5))  # seconds between apply starts
+
+logger = logging.getLogger("ApplyJobs")
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class ApplyJobStore(SQLiteStore):
+    """Persistent queue of batch-apply jobs; every job is a list of items."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id     TEXT PRIMARY KEY,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS job_items (
+            item_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id      TEXT    NOT NULL REFERENCES jobs (job_id),
+            position    INTEGER NOT NULL,
+            url         TEXT    NOT NULL,
+            message     TEXT    NOT NULL DEFAULT '',
+            status      TEXT    NOT NULL,
+            result      TEXT,
+            started_at  REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS job_items_job ON job_items (job_id, position);
+        CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, item_id);
+    """
+
+    def create_job(self, items: List[Dict[str, str]]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("INSERT INTO jobs (job_id, created_at) VALUES (?, ?)", (job_id, time.time()))
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, position, url, message, status) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, n, item["url"], item.get("message") or "", PENDING) for n, item in enumerate(items)],
+            )
+            self._conn.execute("COMMIT")
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest pending item as running and return it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_id, job_id, url, message FROM job_items WHERE status = ? ORDER BY item_id LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, started_at = ? WHERE item_id = ?",
+                (RUNNING, time.time(), row["item_id"]),
+            )
+            return dict(row)
+
+    def finish(self, item_id: int, status: str, result: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, finished_at = ? WHERE item_id = ?",
+                (status, json.dumps(result, ensure_ascii=False), time.time(), item_id),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """Items left running by a previous process go back to the queue."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE job_items SET status = ?, started_at = NULL WHERE status = ?", (PENDING, RUNNING)
+            ).rowcount
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._conn.execute("SELECT job_id, created_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT position, url, status, result, started_at, finished_at FROM job_items "
+                "WHERE job_id = ? ORDER BY position",
+                (job_id,),
+            ).fetchall()
+
+        items = []
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for row in rows:
+            counts[row["status"]] += 1
+            item = dict(row)
+            item["result"] = json.loads(row["result"]) if row["result"] else None
+            items.append(item)
+
+        if counts[PENDING] == 0 and counts[RUNNING] == 0:
+            status = "finished"
+        elif counts[PENDING] == len(rows):
+            status = PENDING
+        else:
+            status = RUNNING
+        return {
+            "job_id": job["job_id"],
+            "status": status,
+            "created_at": job["created_at"],
+            "counts": counts,
+            "items": items,
+        }
+
+    def queued(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE status IN (?, ?)", (PENDING, RUNNING)
+            ).fetchone()[0]
+
+
+class ApplyJobRunner:
+    """
+    Background workers draining ApplyJobStore through apply_fn(url, message).
+
+    Apply starts are spaced by `delay` seconds across all workers, which
+    replaces the fixed "Wait 5s" node of the n8n flow. While the rate
+    limiter pauses hh.ru after a captcha, the workers wait it out instead
+    of failing the items.
+    """
+
+    def __init__(
+        self,
+        store: ApplyJobStore,
+        apply_fn: Callable[[str, str], Dict[str, Any]],
+        concurrency: int = BATCH_CONCURRENCY,
+        delay: float = BATCH_DELAY,
+    ):
+        self.store = store
+        self.apply_fn = apply_fn
+        self.concurrency = max(1, concurrency)
+        self.delay = delay
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._pace_lock = threading.Lock()
+        self._next_start = 0.0
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        resumed = self.store.requeue_interrupted()
+        for n in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"apply-job-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Apply job runner started ({self.concurrency} worker(s), {self.store.queued()} queued item(s), {resumed} resumed)")
+
+    def notify(self):
+        """Wake the workers after a new job was queued."""
+        self._wakeup.set()
+
+    def shutdown(self, timeout: float = 5):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _wait_for_slot(self) -> bool:
+        pause = LIMITER.pause_remaining()
+        while pause > 0:
+            if self._stopping.wait(pause):
+                return False
+            pause = LIMITER.pause_remaining()
+        with self._pace_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_start)
+            self._next_start = slot + self.delay
+        if slot > now:
+            return not self._stopping.wait(slot - now)
+        return not self._stopping.is_set()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            item = self.store.claim_next()
+            if item is None:
+                self._wakeup.wait(timeout=5)
+                self._wakeup.clear()
+                continue
+
+            if not self._wait_for_slot():
+                # Stopping: the item is requeued on the next start
+                break
+
+            try:
+                result = self.apply_fn(item["url"], item["message"])
+                status = FAILED if result.get("status") == "error" else DONE
+            except Exception as e:
+                logger.error(f"Batch apply failed for {item['url']}: {e}", exc_info=True)
+                result, status = {"status": "error", "message": str(e)}, FAILED
+
+            self.store.finish(item["item_id"], status, result)
+            logger.info(f"Job {item['job_id']}: {item['url']} -> {result.get('status')}")
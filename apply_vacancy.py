@@ -5,6 +5,11 @@ import time
 from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
 
+import metrics
+from rate_limiter import LIMITER, is_captcha_url
+from resource_blocker import lean_profile
+from search_vacancies import extract_vacancy_id
+
 load_dotenv()
 
 # Configuration
@@ -12,150 +17,297 @@ N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
 
 SESSION_FILE = os.path.join(N8N_FILES_DIR, "hh_session.json")
 
-def apply_to_vacancy(url, message=""):
-    print(f"Applying to: {url}")
-    print(f"Cover letter length: {len(message) if message else 0} chars")
-    
-    if not os.path.exists(SESSION_FILE):
-        return {"status": "error", "message": "Session file not found"}
+APPLY_READY_TIMEOUT = int(os.getenv("APPLY_READY_TIMEOUT_MS", 30000))  # vacancy page usable
+APPLY_STEP_TIMEOUT = int(os.getenv("APPLY_STEP_TIMEOUT_MS", 10000))  # one click -> next screen
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, slow_mo=0)
+POPUP = "[data-qa='vacancy-response-popup']"
+POPUP_LETTER = "textarea[data-qa='vacancy-response-popup-form-letter-input']"
+POPUP_SUBMIT = "button[data-qa='vacancy-response-submit-popup']"
+APPLY_TOP = "[data-qa='vacancy-response-link-top']"
+APPLY_BOTTOM = "[data-qa='vacancy-response-link-bottom']"
+APPLY_DROPDOWN = f"{APPLY_TOP} + button, {APPLY_BOTTOM} + button"
+LETTER_LINK = "a:has-text('Написать сопроводительное')"
+LETTER_OPTION = ":text('С сопроводительным письмом')"
+
+STATUS_TEXTS = [
+    "Отклик отправлен",
+    "Вы откликнулись",
+    "Резюме доставлено",
+    "Ваш отклик принят",
+    "Спасибо за отклик",
+    "Отклик успешно отправлен"
+]
+STATUS_SELECTOR = ", ".join(f":text('{text}')" for text in STATUS_TEXTS)
+
+# Any of these means the vacancy page is ready to be classified
+PAGE_READY = f"{APPLY_TOP}, {APPLY_BOTTOM}, {LETTER_LINK}, :text('Вы откликнулись')"
+# Any of these means the standard apply click got an answer
+AFTER_APPLY = f"{POPUP}, textarea, {STATUS_SELECTOR}"
+
+# One round trip instead of a count() per element
+PAGE_STATE_JS = """
+([selectors, statusTexts]) => {
+    const has = (selector) => document.querySelector(selector) !== null;
+    const text = (document.body ? document.body.innerText : "").toLowerCase();
+    return {
+        alreadyApplied: text.includes("вы откликнулись"),
+        letterLink: Array.from(document.querySelectorAll("a"))
+            .some((a) => a.textContent.includes("Написать сопроводительное")),
+        applyTop: has(selectors.applyTop),
+        applyBottom: has(selectors.applyBottom),
+        dropdown: has(selectors.dropdown),
+        textarea: has("textarea"),
+        status: statusTexts.some((status) => text.includes(status.toLowerCase())),
+    };
+}
+"""
+
+
+class _ApplyFlow:
+    """
+    Отклик как конечный автомат:
+    load -> detect -> open_letter | open_dropdown | click_apply -> fill -> submit -> confirm.
+    Каждый переход ждёт нужные элементы одним составным селектором вместо
+    фиксированных пауз; время каждого состояния попадает в результат
+    """
+
+    def __init__(self, page, url, message):
+        self.page = page
+        self.url = url
+        self.message = message
+        self.state = {}
+        self.via_dropdown = False
+        self.result = None
+        self.timings = {}
+
+    def run(self):
+        step = "load"
+        while step is not None:
+            started = time.perf_counter()
+            next_step = getattr(self, f"_{step}")()
+            elapsed = time.perf_counter() - started
+            self.timings[step] = self.timings.get(step, 0) + elapsed * 1000
+            metrics.record(f"apply_{step}", elapsed)
+            step = next_step
+
+        self.result["timings"] = {name: round(ms) for name, ms in self.timings.items()}
+        return self.result
+
+    def _finish(self, status, message):
+        self.result = {"status": status, "message": message}
+
+    def _read_state(self):
+        selectors = {"applyTop": APPLY_TOP, "applyBottom": APPLY_BOTTOM, "dropdown": APPLY_DROPDOWN}
+        self.state = self.page.evaluate(PAGE_STATE_JS, [selectors, STATUS_TEXTS])
+
+    def _apply_button(self):
+        return self.page.locator(APPLY_TOP if self.state.get("applyTop") else APPLY_BOTTOM).first
+
+    # ---- states ----
+
+    def _load(self):
+        print(f"Navigating to: {self.url}")
+        LIMITER.acquire()
         try:
-            context = browser.new_context(storage_state=SESSION_FILE)
-            page = context.new_page()
-            
-            print(f"Navigating to: {url}")
-            page.goto(url, wait_until="networkidle", timeout=90000)
-            
-            if page.locator("text=Вы откликнулись").count() > 0:
-                print("Already applied to this vacancy")
-                return {"status": "skipped", "message": "Already applied"}
-
-            cover_letter_link = page.locator("a:has-text('Написать сопроводительное')")
-            
-            if cover_letter_link.count() > 0 and message:
-                print("Found 'Write cover letter' link, clicking...")
-                cover_letter_link.first.click()
-                
+            response = self.page.goto(self.url, wait_until="domcontentloaded", timeout=90000)
+        except Exception as e:
+            LIMITER.report_error(e)
+            raise
+        captcha = is_captcha_url(self.page.url) or "captcha" in self.page.title().lower()
+        LIMITER.report_response(response.status if response else None, captcha,
+                                response.headers.get("retry-after") if response else None)
+        if captcha:
+            metrics.captcha("browser")
+            print("ERROR: Bot protection page instead of the vacancy")
+            self._finish("error", "Bot protection (captcha)")
+            return None
+        try:
+            self.page.wait_for_selector(PAGE_READY, timeout=APPLY_READY_TIMEOUT)
+        except Exception:
+            metrics.TIMEOUTS.inc(stage="apply_load")
+            print("WARNING: No apply controls appeared on the page")
+        return "detect"
+
+    def _detect(self):
+        self._read_state()
+
+        if self.state["alreadyApplied"]:
+            print("Already applied to this vacancy")
+            self._finish("skipped", "Already applied")
+            return None
+        if self.state["letterLink"] and self.message:
+            return "open_letter"
+        if not (self.state["applyTop"] or self.state["applyBottom"]):
+            print("ERROR: Apply button not found")
+            self._finish("error", "Apply button not found")
+            return None
+        if self.state["dropdown"] and self.message:
+            return "open_dropdown"
+        return "click_apply"
+
+    def _open_letter(self):
+        print("Found 'Write cover letter' link, clicking...")
+        try:
+            self.page.locator(LETTER_LINK).first.click()
+            self.page.wait_for_selector(POPUP, timeout=APPLY_STEP_TIMEOUT)
+            print("Modal appeared!")
+            return "fill"
+        except Exception as e:
+            print(f"Error with cover letter link: {str(e)}")
+            self._finish("error", f"Error with cover letter: {str(e)}")
+            return None
+
+    def _open_dropdown(self):
+        print("Found dropdown arrow, clicking to see options...")
+        self.via_dropdown = True
+        try:
+            self.page.locator(APPLY_DROPDOWN).first.click()
+            option = self.page.locator(LETTER_OPTION).first
+            option.wait_for(state="visible", timeout=APPLY_STEP_TIMEOUT)
+            print("Found 'With cover letter' option, clicking...")
+            option.click()
+            self.page.wait_for_selector(POPUP, timeout=APPLY_STEP_TIMEOUT)
+            return "fill"
+        except Exception as e:
+            print(f"Error with dropdown option: {str(e)}")
+            return "click_apply"
+
+    def _fill(self):
+        letter_area = self.page.locator(POPUP_LETTER)
+        try:
+            letter_area.wait_for(state="visible", timeout=APPLY_STEP_TIMEOUT)
+            print(f"Filling cover letter ({len(self.message)} chars)...")
+            letter_area.fill(self.message)
+            print("Cover letter filled successfully")
+        except Exception:
+            print("WARNING: Cover letter field not found in modal")
+        return "submit"
+
+    def _submit(self):
+        submit_btn = self.page.locator(POPUP_SUBMIT)
+        if submit_btn.count() == 0:
+            if self.via_dropdown:
+                return "click_apply"
+            print("ERROR: Submit button not found")
+            self._finish("error", "Submit button not found")
+            return None
+        print("Clicking submit button...")
+        submit_btn.click()
+        return "confirm"
+
+    def _confirm(self):
+        # The popup closes (or a status text shows up) once hh.ru accepted the response
+        try:
+            self.page.locator(POPUP).wait_for(state="hidden", timeout=APPLY_STEP_TIMEOUT)
+        except Exception:
+            metrics.TIMEOUTS.inc(stage="apply_confirm")
+            print("WARNING: Response popup is still open")
+        print("Application submitted successfully with cover letter")
+        self._finish("success", "Applied with cover letter")
+        return None
+
+    def _click_apply(self):
+        print("Clicking standard apply button...")
+        self._apply_button().click()
+        try:
+            self.page.wait_for_selector(AFTER_APPLY, timeout=APPLY_STEP_TIMEOUT)
+        except Exception:
+            metrics.TIMEOUTS.inc(stage="apply_click_apply")
+        return "after_apply"
+
+    def _after_apply(self):
+        self._read_state()
+
+        print("Checking for post-apply cover letter field...")
+        if self.state["textarea"] and self.message:
+            print("Found post-apply screen ('Резюме доставлено')")
+            print(f"Filling post-apply letter field ({len(self.message)} chars)...")
+            self.page.locator("textarea").first.fill(self.message)  # Often it's the only textarea here
+
+            submit_btn = self.page.locator("button:has-text('Отправить')")
+            if submit_btn.count() > 0:
+                print("Clicking 'Send' on post-apply screen...")
+                submit_btn.first.click()
                 try:
-                    print("Waiting for modal window...")
-                    page.wait_for_selector("[data-qa='vacancy-response-popup']", timeout=5000)
-                    print("Modal appeared!")
-                    
-                    page.wait_for_timeout(1000)
-                    
-                    letter_area = page.locator("textarea[data-qa='vacancy-response-popup-form-letter-input']")
-                    if letter_area.count() > 0:
-                        print(f"Filling cover letter ({len(message)} chars)...")
-                        letter_area.fill(message)
-                        print("Cover letter filled successfully")
-                    else:
-                        print("WARNING: Cover letter field not found in modal")
-                    
-                    submit_btn = page.locator("button[data-qa='vacancy-response-submit-popup']")
-                    if submit_btn.count() > 0:
-                        print("Clicking submit button...")
-                        submit_btn.click()
-                        page.wait_for_timeout(3000)
-                        print("Application submitted successfully with cover letter")
-                        return {"status": "success", "message": "Applied with cover letter"}
-                    else:
-                        print("ERROR: Submit button not found")
-                        return {"status": "error", "message": "Submit button not found"}
-                        
-                except Exception as e:
-                    print(f"Error with cover letter link: {str(e)}")
-                    return {"status": "error", "message": f"Error with cover letter: {str(e)}"}
-            
-            print("Looking for standard apply button...")
-            apply_btn = page.locator("[data-qa='vacancy-response-link-top']")
-            if apply_btn.count() == 0:
-                apply_btn = page.locator("[data-qa='vacancy-response-link-bottom']")
-            
-            if apply_btn.count() > 0:
-                dropdown_arrow = page.locator("[data-qa='vacancy-response-link-top'] + button, [data-qa='vacancy-response-link-bottom'] + button")
-                
-                if dropdown_arrow.count() > 0 and message:
-                    print("Found dropdown arrow, clicking to see options...")
-                    dropdown_arrow.first.click()
-                    page.wait_for_timeout(500)
-                    
-                    with_letter_option = page.locator("text=С сопроводительным письмом")
-                    if with_letter_option.count() > 0:
-                        print("Found 'With cover letter' option, clicking...")
-                        with_letter_option.first.click()
-                        
-                        try:
-                            page.wait_for_selector("[data-qa='vacancy-response-popup']", timeout=5000)
-                            page.wait_for_timeout(1000)
-                            
-                            letter_area = page.locator("textarea[data-qa='vacancy-response-popup-form-letter-input']")
-                            if letter_area.count() > 0:
-                                print(f"Filling cover letter ({len(message)} chars)...")
-                                letter_area.fill(message)
-                            
-                            submit_btn = page.locator("button[data-qa='vacancy-response-submit-popup']")
-                            if submit_btn.count() > 0:
-                                submit_btn.click()
-                                page.wait_for_timeout(3000)
-                                print("Application submitted with cover letter")
-                                return {"status": "success", "message": "Applied with cover letter"}
-                        except Exception as e:
-                            print(f"Error with dropdown option: {str(e)}")
-                
-                print("Clicking standard apply button...")
-                apply_btn.first.click()
-                page.wait_for_timeout(2000)
-
-                print("Checking for post-apply cover letter field...")
-                if page.locator("text=Резюме доставлено").count() > 0 or page.locator("textarea").count() > 0:
-                    print("Found post-apply screen ('Резюме доставлено')")
-                    
-                    letter_area = page.locator("textarea") # Often it's the only textarea here
-                    if letter_area.count() > 0 and message:
-                        print(f"Filling post-apply letter field ({len(message)} chars)...")
-                        letter_area.first.fill(message)
-                        
-                        submit_btn = page.locator("button:has-text('Отправить')")
-                        if submit_btn.count() > 0:
-                            print("Clicking 'Send' on post-apply screen...")
-                            submit_btn.first.click()
-                            page.wait_for_timeout(2000)
-                            print("Application with post-apply letter submitted!")
-                            return {"status": "success", "message": "Applied with post-apply cover letter"}
-
-                status_texts = [
-                    "Отклик отправлен",
-                    "Вы откликнулись",
-                    "Резюме доставлено",
-                    "Ваш отклик принят",
-                    "Спасибо за отклик",
-                    "Отклик успешно отправлен"
-                ]
-
-                applied = any(page.locator(f"text={txt}").count() > 0 for txt in status_texts)
-
-                if applied:
-                    print("Application submitted successfully")
-                    return {"status": "success", "message": "Applied successfully"}
-                else:
-                    print("WARNING: Cannot confirm application status")
-                    # опционально сохранить HTML для анализа
-                    with open("hh_last_response.html", "w", encoding="utf-8") as f:
-                        f.write(page.content())
-                    return {"status": "success", "message": "Applied (status unclear)"}
-
-            else:
-                print("ERROR: Apply button not found")
-                return {"status": "error", "message": "Apply button not found"}
+                    self.page.wait_for_selector(STATUS_SELECTOR, timeout=APPLY_STEP_TIMEOUT)
+                except Exception:
+                    pass
+                print("Application with post-apply letter submitted!")
+                self._finish("success", "Applied with post-apply cover letter")
+                return None
+
+        if self.state["status"]:
+            print("Application submitted successfully")
+            self._finish("success", "Applied successfully")
+            return None
+
+        print("WARNING: Cannot confirm application status")
+        # опционально сохранить HTML для анализа
+        with open("hh_last_response.html", "w", encoding="utf-8") as f:
+            f.write(self.page.content())
+        self._finish("success", "Applied (status unclear)")
+        return None
+
+
+def _apply_on_page(page, url, message):
+    """
+    Выполняет отклик в уже открытой вкладке с загруженной сессией
+    """
+    try:
+        profile = lean_profile("apply")
+        if profile is not None:
+            profile.install(page)
+
+        return _ApplyFlow(page, url, message).run()
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return {"status": "error", "message": str(e)}
 
+
+def _apply_with_browser(url, message, pool=None, session_file=SESSION_FILE):
+    if pool is not None:
+        return pool.run(_apply_on_page, url, message)
+
+    with sync_playwright() as p:
+        with metrics.stage("browser_launch"):
+            browser = p.chromium.launch(headless=True, slow_mo=0)
+        try:
+            context = browser.new_context(storage_state=session_file)
+            page = context.new_page()
+            return _apply_on_page(page, url, message)
         except Exception as e:
             print(f"ERROR: {str(e)}")
             return {"status": "error", "message": str(e)}
         finally:
             browser.close()
 
+
+def apply_to_vacancy(url, message="", pool=None, ledger=None, session_file=SESSION_FILE):
+    """
+    pool - BrowserPool из hh_server; без него браузер запускается на один вызов
+    ledger - AppliedLedger; вакансии с уже записанным откликом пропускаются без браузера
+    session_file - сессия аккаунта, от имени которого идёт отклик
+    """
+    print(f"Applying to: {url}")
+    print(f"Cover letter length: {len(message) if message else 0} chars")
+
+    vacancy_id = extract_vacancy_id(url)
+    if ledger is not None and ledger.is_applied(vacancy_id):
+        print("Already applied to this vacancy (local ledger)")
+        metrics.APPLY_OUTCOMES.inc(status="skipped")
+        return {"status": "skipped", "message": "Already applied"}
+    
+    if not os.path.exists(session_file):
+        metrics.APPLY_OUTCOMES.inc(status="error")
+        return {"status": "error", "message": "Session file not found"}
+
+    result = _apply_with_browser(url, message, pool, session_file)
+    metrics.APPLY_OUTCOMES.inc(status=result.get("status", "unknown"))
+
+    if ledger is not None and vacancy_id is not None:
+        ledger.record(vacancy_id, url, result)
+    return result
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         print(json.dumps(apply_to_vacancy(sys.argv[1]), ensure_ascii=False))
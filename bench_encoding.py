@@ -0,0 +1,122 @@
+"""
+Micro-benchmark of /search response encoding: serialization time and bytes on the wire.
+
+    python bench_encoding.py [--vacancies 20] [--runs 200] [--input response.json] [--json out.json]
+
+The payload is a typical /search page: cards from bench_fixtures/serp.html
+and descriptions built from the words of bench_fixtures/vacancy.html,
+shuffled per vacancy so the descriptions do not repeat each other. A saved
+real response (curl .../search?text=... > response.json) can be measured
+with --input instead. Every encoder (json, and orjson when installed) is
+timed on its own, then the body is compressed the way hh_server does for
+each Content-Encoding it offers.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import response_encoding
+from http_fetcher import parse_description, parse_serp
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+
+def _payload(count: int) -> list:
+    with open(os.path.join(FIXTURES, "serp.html"), encoding="utf-8") as f:
+        cards = parse_serp(f.read())
+    with open(os.path.join(FIXTURES, "vacancy.html"), encoding="utf-8") as f:
+        lines = parse_description(f.read()).splitlines()
+
+    rng = random.Random(0)
+    vacancies = []
+    for n, card in zip(range(count), itertools.cycle(cards)):
+        text = []
+        for line in lines:
+            words = line.split()
+            rng.shuffle(words)
+            text.append(" ".join(words))
+        description = "\n".join(text)
+        vacancies.append({**card, "vacancy_id": card["vacancy_id"] + n, "applied": False, "score": 0,
+                          "description": description, "dup_of": None})
+    return vacancies
+
+
+def _time_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vacancies", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--input", help="a saved /search response to encode instead of the fixtures")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = _payload(args.vacancies)
+
+    encoders = {
+        # What hh_server did before: one str, then the same text again as bytes
+        "json (one string)": lambda: json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        "json": lambda: response_encoding.json_pieces(data, use_orjson=False),
+    }
+    if response_encoding.orjson is not None:
+        encoders["orjson"] = lambda: response_encoding.json_pieces(data, use_orjson=True)
+
+    results = {"vacancies": len(data) if isinstance(data, list) else 1, "encoders": [], "encodings": []}
+    print(f"{'encoder':<18} {'ms':>8} {'peak KiB':>9} {'bytes':>9}")
+    for name, encode in encoders.items():
+        body = encode()
+        size = len(body) if isinstance(body, bytes) else sum(len(piece) for piece in body)
+        row = {"encoder": name, "ms": round(_time_ms(encode, args.runs), 3),
+               "peak_kib": round(_peak_kib(encode)), "bytes": size}
+        results["encoders"].append(row)
+        print(f"{name:<18} {row['ms']:>8.3f} {row['peak_kib']:>9} {row['bytes']:>9}")
+
+    pieces = response_encoding.json_pieces(data)
+    size = sum(len(piece) for piece in pieces)
+    print(f"\n{'encoding':<18} {'ms':>8} {'bytes':>9} {'ratio':>7}")
+    for encoding, level in [("identity", None)] + [(name, level) for name in response_encoding.ENCODINGS
+                                                   for level in (1, response_encoding.COMPRESS_LEVEL, 9)]:
+        if level is None:
+            row = {"encoding": encoding, "level": None, "ms": 0.0, "bytes": size}
+        else:
+            def encode():
+                return response_encoding.compress(pieces, encoding, level)
+            row = {"encoding": encoding, "level": level, "ms": round(_time_ms(encode, args.runs), 3),
+                   "bytes": sum(len(piece) for piece in encode())}
+        results["encodings"].append(row)
+        label = encoding if level is None else f"{encoding} -{level}"
+        print(f"{label:<18} {row['ms']:>8.3f} {row['bytes']:>9} {row['bytes'] / size:>7.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Offline benchmark of hh_server against the local hh.ru stand-in (mock_hh.py).
+
+    python bench_hh.py [--mode browser|http] [--requests 20] [--concurrency 4]
+                       [--latency-ms 150] [--jitter-ms 50] [--error-rate 0] [--captcha-rate 0]
+                       [--scenarios search_cached,search_full,search_list,apply,mixed]
+                       [--json out.json] [--compare baseline.json]
+
+hh_server runs as a subprocess with a throwaway session, cache, ledger and
+job store, so every run starts cold. Scenarios:
+
+    search_cached /search for an already seen query: the SERP again, descriptions from the cache
+    search_full   /search for a new query every time: SERP and every description
+    search_list   /search?fields=title,url,employer for a new query every time: SERP only
+    apply         POST /apply on a new vacancy every time
+    mixed         all of the above at once, `concurrency` requests in flight
+
+For each scenario the report has p50/p95 latency, throughput and the
+requests the mock received; --compare prints the change against a saved run.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from mock_hh import MockSettings, start_mock
+
+SCENARIOS = ("search_cached", "search_full", "search_list", "apply", "mixed")
+SERVER_START_TIMEOUT = 120  # seconds, browsers included
+REQUEST_TIMEOUT = 300
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _write_session(path: str):
+    # A storage_state the browsers accept; the mock does not check cookies
+    cookie = {"name": "hhtoken", "value": "bench", "domain": "127.0.0.1", "path": "/",
+              "expires": -1, "httpOnly": False, "secure": False, "sameSite": "Lax"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cookies": [cookie], "origins": []}, f)
+
+
+def _start_server(workdir: str, port: int, mock_url: str, mode: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        N8N_FILES_DIR=workdir,
+        DESCRIPTION_CACHE_FILE=os.path.join(workdir, "hh_cache.sqlite3"),
+        APPLIED_LEDGER_FILE=os.path.join(workdir, "hh_applied.sqlite3"),
+        APPLY_JOBS_FILE=os.path.join(workdir, "hh_jobs.sqlite3"),
+        SEEN_INDEX_FILE=os.path.join(workdir, "hh_seen.sqlite3"),
+        SERVER_HOST="127.0.0.1",
+        SERVER_PORT=str(port),
+        HH_BASE_URL=mock_url,
+        FETCH_MODE=mode,
+        # The search profile drops everything that is not first-party
+        LEAN_ALLOW_DOMAINS="hh.ru,hhcdn.ru,127.0.0.1",
+        DESCRIPTION_HOST_DELAY_MS="0",
+        # Measures the server, not the pacing towards hh.ru
+        RATE_LIMIT_RPS="0",
+        # Every request must reach the search path; identical concurrent ones are still coalesced
+        RESULT_CACHE_TTL="0",
+    )
+    log = open(os.path.join(workdir, "hh_server.log"), "w", encoding="utf-8")
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hh_server.py")
+    return subprocess.Popen([sys.executable, server_script], env=env, cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+
+
+def _wait_ready(process: subprocess.Popen, base_url: str):
+    """Poll /ready, as start.py does: /health answers before the warm-up is over."""
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"hh_server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=2):
+                return
+        except OSError:  # not listening yet or 503 while warming up
+            time.sleep(0.5)
+    raise RuntimeError(f"hh_server was not ready within {SERVER_START_TIMEOUT}s")
+
+
+def _call(method: str, url: str, body: dict = None) -> Tuple[float, bool]:
+    """(latency ms, ok) of one request; ok means a 2xx without an error status inside."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            payload = json.loads(response.read() or b"null")
+        ok = not (isinstance(payload, dict) and (payload.get("status") == "error" or "error" in payload))
+    except (OSError, ValueError):
+        ok = False
+    return (time.perf_counter() - started) * 1000, ok
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _summary(samples: List[Tuple[float, bool]], wall: float) -> Dict[str, float]:
+    latencies = [ms for ms, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+        "throughput_rps": round(len(samples) / wall, 3) if wall > 0 else 0.0,
+    }
+
+
+class Bench:
+    def __init__(self, server_url: str, mock_url: str, mock, requests: int, concurrency: int):
+        self.server_url = server_url
+        self.mock_url = mock_url
+        self.mock = mock
+        self.requests = requests
+        self.concurrency = concurrency
+        self._vacancy_seq = 0
+        self._query_seq = 0
+
+    # ---- request factories: every call returns a fresh request ----
+
+    def search_cached(self) -> Tuple[str, str, dict]:
+        return "GET", f"{self.server_url}/search?text=bench-cached&page=0", None
+
+    def search_full(self) -> Tuple[str, str, dict]:
+        self._query_seq += 1
+        return "GET", f"{self.server_url}/search?text=bench-full-{self._query_seq}&page=0", None
+
+    def search_list(self) -> Tuple[str, str, dict]:
+        self._query_seq += 1
+        return "GET", f"{self.server_url}/search?text=bench-list-{self._query_seq}&page=0&fields=title,url,employer", None
+
+    def apply(self) -> Tuple[str, str, dict]:
+        # A new vacancy every time, or the ledger would answer "skipped"
+        self._vacancy_seq += 1
+        url = f"{self.mock_url}/vacancy/{900000 + self._vacancy_seq}"
+        return "POST", f"{self.server_url}/apply", {"url": url, "message": "Здравствуйте! Benchmark."}
+
+    # ---- scenarios ----
+
+    def run(self, name: str) -> Dict[str, object]:
+        if name == "search_cached":
+            _call(*self.search_cached())  # warm the description cache
+        if name == "mixed":
+            kinds = ("search_cached", "search_full", "apply")
+            factories = [getattr(self, kinds[n % len(kinds)]) for n in range(self.requests)]
+        else:
+            factories = [getattr(self, name)] * self.requests
+        return self._measure(name, factories)
+
+    def _measure(self, name: str, factories: List[Callable]) -> Dict[str, object]:
+        # Request arguments are built up front so the counters are not shared across threads
+        calls = [(factory.__name__, factory()) for factory in factories]
+        upstream_before = self.mock.stats()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency if name == "mixed" else 1) as executor:
+            samples = list(executor.map(lambda call: (call[0], _call(*call[1])), calls))
+        wall = time.perf_counter() - started
+        upstream_after = self.mock.stats()
+
+        result = _summary([sample for _, sample in samples], wall)
+        result["upstream"] = {
+            route: count - upstream_before.get(route, 0)
+            for route, count in upstream_after.items() if count != upstream_before.get(route, 0)
+        }
+        if name == "mixed":
+            result["by_kind"] = {
+                kind: _summary([sample for k, sample in samples if k == kind], wall)
+                for kind in sorted({kind for kind, _ in samples})
+            }
+        return result
+
+
+def _print_report(report: Dict[str, object]):
+    print(f"{'scenario':<14} {'req':>5} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'rps':>8}  upstream")
+    for name, row in report["scenarios"].items():
+        upstream = ", ".join(f"{route}={count}" for route, count in sorted(row["upstream"].items()))
+        print(f"{name:<14} {row['requests']:>5} {row['errors']:>5} {row['p50_ms']:>9.0f} "
+              f"{row['p95_ms']:>9.0f} {row['throughput_rps']:>8.2f}  {upstream}")
+
+
+def _print_comparison(report: Dict[str, object], baseline: Dict[str, object]):
+    print(f"\nChange against the baseline ({baseline['meta'].get('mode')}, {baseline['meta'].get('started_at')}):")
+    print(f"{'scenario':<14} {'p50':>9} {'p95':>9} {'rps':>9}")
+    for name, row in report["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+
+        def change(key):
+            return f"{(row[key] - base[key]) / base[key] * 100:+.1f}%" if base[key] else "n/a"
+
+        print(f"{name:<14} {change('p50_ms'):>9} {change('p95_ms'):>9} {change('throughput_rps'):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("browser", "http"), default="browser", help="FETCH_MODE of the server")
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight in the mixed scenario")
+    parser.add_argument("--latency-ms", type=float, default=150, help="mock latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--captcha-rate", type=float, default=0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="a report written by an earlier --json run")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    settings = MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.captcha_rate)
+    mock = start_mock(settings=settings)
+    workdir = tempfile.mkdtemp(prefix="hh-bench-")
+    _write_session(os.path.join(workdir, "hh_session.json"))
+    port = _free_port()
+    server_url = f"http://127.0.0.1:{port}"
+    process = _start_server(workdir, port, mock.base_url, args.mode)
+
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "captcha_rate": args.captcha_rate,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    try:
+        started = time.perf_counter()
+        _wait_ready(process, server_url)
+        report["meta"]["server_start_s"] = round(time.perf_counter() - started, 2)
+
+        bench = Bench(server_url, mock.base_url, mock, args.requests, args.concurrency)
+        for name in scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            report["scenarios"][name] = bench.run(name)
+    except RuntimeError as e:
+        print(f"ERROR: {e}; server log: {os.path.join(workdir, 'hh_server.log')}", file=sys.stderr)
+        return 1
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        mock.shutdown()
+        mock.server_close()
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_report(report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            _print_comparison(report, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
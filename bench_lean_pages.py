@@ -0,0 +1,100 @@
+"""
+Benchmark: page load with and without the lean request profile.
+
+    python bench_lean_pages.py [--runs 5] [--profile search|apply] [--json out.json] URL [URL ...]
+
+Every run uses a fresh context (cold cache) with the saved session, and
+measures the time to domcontentloaded, the extra networkidle wait, and
+the number and size of responses the page received.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from playwright.sync_api import sync_playwright
+
+from resource_blocker import PROFILES
+from search_vacancies import SESSION_FILE
+
+
+def _measure(browser, url, request_filter=None):
+    context = browser.new_context(storage_state=SESSION_FILE if os.path.exists(SESSION_FILE) else None)
+    try:
+        if request_filter is not None:
+            request_filter.install(context)
+
+        counters = {"responses": 0, "bytes": 0}
+
+        def on_response(response):
+            size = response.headers.get("content-length", "0")
+            counters["responses"] += 1
+            counters["bytes"] += int(size) if size.isdigit() else 0
+
+        page = context.new_page()
+        page.on("response", on_response)
+
+        started = time.perf_counter()
+        page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        dom_ready = time.perf_counter()
+        try:
+            page.wait_for_load_state("networkidle", timeout=60000)
+        except Exception:
+            pass  # still report how long we waited
+        idle = time.perf_counter()
+
+        return {
+            "domcontentloaded_ms": (dom_ready - started) * 1000,
+            "networkidle_wait_ms": (idle - dom_ready) * 1000,
+            "responses": counters["responses"],
+            "bytes": counters["bytes"],
+        }
+    finally:
+        context.close()
+
+
+def _summary(samples):
+    keys = samples[0].keys()
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="search")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    request_filter = PROFILES[args.profile]
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for url in args.urls:
+                # Interleave modes so that site-side variance hits both equally
+                full, lean = [], []
+                for _ in range(args.runs):
+                    full.append(_measure(browser, url))
+                    lean.append(_measure(browser, url, request_filter))
+                results.append({"url": url, "full": _summary(full), "lean": _summary(lean)})
+        finally:
+            browser.close()
+
+    print(f"{'mode':<6} {'DOM ms':>9} {'idle ms':>9} {'resp':>6} {'KiB':>9}  url")
+    for result in results:
+        for mode in ("full", "lean"):
+            row = result[mode]
+            print(f"{mode:<6} {row['domcontentloaded_ms']:>9.0f} {row['networkidle_wait_ms']:>9.0f} "
+                  f"{row['responses']:>6.0f} {row['bytes'] / 1024:>9.0f}  {result['url']}")
+    print(f"\n{args.profile} profile counters: {json.dumps(request_filter.stats(), ensure_ascii=False)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"profile": args.profile, "runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from playwright.sync_api import sync_playwright
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+MAX_USES = int(os.getenv("BROWSER_MAX_USES", 50))  # recycle browser after N borrows
+BORROW_TIMEOUT = float(os.getenv("BROWSER_BORROW_TIMEOUT", 120))  # seconds
+
+logger = logging.getLogger("BrowserPool")
+
+
+class BrowserPoolError(RuntimeError):
+    """Raised when no browser could be borrowed from the pool."""
+
+
+def current_storage_state(storage_state):
+    """
+    storage_state is a file path, a dict or a callable returning one of them
+    (a Session from session_manager); a new object means the session changed.
+    """
+    return storage_state() if callable(storage_state) else storage_state
+
+
+class _Task:
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.trace = metrics.current_trace()  # stages run on the worker count for the caller
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _BrowserWorker(threading.Thread):
+    """
+    Owns one Playwright driver, one Chromium and one context with the session.
+
+    The sync Playwright API is bound to the thread that started it, so every
+    page operation for this browser is executed inside this thread.
+    """
+
+    def __init__(self, index: int, storage_state, max_uses: int, launch_options: dict, name: str = "browser"):
+        super().__init__(name=f"{name}-{index}", daemon=True)
+        self.index = index
+        self.storage_state = storage_state
+        self.max_uses = max_uses
+        self.launch_options = launch_options
+        self.tasks: "queue.Queue[Optional[_Task]]" = queue.Queue()
+        self.launched = threading.Event()  # the initial launch is over, successful or not
+
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._context_state = None
+        self.uses = 0
+        self.launches = 0
+        self.crashes = 0
+        self.last_error: Optional[str] = None
+
+    # ---- called from other threads ----
+
+    def submit(self, task: _Task):
+        self.tasks.put(task)
+
+    def stop(self):
+        self.tasks.put(None)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "worker": self.index,
+            "alive": self.is_alive(),
+            "browser_running": self._browser is not None,
+            "uses": self.uses,
+            "launches": self.launches,
+            "crashes": self.crashes,
+            "last_error": self.last_error,
+        }
+
+    # ---- worker thread ----
+
+    def run(self):
+        self._playwright = sync_playwright().start()
+        try:
+            # Launch eagerly so the first request does not pay for it
+            try:
+                self._ensure_browser()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Worker {self.name}: initial launch failed: {e}")
+            finally:
+                self.launched.set()
+
+            while True:
+                task = self.tasks.get()
+                if task is None:
+                    break
+                self._execute(task)
+        finally:
+            self._close_browser()
+            self._playwright.stop()
+
+    def _ensure_browser(self):
+        # Health check: a crashed or disconnected browser is relaunched
+        if self._browser is not None and not self._browser.is_connected():
+            logger.warning(f"Worker {self.name}: browser disconnected, relaunching")
+            self.crashes += 1
+            self._close_browser()
+
+        if self._browser is not None and self.uses >= self.max_uses:
+            logger.info(f"Worker {self.name}: recycling browser after {self.uses} uses")
+            self._close_browser()
+
+        state = current_storage_state(self.storage_state)
+        if self._browser is not None and state is not self._context_state:
+            # The session was saved again (a new login): swap the cookies, keep the browser
+            logger.info(f"Worker {self.name}: session changed, reloading cookies")
+            self._context.clear_cookies()
+            self._context.add_cookies(state.get("cookies", []))
+            self._context_state = state
+
+        if self._browser is None:
+            started = time.monotonic()
+            self._browser = self._playwright.chromium.launch(headless=True, **self.launch_options)
+            try:
+                self._context = self._browser.new_context(storage_state=state)
+                self._context_state = state
+            except Exception:
+                self._close_browser()
+                raise
+            self.uses = 0
+            self.launches += 1
+            metrics.record("browser_launch", time.monotonic() - started)
+            logger.info(
+                f"Worker {self.name}: browser ready in {time.monotonic() - started:.2f}s"
+            )
+
+    def _close_browser(self):
+        for obj in (self._context, self._browser):
+            if obj is None:
+                continue
+            try:
+                obj.close()
+            except Exception:
+                pass
+        self._context = None
+        self._browser = None
+
+    def _execute(self, task: _Task):
+        with metrics.use_trace(task.trace):
+            self._execute_traced(task)
+
+    def _execute_traced(self, task: _Task):
+        page = None
+        try:
+            self._ensure_browser()
+            page = self._context.new_page()
+            task.result = task.fn(page, *task.args, **task.kwargs)
+        except Exception as e:
+            task.error = e
+            self.last_error = str(e)
+            if self._browser is not None and not self._browser.is_connected():
+                self.crashes += 1
+                self._close_browser()
+        finally:
+            if page is not None:
+                try:
+                    page.close()
+                except Exception:
+                    pass
+            self.uses += 1
+            task.done.set()
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of long-lived headless browsers.
+
+    Callers borrow a fresh page in an already running context:
+
+        pool.run(fn, *args)  ->  fn(page, *args) executed on a pooled browser
+    """
+
+    def __init__(
+        self,
+        storage_state,
+        size: int = POOL_SIZE,
+        max_uses: int = MAX_USES,
+        borrow_timeout: float = BORROW_TIMEOUT,
+        launch_options: Optional[dict] = None,
+        name: str = "browser",
+    ):
+        self.name = name
+        self.size = max(1, size)
+        self.borrow_timeout = borrow_timeout
+        self._workers: List[_BrowserWorker] = [
+            _BrowserWorker(i, storage_state, max(1, max_uses), launch_options or {}, name)
+            for i in range(self.size)
+        ]
+        self._idle: "queue.Queue[_BrowserWorker]" = queue.Queue()
+        self._closed = False
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+            self._idle.put(worker)
+        logger.info(f"Browser pool {self.name!r} started with {self.size} browser(s)")
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Execute fn(page, *args, **kwargs) on a pooled browser and return its result."""
+        if self._closed:
+            raise BrowserPoolError("Browser pool is shut down")
+
+        try:
+            with metrics.stage("pool_wait"):
+                worker = self._idle.get(timeout=self.borrow_timeout)
+        except queue.Empty:
+            metrics.TIMEOUTS.inc(stage="pool_wait")
+            raise BrowserPoolError(f"No free browser within {self.borrow_timeout:.0f}s")
+
+        task = _Task(fn, args, kwargs)
+        try:
+            if not worker.is_alive():
+                raise BrowserPoolError(f"Browser worker {worker.index} is not running")
+            worker.submit(task)
+            task.done.wait()
+        finally:
+            self._idle.put(worker)
+
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def wait_ready(self, timeout: float = BORROW_TIMEOUT) -> int:
+        """Wait for the initial launches; the result is how many browsers run."""
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.launched.wait(max(0.0, deadline - time.monotonic()))
+        return self.running()
+
+    def running(self) -> int:
+        return sum(1 for worker in self._workers if worker.is_alive() and worker._browser is not None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "workers": [w.status() for w in self._workers],
+        }
+
+    def shutdown(self, timeout: float = 30):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            worker.stop()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        logger.info(f"Browser pool {self.name!r} stopped")
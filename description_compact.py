@@ -0,0 +1,220 @@
+import collections
+import os
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+COMPACT_CHARS = int(os.getenv("DESCRIPTION_COMPACT_CHARS", 1500))  # description_compact budget (0 - no limit)
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", 0.8))  # share of common word triples of re-posts
+DUPLICATE_INDEX_SIZE = int(os.getenv("DUPLICATE_INDEX_SIZE", 20000))  # signatures kept (0 - no dup_of)
+
+# Section headings whose section is the same from vacancy to vacancy
+BOILERPLATE_RE = re.compile(
+    r"^(?:о компании|о нас|кто мы|мы предлагаем|что мы предлагаем|мы гарантируем|мы да[её]м|что мы да[её]м"
+    r"|наши преимущества|преимущества|почему мы|почему стоит|бонусы|льготы|плюшки|социальный пакет|соцпакет"
+    r"|корпоративная культура|about us|about the company|we offer|benefits|perks)(?!\w)"
+)
+# Headings that end a boilerplate section even without a colon
+SECTION_RE = re.compile(
+    r"^(?:требования|обязанности|задачи|условия|чем предстоит|что предстоит|что нужно|что мы ожидаем|ожидаем"
+    r"|наш стек|стек|технологии|будет плюсом|будет преимуществом|ключевые навыки"
+    r"|responsibilities|requirements|tasks|nice to have|tech stack)(?!\w)"
+)
+HEADING_MAX_CHARS = 60
+BULLET_RE = re.compile(r"^[-–—•·●▪■◦*]+\s*")
+SPACE_RE = re.compile(r"[ \t ​]+")
+WORD_RE = re.compile(r"\w+")
+
+SHINGLE_WORDS = 3
+SIGNATURE_SIZE = 64  # MinHash bins
+BAND_ROWS = 4  # bins per lookup band
+_HASH_MASK = (1 << 64) - 1
+_SLOT_SHIFT = 64 - (SIGNATURE_SIZE - 1).bit_length()
+_VALUE_MASK = (1 << 32) - 1
+_EMPTY = 1 << 32
+
+
+def _lines(text: str) -> Iterator[str]:
+    """Non-empty lines with single spaces; bullets of any kind become "- "."""
+    for line in text.splitlines():
+        line = SPACE_RE.sub(" ", line).strip()
+        if not line:
+            continue
+        bullet = BULLET_RE.match(line)
+        yield "- " + line[bullet.end():] if bullet and bullet.end() < len(line) else line
+
+
+def _heading(line: str) -> Optional[str]:
+    """The lowercased heading text, or None when the line is not a heading."""
+    if len(line) > HEADING_MAX_CHARS or line.startswith("- "):
+        return None
+    key = line.lower().rstrip(":.! ")
+    if line.endswith(":") or BOILERPLATE_RE.match(key) or SECTION_RE.match(key):
+        return key
+    return None
+
+
+def strip_boilerplate(text: str) -> str:
+    """Normalized lines without the sections under boilerplate headings."""
+    kept = []
+    skipping = False
+    for line in _lines(text or ""):
+        heading = _heading(line)
+        if heading is not None:
+            skipping = bool(BOILERPLATE_RE.match(heading))
+        if not skipping:
+            kept.append(line)
+    # A description that is nothing but boilerplate is still better than none
+    return "\n".join(kept) or "\n".join(_lines(text or ""))
+
+
+def trim(text: str, budget: int) -> str:
+    """Cut to `budget` characters, at a line or sentence end when one is close."""
+    if budget <= 0 or len(text) <= budget:
+        return text
+    cut = text[:budget]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "), cut.rfind("; "))
+    if boundary < budget * 0.7:
+        boundary = cut.rfind(" ")
+    if boundary > 0:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+def compact(text: str, budget: int = COMPACT_CHARS) -> str:
+    """What the cover letter prompt needs of a description: no boilerplate, at most `budget` characters."""
+    if not text:
+        return ""
+    return trim(strip_boilerplate(text), budget)
+
+
+def _shingles(text: str) -> Set[str]:
+    words = WORD_RE.findall(text.lower())
+    return {" ".join(words[n:n + SHINGLE_WORDS]) for n in range(max(1, len(words) - SHINGLE_WORDS + 1))} if words else set()
+
+
+def minhash(text: str) -> Optional[Tuple[int, ...]]:
+    """
+    MinHash signature of the word shingles, one hash per shingle: the hash
+    picks one of SIGNATURE_SIZE bins by its top bits and every bin keeps its
+    smallest value. None for a text without words. The built-in str hash
+    is salted per process, which is fine: signatures never leave it.
+    """
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    signature = [_EMPTY] * SIGNATURE_SIZE
+    for shingle in shingles:
+        value = hash(shingle) & _HASH_MASK
+        slot, value = value >> _SLOT_SHIFT, value & _VALUE_MASK
+        if value < signature[slot]:
+            signature[slot] = value
+    return tuple(signature)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated share of shingles two texts have in common (Jaccard index)."""
+    same = used = 0
+    for x, y in zip(a, b):
+        if x != _EMPTY or y != _EMPTY:
+            used += 1
+            same += x == y
+    return same / used if used else 0.0
+
+
+class DuplicateIndex:
+    """
+    Signatures of the vacancies already returned, so a re-post of the same
+    text (another city, another agency) is flagged before a second cover
+    letter is written for it.
+
+    dup_of of a vacancy is the ID of the first returned vacancy whose
+    description without boilerplate shares at least `min_similarity` of its
+    word triples, and does not change while the vacancy stays among the last
+    `size` ones. Candidates are the vacancies with an identical band of
+    BAND_ROWS signature values, so a lookup does not compare with everything.
+    """
+
+    def __init__(self, min_similarity: float = DUPLICATE_SIMILARITY, size: int = DUPLICATE_INDEX_SIZE):
+        if not 0 < min_similarity <= 1:
+            raise ValueError("DUPLICATE_SIMILARITY must be above 0 and at most 1")
+        self.min_similarity = min_similarity
+        self.size = max(0, size)
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[int, Tuple[Tuple[int, ...], Optional[int]]]" = \
+            collections.OrderedDict()
+        self._buckets: Dict[Tuple[int, ...], List[int]] = {}
+        self.duplicates = 0
+
+    def annotate(self, vacancies: List[Dict[str, Any]], exclude: bool = False) -> List[Dict[str, Any]]:
+        """Set "dup_of" on every vacancy; with exclude=True drop the duplicates."""
+        selected = []
+        for vacancy in vacancies:
+            vacancy["dup_of"] = self.dup_of(vacancy.get("vacancy_id"), vacancy.get("description"))
+            if not (exclude and vacancy["dup_of"] is not None):
+                selected.append(vacancy)
+        return selected
+
+    def dup_of(self, vacancy_id: Optional[int], description: Optional[str]) -> Optional[int]:
+        if not self.size or vacancy_id is None or not description:
+            return None
+        with self._lock:
+            entry = self._entries.get(vacancy_id)
+            if entry is not None:
+                self._entries.move_to_end(vacancy_id)
+                return entry[1]
+
+        signature = minhash(strip_boilerplate(description))
+        if signature is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(vacancy_id)
+            if entry is not None:  # another request got here first
+                return entry[1]
+            original = self._find(signature)
+            self._entries[vacancy_id] = (signature, original)
+            for key in self._keys(signature):
+                self._buckets.setdefault(key, []).append(vacancy_id)
+            if original is not None:
+                self.duplicates += 1
+            while len(self._entries) > self.size:
+                self._evict()
+        return original
+
+    @staticmethod
+    def _keys(signature: Tuple[int, ...]) -> Iterator[Tuple[int, ...]]:
+        for start in range(0, SIGNATURE_SIZE, BAND_ROWS):
+            band = signature[start:start + BAND_ROWS]
+            if any(value != _EMPTY for value in band):  # short texts leave bins empty
+                yield (start,) + band
+
+    def _find(self, signature: Tuple[int, ...]) -> Optional[int]:
+        checked = set()
+        for key in self._keys(signature):
+            for other in self._buckets.get(key, ()):
+                if other in checked:
+                    continue
+                checked.add(other)
+                other_signature, other_original = self._entries[other]
+                if similarity(signature, other_signature) >= self.min_similarity:
+                    return other if other_original is None else other_original
+        return None
+
+    def _evict(self):
+        vacancy_id, (signature, _) = self._entries.popitem(last=False)
+        for key in self._keys(signature):
+            bucket = self._buckets[key]
+            bucket.remove(vacancy_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "duplicates": self.duplicates}
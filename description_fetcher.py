@@ -0,0 +1,206 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from playwright.async_api import async_playwright
+from dotenv import load_dotenv
+
+import metrics
+from browser_pool import current_storage_state
+from rate_limiter import LIMITER, RateLimited, is_captcha_url
+from resource_blocker import lean_profile
+from search_vacancies import DESCRIPTION_SELECTOR
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+DESCRIPTION_CONCURRENCY = int(os.getenv("DESCRIPTION_CONCURRENCY", 4))  # pages open at once
+HOST_DELAY_MS = int(os.getenv("DESCRIPTION_HOST_DELAY_MS", 250))  # min gap between navigations per host
+DESCRIPTION_TIMEOUT = float(os.getenv("DESCRIPTION_TIMEOUT", 20))  # seconds per vacancy page
+
+logger = logging.getLogger("DescriptionFetcher")
+
+
+class _HostThrottle:
+    """Spaces out navigation starts to the same host by at least `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url: str):
+        if self.delay <= 0:
+            return
+        host = urllib.parse.urlparse(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DescriptionFetcher:
+    """
+    Loads vacancy descriptions concurrently: up to `concurrency` pages in one
+    browser context, driven by async Playwright on a background event loop.
+
+    Results keep the order of the input URLs; a page that fails or times out
+    yields an empty description without holding up the others.
+    """
+
+    def __init__(
+        self,
+        storage_state,
+        concurrency: int = DESCRIPTION_CONCURRENCY,
+        host_delay_ms: int = HOST_DELAY_MS,
+        page_timeout: float = DESCRIPTION_TIMEOUT,
+    ):
+        self.storage_state = storage_state
+        self.concurrency = max(1, concurrency)
+        self.host_delay = host_delay_ms / 1000
+        self.page_timeout = page_timeout
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="description-fetcher", daemon=True)
+
+        # Created on the event loop in _start()
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._context_state = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle_pages: list = []
+        self._throttle: Optional[_HostThrottle] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    # ---- public, thread-safe API ----
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        logger.info(f"Description fetcher started ({self.concurrency} pages)")
+
+    def iter_descriptions(self, urls: List[str]) -> Iterator[Tuple[int, str]]:
+        """Yield (index, description) pairs as soon as each page is done."""
+        trace = metrics.current_trace()
+        futures = {
+            asyncio.run_coroutine_threadsafe(self._fetch(url, trace), self._loop): i
+            for i, url in enumerate(urls)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future], future.result()
+
+    def shutdown(self, timeout: float = 30):
+        if not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Description fetcher did not stop cleanly: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        logger.info("Description fetcher stopped")
+
+    # ---- event loop side ----
+
+    async def _start(self):
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._throttle = _HostThrottle(self.host_delay)
+        self._launch_lock = asyncio.Lock()
+        self._playwright = await async_playwright().start()
+        try:
+            await self._ensure_context()
+        except Exception as e:
+            logger.error(f"Initial browser launch failed: {e}")
+
+    async def _stop(self):
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def _ensure_context(self):
+        async with self._launch_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Description browser disconnected, relaunching")
+                await self._close_browser()
+            state = current_storage_state(self.storage_state)
+            if self._browser is not None and state is not self._context_state:
+                # A new login: open pages keep working with the new cookies
+                await self._context.clear_cookies()
+                await self._context.add_cookies(state.get("cookies", []))
+                self._context_state = state
+            if self._browser is None:
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._context = await self._browser.new_context(storage_state=state)
+                self._context_state = state
+                profile = lean_profile("search")
+                if profile is not None:
+                    await profile.install_async(self._context)
+
+    async def _close_browser(self):
+        self._idle_pages = []
+        for obj in (self._context, self._browser):
+            if obj is None:
+                continue
+            try:
+                await obj.close()
+            except Exception:
+                pass
+        self._context = None
+        self._browser = None
+
+    async def _fetch(self, url: str, trace: Optional[metrics.Trace] = None) -> str:
+        async with self._slots:
+            page = None
+            healthy = False
+            try:
+                await self._ensure_context()
+                page = self._idle_pages.pop() if self._idle_pages else await self._context.new_page()
+                await self._throttle.wait(url)
+                await LIMITER.acquire_async(trace=trace)
+                with metrics.stage("description_page", trace):
+                    description = await asyncio.wait_for(self._load(page, url, trace), timeout=self.page_timeout)
+                healthy = True
+                return description
+            except RateLimited:
+                # The whole search answers 503 with Retry-After instead of empty descriptions
+                raise
+            except Exception as e:
+                LIMITER.report_error(e)
+                logger.warning(f"Failed to get description for {url}: {e!r}")
+                return ""
+            finally:
+                if page is not None:
+                    if healthy and not page.is_closed():
+                        self._idle_pages.append(page)
+                    else:
+                        # An aborted navigation leaves the page in an unknown state
+                        try:
+                            await page.close()
+                        except Exception:
+                            pass
+
+    @staticmethod
+    async def _load(page, url: str, trace: Optional[metrics.Trace] = None) -> str:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        # A targeted check instead of reading the whole HTML
+        captcha = is_captcha_url(page.url) or "captcha" in (await page.title()).lower()
+        LIMITER.report_response(response.status if response else None, captcha,
+                                response.headers.get("retry-after") if response else None)
+        if captcha:
+            metrics.captcha("browser", trace)
+            logger.warning(f"Bot protection on {url}")
+            return ""
+        await page.wait_for_selector(DESCRIPTION_SELECTOR, timeout=10000)
+        description_el = page.locator(DESCRIPTION_SELECTOR)
+        if await description_el.count() == 0:
+            return ""
+        return (await description_el.inner_text()).strip()
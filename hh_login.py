@@ -4,6 +4,8 @@ import json
 from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
 
+from resource_blocker import lean_profile
+
 load_dotenv()
 
 # Путь для хранения файлов n8n и сессий
@@ -23,7 +25,11 @@ def ensure_dir():
         os.makedirs(N8N_FILES_DIR)
 
 
-def login():
+def login(session_file=SESSION_FILE):
+    """
+    session_file - куда сохранить сессию; для второго аккаунта свой файл
+    (его путь добавляется в HH_SESSION_FILES)
+    """
     if not HH_PHONE:
         print("ERROR: Пожалуйста, укажите HH_PHONE в файле .env")
         return
@@ -39,6 +45,9 @@ def login():
                 "Chrome/120.0.0.0 Safari/537.36"
             )
         )
+        profile = lean_profile("login")
+        if profile is not None:
+            profile.install(context)
 
         page = context.new_page()
         page.goto("https://hh.ru/login", wait_until="domcontentloaded", timeout=60000)
@@ -73,18 +82,18 @@ def login():
         page.wait_for_selector("a[href*='/resume']", timeout=60000)
 
         # Сохраняем cookies и local storage
-        context.storage_state(path=SESSION_FILE)
-        print(f"Сессия успешно сохранена в {SESSION_FILE}")
+        context.storage_state(path=session_file)
+        print(f"Сессия успешно сохранена в {session_file}")
 
         browser.close()
 
 
-def get_cookies():
-    if not os.path.exists(SESSION_FILE):
+def get_cookies(session_file=SESSION_FILE):
+    if not os.path.exists(session_file):
         print("Сессия не найдена. Пожалуйста, сначала выполните login()")
         return None
 
-    with open(SESSION_FILE, "r") as f:
+    with open(session_file, "r") as f:
         state = json.load(f)
         cookies = state.get("cookies", [])
         cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
@@ -93,6 +102,8 @@ def get_cookies():
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--get-cookies":
-        print(get_cookies())
+        print(get_cookies(*sys.argv[2:3]))
+    elif len(sys.argv) > 1:
+        login(sys.argv[1])
     else:
         login()
\ No newline at end of file
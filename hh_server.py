@@ -1,13 +1,37 @@
+import contextlib
+import hashlib
 import http.server
 import json
 import logging
+import threading
+import time
 import urllib.parse
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Import business logic
+import metrics
+import resource_blocker
+import response_encoding
+from apply_jobs import ApplyJobRunner, ApplyJobStore, JOBS_FILE
+from applied_ledger import AppliedLedger
 from apply_vacancy import apply_to_vacancy
-from search_vacancies import search_vacancies
+from browser_pool import POOL_SIZE, BrowserPool
+from description_compact import DuplicateIndex, compact
+from description_fetcher import DESCRIPTION_CONCURRENCY, DescriptionFetcher
+from http_fetcher import FETCH_MODE, HttpFetcher
+from prefetch import PREFETCH_QUERIES, PrefetchScheduler, parse_targets
+from rate_limiter import LIMITER, RateLimited
+from result_cache import ResultCache
+from search_vacancies import (
+    AREA_CODE, CARD_FIELDS, extract_vacancy_id, get_descriptions, search_pages, vacancy_url
+)
+from seen_index import InvalidCursor, SeenIndex
+from session_manager import NoSessionAvailable, SessionManager
+from vacancy_filter import FilterRules, VacancyFilter
+from vacancy_cache import DescriptionCache
 
 import os
 from dotenv import load_dotenv
@@ -18,6 +42,14 @@ load_dotenv()
 
 HOST = os.getenv("SERVER_HOST", "127.0.0.1")
 PORT = int(os.getenv("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 8))  # requests processed at once
+SERVER_QUEUE_DEPTH = int(os.getenv("SERVER_QUEUE_DEPTH", 32))  # waiting requests before 503
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", 10))  # per /search call
+SERP_PAGE_SIZE = 20
+WRITE_BATCH_BYTES = 64 * 1024  # response pieces are written to the socket in batches of this size
+WARMUP_SEARCH_TEXT = os.getenv("WARMUP_SEARCH_TEXT", "")  # SERP opened once per session at startup (empty - off)
+VACANCY_FIELDS = CARD_FIELDS + ("applied", "score", "description", "description_compact", "dup_of")  # fields=
+DESCRIPTION_FIELDS = ("description", "description_compact", "dup_of")  # need the vacancy page
 
 logging.basicConfig(
     level=logging.INFO,
@@ -28,52 +60,391 @@ logger = logging.getLogger("HHServer")
 
 
 
+def _query_flag(query_params: Dict[str, list], name: str) -> bool:
+    return query_params.get(name, ["0"])[0].lower() in ("1", "true", "yes")
+
+
+def _parse_page_range(query_params: Dict[str, list]) -> Tuple[List[int], Optional[int]]:
+    """
+    SERP pages and result limit of a /search call:
+    page=N (default), pages=0-3 or pages=0,2,5, limit=50.
+    An incremental search (since=...) walks up to SEARCH_MAX_PAGES pages
+    from `page` unless pages= is given; it stops early by itself.
+    """
+    limit = None
+    if "limit" in query_params:
+        limit = int(query_params["limit"][0])
+        if limit <= 0:
+            raise ValueError("'limit' must be positive")
+
+    # Every span is checked before it is expanded: pages=0-999999999 must not build the list
+    too_many = f"At most {SEARCH_MAX_PAGES} pages per request"
+    if "pages" in query_params:
+        pages = set()
+        for part in query_params["pages"][0].split(","):
+            first, _, last = part.strip().partition("-")
+            first, last = int(first), int(last or first)
+            if last < first:
+                raise ValueError("Invalid page range")
+            if last - first + 1 > SEARCH_MAX_PAGES:
+                raise ValueError(too_many)
+            pages.update(range(first, last + 1))
+            if len(pages) > SEARCH_MAX_PAGES:
+                raise ValueError(too_many)
+        page_nums = sorted(pages)
+    else:
+        start = int(query_params.get("page", ["0"])[0])
+        if "since" in query_params:
+            count = SEARCH_MAX_PAGES
+        else:
+            count = -(-limit // SERP_PAGE_SIZE) if limit else 1
+        if count > SEARCH_MAX_PAGES:
+            raise ValueError(too_many)
+        page_nums = list(range(start, start + count))
+
+    if not page_nums or page_nums[0] < 0:
+        raise ValueError("Invalid page range")
+    return page_nums, limit
+
+
+def _parse_fields(query_params: Dict[str, list]) -> Optional[Tuple[str, ...]]:
+    """fields=title,url,employer: the vacancy fields to return (None - all of them)."""
+    if "fields" not in query_params:
+        return None
+    fields = tuple(dict.fromkeys(name.strip() for name in query_params["fields"][0].split(",") if name.strip()))
+    unknown = [name for name in fields if name not in VACANCY_FIELDS]
+    if not fields or unknown:
+        raise ValueError(f"'fields' must be a subset of: {', '.join(VACANCY_FIELDS)}")
+    return fields
+
+
+def _parse_scoring(query_params: Dict[str, list]) -> Tuple[Optional[float], Optional[int]]:
+    """min_score=2.5 and top_k=10 of a /search call."""
+    min_score = float(query_params["min_score"][0]) if "min_score" in query_params else None
+    top_k = None
+    if "top_k" in query_params:
+        top_k = int(query_params["top_k"][0])
+        if top_k <= 0:
+            raise ValueError("'top_k' must be positive")
+    return min_score, top_k
+
+
+def _field(vacancy: Dict[str, Any], name: str) -> Any:
+    if name == "description_compact":  # only on request: it would nearly double every response
+        return compact(vacancy.get("description") or "")
+    return vacancy.get(name)
+
+
+def _project(vacancy: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    if fields is None:
+        return vacancy
+    projected = {name: _field(vacancy, name) for name in fields}
+    for name in ("index", "error"):  # stream lines keep their position, failed descriptions their error
+        if name in vacancy:
+            projected[name] = vacancy[name]
+    return projected
+
+
+def _vacancy_id(item: Any) -> Optional[int]:
+    """A vacancy given as a number, a numeric string or an hh.ru link."""
+    if isinstance(item, int) and not isinstance(item, bool):
+        return item
+    text = str(item)
+    return int(text) if text.isdigit() else extract_vacancy_id(text)
+
+
+def _search_key(search_text: str, page_nums: List[int], limit: Optional[int], exclude_applied: bool,
+                scoring: "_Scoring") -> tuple:
+    """
+    Result cache key: requests differing only in case, spacing or parameter
+    order share it; so do cards-only requests with different fields=.
+    Editing the filter rules starts a new set of keys.
+    """
+    return ("search", " ".join(search_text.lower().split()), AREA_CODE, tuple(page_nums), limit, exclude_applied,
+            scoring.describe, scoring.key)
+
+
+def _is_complete(vacancies) -> bool:
+    # A result with a failed description is not reused: the next call retries it
+    return isinstance(vacancies, list) and all(vacancy.get("description", True) for vacancy in vacancies)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _route_label(path: str) -> str:
+    """Metric label for a request path; unknown paths share one label."""
+    if path.startswith("/jobs/"):
+        return "/jobs/<id>"
+    if path.startswith("/vacancy/"):
+        return "/vacancy/<id>"
+    if path in ("/search", "/vacancies", "/apply", "/apply/batch", "/sessions", "/health", "/ready", "/metrics"):
+        return path
+    return "other"
+
+
+class _IncrementalSearch:
+    """since=last / since=<cursor> state of one /search call."""
+
+    def __init__(self, index: SeenIndex, search_text: str, since: str):
+        self.index = index
+        self.key = index.query_key(search_text, AREA_CODE)
+        self.as_of = index.resolve(self.key, since)  # raises InvalidCursor
+
+    def is_new(self, vacancy_ids: List[int]):
+        return self.index.unseen(self.key, vacancy_ids, self.as_of)
+
+    def commit(self, vacancy_ids: List[int]) -> str:
+        """Remember the returned vacancies; the result is the cursor of this response."""
+        return str(self.index.mark(self.key, vacancy_ids, self.as_of))
+
+
+class _Scoring:
+    """Filter rules, min_score and top_k of one /search call."""
+
+    def __init__(self, rules: FilterRules, min_score: Optional[float], top_k: Optional[int], describe: bool):
+        self.rules = rules
+        self.min_score = min_score
+        self.top_k = top_k
+        self.describe = describe
+        self.rejected: List[int] = []  # vacancy IDs the rules dropped; top_k cuts are not among them
+
+    @property
+    def key(self) -> tuple:
+        return self.rules.version, self.min_score, self.top_k
+
+    def select(self, cards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Card pass: runs before any description is fetched."""
+        rejected = []
+        selected = self.rules.select(cards, self.min_score, self.top_k, self.describe, rejected)
+        self._reject(rejected, "card")
+        return selected
+
+    def keep(self, vacancy: Dict[str, Any]) -> bool:
+        """Description pass."""
+        if self.rules.rescore(vacancy, self.min_score):
+            return True
+        self._reject([vacancy], "description")
+        return False
+
+    def flag_duplicates(self, index: DuplicateIndex, vacancies: List[Dict[str, Any]],
+                        exclude: bool) -> List[Dict[str, Any]]:
+        """
+        Copies of the vacancies with dup_of; exclude=True drops the duplicates
+        like the rules do. The cached result itself is never annotated: a later
+        request sees dup_of as of its own call, not of the first one.
+        """
+        vacancies = [dict(vacancy) for vacancy in vacancies]
+        with metrics.stage("duplicates"):
+            selected = index.annotate(vacancies, exclude=exclude)
+        if len(selected) < len(vacancies):
+            self._reject([vacancy for vacancy in vacancies if vacancy["dup_of"] is not None], "duplicate")
+        return selected
+
+    def _reject(self, vacancies: List[Dict[str, Any]], stage: str):
+        if vacancies:
+            metrics.FILTERED.inc(len(vacancies), stage=stage)
+            self.rejected.extend(vacancy["vacancy_id"] for vacancy in vacancies)
+
+
+def _run_search(server, search_text: str, page_nums: List[int], limit: Optional[int], exclude_applied: bool,
+                scoring: _Scoring, incremental: Optional[_IncrementalSearch] = None,
+                on_vacancy: Optional[Callable] = None):
+    """search_pages with the browsers of one session, the caches, applied ledger and filter rules."""
+
+    def select(cards):
+        # Runs on the SERP cards, before any description is fetched
+        return scoring.select(server.applied_ledger.annotate(cards, exclude=exclude_applied))
+
+    # The query text is the key of sticky routing
+    with server.sessions.lease(search_text) as session:
+        vacancies = search_pages(
+            search_text, page_nums,
+            limit=limit,
+            select=select,
+            pool=session.browser_pool,
+            fetcher=session.description_fetcher,
+            cache=server.description_cache,
+            http=session.http_fetcher,
+            is_new=incremental.is_new if incremental else None,
+            describe=scoring.describe,
+            on_vacancy=on_vacancy,
+            session_file=session.path
+        )
+    if on_vacancy is None and isinstance(vacancies, list):
+        # With on_vacancy the caller runs the description pass per vacancy
+        vacancies = [vacancy for vacancy in vacancies if scoring.keep(vacancy)]
+    return vacancies
+
+
+def _prefetch_page(server, search_text: str, page_num: int):
+    """Refresh the cached result of /search?text=...&page=N, as the n8n flow calls it."""
+    scoring = _Scoring(server.vacancy_filter.rules(), None, None, True)
+    key = _search_key(search_text, [page_num], None, False, scoring)
+    server.result_cache.get_or_compute(
+        key, lambda: _run_search(server, search_text, [page_num], None, False, scoring),
+        cacheable=_is_complete, refresh=True
+    )
+
+
 class HHRequestHandler(http.server.BaseHTTPRequestHandler):
-    
+    # Responses go out in few large writes; small ones (stream lines) must not wait for an ACK
+    disable_nagle_algorithm = True
+
     def do_GET(self):
         """Handle GET requests (Search)."""
         parsed_url = urllib.parse.urlparse(self.path)
         path = parsed_url.path
         
-        if path == "/search":
-            query_params = urllib.parse.parse_qs(parsed_url.query)
-            self._handle_search(query_params)
-        else:
-            self._send_json_response(
-                {"error": "Not Found", "path": path}, 
-                status_code=HTTPStatus.NOT_FOUND
-            )
+        with self._instrumented(path):
+            if path == "/search":
+                query_params = urllib.parse.parse_qs(parsed_url.query)
+                self._handle_search(query_params)
+            elif path.startswith("/vacancy/"):
+                self._handle_vacancy(path[len("/vacancy/"):], urllib.parse.parse_qs(parsed_url.query))
+            elif path.startswith("/jobs/"):
+                self._handle_job_status(path[len("/jobs/"):])
+            elif path == "/health":
+                self._send_json_response({"status": "ok", "uptime": round(time.monotonic() - self.server.started, 1)})
+            elif path == "/ready":
+                ready, checks = _readiness(self.server)
+                self._send_json_response({"ready": ready, **checks},
+                                         status_code=HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE)
+            elif path == "/sessions":
+                self._send_json_response({"routing": self.server.sessions.routing,
+                                          "sessions": self.server.sessions.stats()})
+            elif path == "/metrics":
+                self._send_text_response(metrics.REGISTRY.exposition(), "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                self._send_json_response(
+                    {"error": "Not Found", "path": path}, 
+                    status_code=HTTPStatus.NOT_FOUND
+                )
 
     def do_POST(self):
         """Handle POST requests (Apply)."""
         parsed_url = urllib.parse.urlparse(self.path)
         path = parsed_url.path
 
-        if path == "/apply":
-            self._handle_apply()
-        else:
-            self._send_json_response(
-                {"error": "Not Found", "path": path}, 
-                status_code=HTTPStatus.NOT_FOUND
-            )
+        with self._instrumented(path):
+            if path == "/vacancies":
+                self._handle_vacancies(urllib.parse.parse_qs(parsed_url.query))
+            elif path == "/apply":
+                self._handle_apply()
+            elif path == "/apply/batch":
+                self._handle_apply_batch()
+            else:
+                self._send_json_response(
+                    {"error": "Not Found", "path": path}, 
+                    status_code=HTTPStatus.NOT_FOUND
+                )
+
+    @contextlib.contextmanager
+    def _instrumented(self, path: str):
+        """Trace the stages of one request, then record it in /metrics and the slow log."""
+        self._status = None
+        route = _route_label(path)
+        # Scrapes and health checks do not keep the background prefetch waiting
+        live = route not in ("/metrics", "/health", "/ready")
+        if live:
+            self.server.request_started()
+        with metrics.traced() as trace:
+            try:
+                yield trace
+            finally:
+                if live:
+                    self.server.request_finished()
+                total_ms = trace.elapsed_ms()
+                metrics.REQUEST_SECONDS.observe(total_ms / 1000, route=route, status=str(self._status or 0))
+                if metrics.SLOW_REQUEST_MS and total_ms >= metrics.SLOW_REQUEST_MS:
+                    metrics.SLOW_REQUESTS.inc(route=route)
+                    logger.warning("Slow request: " + json.dumps({
+                        "method": self.command,
+                        "path": self.path,
+                        "status": self._status,
+                        "total_ms": round(total_ms, 1),
+                        "stages": trace.breakdown(),
+                    }, ensure_ascii=False))
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
 
     def _handle_search(self, query_params: Dict[str, list]):
         """Logic for vacancy search."""
         search_text = query_params.get("text", ["Frontend"])[0]
-        page_num = int(query_params.get("page", ["0"])[0])
-        logger.info(f"Processing Search Request: {search_text}, page {page_num}")
-        
+        exclude_applied = _query_flag(query_params, "exclude_applied")
+        exclude_duplicates = _query_flag(query_params, "exclude_duplicates")
+
         try:
-            vacancies = search_vacancies(search_text, page_num)
-            
+            page_nums, limit = _parse_page_range(query_params)
+            fields = _parse_fields(query_params)
+            min_score, top_k = _parse_scoring(query_params)
+            incremental = None
+            if "since" in query_params:
+                incremental = _IncrementalSearch(self.server.seen_index, search_text, query_params["since"][0])
+        except ValueError as e:  # InvalidCursor included
+            self._send_json_response({"error": str(e)}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+        # Without description fields in fields= no vacancy page is opened at all
+        describe = fields is None or any(name in fields for name in DESCRIPTION_FIELDS)
+        scoring = _Scoring(self.server.vacancy_filter.rules(), min_score, top_k, describe)
+        logger.info(f"Processing Search Request: {search_text}, pages {page_nums}, limit {limit}"
+                    + (f", new since run {incremental.as_of}" if incremental else "")
+                    + ("" if describe else ", cards only")
+                    + (f", min_score {min_score}" if min_score is not None else "")
+                    + (f", top_k {top_k}" if top_k else "")
+                    + (", without duplicates" if exclude_duplicates else ""))
+
+        if _query_flag(query_params, "stream"):
+            self._handle_search_stream(search_text, page_nums, limit, exclude_applied, scoring, incremental, fields,
+                                       exclude_duplicates)
+            return
+
+        def search():
+            return _run_search(self.server, search_text, page_nums, limit, exclude_applied, scoring, incremental)
+
+        try:
+            if incremental is not None:
+                # Every incremental call moves the cursor, so it is never shared
+                vacancies, source = search(), None
+            else:
+                # Identical concurrent calls share one scrape, later ones reuse the result
+                key = _search_key(search_text, page_nums, limit, exclude_applied, scoring)
+                vacancies, source = self.server.result_cache.get_or_compute(key, search, cacheable=_is_complete)
+                if source != "miss" and isinstance(vacancies, list):
+                    # "applied" may have changed since the result was computed
+                    vacancies = self.server.applied_ledger.annotate(
+                        [dict(vacancy) for vacancy in vacancies], exclude=exclude_applied)
+            if isinstance(vacancies, list):
+                # After the cache: a vacancy is a duplicate of what was returned before it
+                vacancies = scoring.flag_duplicates(self.server.duplicate_index, vacancies, exclude_duplicates)
+
             if vacancies is None:
                 self._send_json_response(
                     {"error": "Search returned no data. Check server logs (session might be invalid)."}, 
                     status_code=HTTPStatus.INTERNAL_SERVER_ERROR
                 )
+            elif incremental is not None and isinstance(vacancies, list):
+                # Vacancies the rules dropped are not offered again either
+                cursor = incremental.commit([vacancy["vacancy_id"] for vacancy in vacancies] + scoring.rejected)
+                self._send_json_response([_project(vacancy, fields) for vacancy in vacancies],
+                                         headers={"X-Search-Cursor": cursor})
+            elif source is not None:
+                if isinstance(vacancies, list):
+                    vacancies = [_project(vacancy, fields) for vacancy in vacancies]
+                self._send_json_response(vacancies, headers={"X-Cache": source.upper()}, etag=True)
             else:
                 self._send_json_response(vacancies)
-                
+
+        except RateLimited as e:
+            self._send_rate_limited(e.retry_after)
+        except NoSessionAvailable as e:
+            self._send_json_response({"error": str(e)}, status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
         except Exception as e:
             logger.error(f"Search failed: {e}", exc_info=True)
             self._send_json_response(
@@ -81,6 +452,217 @@ class HHRequestHandler(http.server.BaseHTTPRequestHandler):
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR
             )
 
+    def _handle_search_stream(self, search_text: str, page_nums: List[int], limit: Optional[int],
+                              exclude_applied: bool, scoring: _Scoring, incremental: Optional[_IncrementalSearch] = None,
+                              fields: Optional[Tuple[str, ...]] = None, exclude_duplicates: bool = False):
+        """
+        NDJSON variant of /search: one line per vacancy as soon as its
+        description is ready, then a trailer line with errors and timings.
+        """
+        started = time.monotonic()
+        first_vacancy_ms = None
+        count = 0
+        errors = []
+        delivered = []
+
+        def emit(vacancy):
+            nonlocal first_vacancy_ms, count
+            if not scoring.keep(vacancy):
+                return
+            flagged = scoring.flag_duplicates(self.server.duplicate_index, [vacancy], exclude_duplicates)
+            if not flagged:
+                return
+            vacancy = flagged[0]
+            if first_vacancy_ms is None:
+                first_vacancy_ms = round((time.monotonic() - started) * 1000)
+                self._start_stream()
+            if scoring.describe and not vacancy["description"]:
+                errors.append({"url": vacancy["url"], "error": "Description unavailable"})
+            self._write_chunk(response_encoding.dumps(_project(vacancy, fields)) + b"\n")
+            delivered.append(vacancy["vacancy_id"])
+            count += 1
+
+        try:
+            result = _run_search(self.server, search_text, page_nums, limit, exclude_applied, scoring, incremental,
+                                 on_vacancy=emit)
+            if result is None:
+                errors.append({"error": "Search returned no data. Check server logs (session might be invalid)."})
+            elif isinstance(result, dict) and "error" in result:
+                errors.append(result)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client closed the search stream")
+            return
+        except RateLimited as e:
+            if first_vacancy_ms is None:
+                self._send_rate_limited(e.retry_after)
+                return
+            errors.append({"error": str(e), "retry_after": round(e.retry_after)})
+        except Exception as e:
+            logger.error(f"Search failed: {e}", exc_info=True)
+            errors.append({"error": "Internal Server Error", "message": str(e)})
+
+        # Nothing streamed yet: a failed search still gets a plain error status
+        if first_vacancy_ms is None and errors:
+            self._send_json_response(errors[0], status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+
+        trace = metrics.current_trace()
+        trailer = {
+            "done": True,
+            "count": count,
+            "filtered": len(scoring.rejected),
+            "errors": errors,
+            "timings": {
+                "first_vacancy_ms": first_vacancy_ms,
+                "total_ms": round((time.monotonic() - started) * 1000),
+                # Headers went out before the work was done, so no Server-Timing here
+                "stages": trace.breakdown() if trace is not None else {},
+            },
+        }
+        if incremental is not None:
+            # Only a stream that ran to the end moves the cursor
+            trailer["cursor"] = incremental.commit(delivered + scoring.rejected)
+        try:
+            if first_vacancy_ms is None:
+                self._start_stream()
+            self._write_chunk(response_encoding.dumps(trailer) + b"\n")
+            self._end_stream()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _start_stream(self):
+        # Chunked encoding needs an HTTP/1.1 client; older ones read until close
+        self._chunked = self.request_version == "HTTP/1.1"
+        if self._chunked:
+            self.protocol_version = "HTTP/1.1"
+        # The total size is unknown here, so any client accepting gzip gets it; every line is flushed
+        encoding = response_encoding.negotiate(self.headers.get("Accept-Encoding"))
+        self._stream_compressor = response_encoding.compressor(encoding) if encoding else None
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if self._chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _write_chunk(self, data: bytes):
+        if self._stream_compressor is not None:
+            data = self._stream_compressor.compress(data) + self._stream_compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._write_raw_chunk(data)
+
+    def _write_raw_chunk(self, data: bytes):
+        if self._chunked:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        else:
+            self.wfile.write(data)
+
+    def _end_stream(self):
+        if self._stream_compressor is not None:
+            self._write_raw_chunk(self._stream_compressor.flush())
+        if self._chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _handle_vacancy(self, vacancy_id: str, query_params: Dict[str, list]):
+        """Description of one vacancy, fetched only now (or read from the cache)."""
+        if not vacancy_id.isdigit():
+            self._send_json_response({"error": "Vacancy ID must be numeric"}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+        try:
+            fields = _parse_fields(query_params)
+        except ValueError as e:
+            self._send_json_response({"error": str(e)}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+        try:
+            vacancy = self._describe([int(vacancy_id)])
+        except RateLimited as e:
+            self._send_rate_limited(e.retry_after)
+            return
+        if vacancy is None:
+            self._send_json_response(
+                {"error": "Session file not found. Run hh_login.py first."},
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR
+            )
+        elif "error" in vacancy[0] and LIMITER.pause_remaining() > 0:
+            # Not fetched because hh.ru is paused after a captcha
+            self._send_rate_limited(LIMITER.pause_remaining())
+        elif "error" in vacancy[0]:
+            self._send_json_response(vacancy[0], status_code=HTTPStatus.BAD_GATEWAY)
+        else:
+            self._send_json_response(_project(vacancy[0], fields))
+
+    def _handle_vacancies(self, query_params: Dict[str, list]):
+        """Descriptions of many vacancies: {"ids": [...]} with IDs or hh.ru links."""
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(content_length).decode("utf-8")) if content_length else None
+        except json.JSONDecodeError:
+            self._send_json_response({"error": "Invalid JSON"}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+
+        items = data.get("ids") if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            self._send_json_response({"error": "Expected a non-empty list of vacancy IDs"},
+                                     status_code=HTTPStatus.BAD_REQUEST)
+            return
+        ids = [_vacancy_id(item) for item in items]
+        if None in ids:
+            self._send_json_response({"error": "Every item must be a vacancy ID or an hh.ru vacancy link"},
+                                     status_code=HTTPStatus.BAD_REQUEST)
+            return
+        if len(ids) > SEARCH_MAX_PAGES * SERP_PAGE_SIZE:
+            self._send_json_response({"error": f"At most {SEARCH_MAX_PAGES * SERP_PAGE_SIZE} vacancies per request"},
+                                     status_code=HTTPStatus.BAD_REQUEST)
+            return
+        try:
+            fields = _parse_fields(query_params)
+        except ValueError as e:
+            self._send_json_response({"error": str(e)}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+
+        logger.info(f"Processing Vacancies Request: {len(ids)} vacancy(ies)")
+        try:
+            vacancies = self._describe(ids)
+        except RateLimited as e:
+            self._send_rate_limited(e.retry_after)
+            return
+        if vacancies is None:
+            self._send_json_response(
+                {"error": "Session file not found. Run hh_login.py first."},
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR
+            )
+        else:
+            self._send_json_response([_project(vacancy, fields) for vacancy in vacancies])
+
+    def _describe(self, vacancy_ids: List[int]) -> Optional[List[Dict[str, Any]]]:
+        urls = [vacancy_url(vid) for vid in vacancy_ids]
+        try:
+            with self.server.sessions.lease() as session:
+                descriptions = get_descriptions(
+                    urls,
+                    pool=session.browser_pool,
+                    fetcher=session.description_fetcher,
+                    cache=self.server.description_cache,
+                    http=session.http_fetcher,
+                    session_file=session.path
+                )
+        except NoSessionAvailable:
+            return None
+        if descriptions is None:
+            return None
+        vacancies = []
+        for vid, url, description in zip(vacancy_ids, urls, descriptions):
+            vacancy = {"vacancy_id": vid, "url": url, "applied": self.server.applied_ledger.is_applied(vid),
+                       "description": description}
+            if not description:
+                vacancy["error"] = "Description unavailable"
+            vacancies.append(vacancy)
+        return self.server.duplicate_index.annotate(vacancies)
+
     def _handle_apply(self):
         """Logic for applying to a vacancy."""
         try:
@@ -97,6 +679,7 @@ class HHRequestHandler(http.server.BaseHTTPRequestHandler):
             
             url = data.get("url")
             message = data.get("message", "")
+            session_name = data.get("session")
 
             if not url:
                 self._send_json_response(
@@ -104,9 +687,15 @@ class HHRequestHandler(http.server.BaseHTTPRequestHandler):
                     status_code=HTTPStatus.BAD_REQUEST
                 )
                 return
+            if session_name is not None and self.server.sessions.get(session_name) is None:
+                self._send_json_response(
+                    {"error": f"Unknown session {session_name!r}"},
+                    status_code=HTTPStatus.BAD_REQUEST
+                )
+                return
 
             logger.info(f"Processing Apply Request for: {url}")
-            result = apply_to_vacancy(url, message)
+            result = _apply_with_session(self.server, url, message, session_name)
             self._send_json_response(result)
 
         except json.JSONDecodeError:
@@ -121,19 +710,62 @@ class HHRequestHandler(http.server.BaseHTTPRequestHandler):
                 status_code=HTTPStatus.INTERNAL_SERVER_ERROR
             )
 
-    def _send_json_response(self, data: Any, status_code: int = 200):
+    def _handle_apply_batch(self):
+        """Queue many {url, message} items and return the job ID right away."""
         try:
-            response_body = json.dumps(data, ensure_ascii=False)
-            body = response_body.encode("utf-8")
+            content_length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(content_length).decode("utf-8")) if content_length else None
+        except json.JSONDecodeError:
+            self._send_json_response({"error": "Invalid JSON"}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+
+        items = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            self._send_json_response(
+                {"error": "Expected a non-empty list of {url, message} items"},
+                status_code=HTTPStatus.BAD_REQUEST
+            )
+            return
+        if not all(isinstance(item, dict) and item.get("url") for item in items):
+            self._send_json_response({"error": "Every item needs a 'url' field"}, status_code=HTTPStatus.BAD_REQUEST)
+            return
+
+        job_id = self.server.job_store.create_job(items)
+        self.server.job_runner.notify()
+        logger.info(f"Queued apply job {job_id} with {len(items)} item(s)")
+        self._send_json_response(
+            {"job_id": job_id, "items": len(items), "status_url": f"/jobs/{job_id}"},
+            status_code=HTTPStatus.ACCEPTED
+        )
 
-            self.send_response(status_code)
-            self.send_header("Content-Type", "application/json; charset=utf-8")
-            self.send_header("Content-Length", str(len(body)))
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.end_headers()
+    def _handle_job_status(self, job_id: str):
+        job = self.server.job_store.get_job(job_id)
+        if job is None:
+            self._send_json_response({"error": "Job not found", "job_id": job_id}, status_code=HTTPStatus.NOT_FOUND)
+        else:
+            self._send_json_response(job)
+
+    def _send_json_response(self, data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+                            etag: bool = False):
+        """etag=True: a 200 carries an ETag and If-None-Match with it is answered with 304."""
+        try:
+            # Item by item: the body is never held as one str and again as bytes
+            body = response_encoding.json_pieces(data)
+            encoding = self._content_encoding(body)
 
-            self.wfile.write(body)
+            if etag and status_code == HTTPStatus.OK:
+                digest = hashlib.sha1()
+                for piece in body:
+                    digest.update(piece)
+                # Every encoding of the body is a representation with its own tag
+                tag = '"%s%s"' % (digest.hexdigest(), f"-{encoding}" if encoding else "")
+                headers = dict(headers or {}, ETag=tag)
+                if _etag_matches(self.headers.get("If-None-Match"), tag):
+                    status_code, body = HTTPStatus.NOT_MODIFIED, []
 
+            trace = metrics.current_trace()
+            headers = dict(headers or {}, **{"Access-Control-Allow-Origin": "*"})
+            self._send_body(status_code, "application/json; charset=utf-8", body, encoding, headers, trace)
 
         except BrokenPipeError:
             pass
@@ -147,22 +779,391 @@ class HHRequestHandler(http.server.BaseHTTPRequestHandler):
             except BrokenPipeError:
                 pass
 
+    def _send_rate_limited(self, retry_after: float):
+        """503 while requests to hh.ru are paused, instead of a captcha or a long wait."""
+        retry_after = max(1, round(retry_after))
+        self._send_json_response(
+            {"error": "Requests to hh.ru are paused after bot protection", "retry_after": retry_after},
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": str(retry_after)})
+
+    def _send_text_response(self, text: str, content_type: str, status_code: int = 200):
+        body = [text.encode("utf-8")]
+        try:
+            self._send_body(status_code, content_type, body, self._content_encoding(body))
+        except BrokenPipeError:
+            pass
+
+    def _content_encoding(self, body: List[bytes]) -> Optional[str]:
+        """gzip or deflate when the client accepts it and the body is worth compressing."""
+        if not response_encoding.should_compress(sum(len(piece) for piece in body)):
+            return None
+        return response_encoding.negotiate(self.headers.get("Accept-Encoding"))
+
+    def _send_body(self, status_code: int, content_type: str, body: List[bytes], encoding: Optional[str] = None,
+                   headers: Optional[Dict[str, str]] = None, trace: Optional[metrics.Trace] = None):
+        if encoding and body:
+            with metrics.stage("compress"):
+                body = response_encoding.compress(body, encoding)
+        self.send_response(status_code)
+        if status_code != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(sum(len(piece) for piece in body)))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+        if response_encoding.COMPRESS_MIN_BYTES >= 0:
+            self.send_header("Vary", "Accept-Encoding")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if trace is not None:
+            self.send_header("Server-Timing", trace.server_timing())
+        self.end_headers()
+
+        # Few large writes instead of one per piece, without joining the whole body
+        batch = bytearray()
+        for piece in body:
+            batch += piece
+            if len(batch) >= WRITE_BATCH_BYTES:
+                self.wfile.write(batch)
+                batch.clear()
+        if batch:
+            self.wfile.write(batch)
+
+
+# -------------------- SERVER --------------------
+
+def _apply_with_session(server, url: str, message: str, session_name: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        with server.sessions.lease(url, session_name) as session:
+            # One account must not run two apply flows at the same time
+            with server.session_lock(session.name):
+                result = apply_to_vacancy(url, message, pool=session.browser_pool, ledger=server.applied_ledger,
+                                          session_file=session.path)
+    except NoSessionAvailable as e:
+        metrics.APPLY_OUTCOMES.inc(status="error")
+        return {"status": "error", "message": str(e)}
+    if len(server.sessions) > 1:
+        result["session"] = session.name
+    return result
+
+
+def _warm_up(server, fetchers: Dict[str, DescriptionFetcher]):
+    """
+    Runs while the server already answers: waits for the pooled browsers,
+    starts the description fetchers and opens WARMUP_SEARCH_TEXT once in
+    every session, so the first real /search finds everything running.
+    """
+    for session in server.sessions.sessions:
+        started = time.monotonic()
+        browsers = session.browser_pool.wait_ready() if session.browser_pool is not None else 0
+        fetcher = fetchers.get(session.name)
+        if fetcher is not None:
+            fetcher.start()
+            # /search uses it only from now on
+            session.description_fetcher = fetcher
+        if WARMUP_SEARCH_TEXT and browsers and session.status() == "ok":
+            with metrics.traced():
+                try:
+                    search_pages(WARMUP_SEARCH_TEXT, [0], pool=session.browser_pool, describe=False,
+                                 session_file=session.path)
+                except Exception as e:
+                    logger.warning(f"Warm-up search in session {session.name} failed: {e}")
+        logger.info(f"Session {session.name} warmed up in {time.monotonic() - started:.1f}s ({browsers} browser(s))")
+    server.warmed_up.set()
+    ready, checks = _readiness(server)
+    logger.info(f"{'Ready' if ready else 'Not ready'} {time.monotonic() - server.started:.1f}s after start: "
+                + json.dumps(checks, ensure_ascii=False))
+
+
+def _readiness(server) -> Tuple[bool, Dict[str, Any]]:
+    """Warm-up done, a session that is not missing or expired, and its browsers running."""
+    for session in server.sessions.sessions:
+        session.refresh()  # a login saved after startup makes the server ready
+    sessions = {session.name: session.status() for session in server.sessions.sessions}
+    usable = [session for session in server.sessions.sessions if sessions[session.name] in ("ok", "captcha")]
+    checks: Dict[str, Any] = {"warmed_up": server.warmed_up.is_set(), "sessions": sessions}
+    ready = checks["warmed_up"] and bool(usable)
+    pools = [session.browser_pool for session in usable if session.browser_pool is not None]
+    if pools:
+        checks["browsers"] = sum(pool.running() for pool in pools)
+        ready = ready and checks["browsers"] > 0
+    return ready, checks
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """
+    HTTPServer that hands every connection to a bounded worker pool.
+
+    At most `workers` requests run at once and `queue_depth` more may wait;
+    anything beyond that is answered with 503 right away.
+    """
+
+    def __init__(self, server_address, handler_class, workers: int = SERVER_WORKERS,
+                 queue_depth: int = SERVER_QUEUE_DEPTH):
+        super().__init__(server_address, handler_class)
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http")
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, queue_depth))
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._session_locks_guard = threading.Lock()
+        self._activity_lock = threading.Lock()
+        self._active_requests = 0
+        self._last_request = time.monotonic()
+        self.started = time.monotonic()
+        self.warmed_up = threading.Event()
+
+    def request_started(self):
+        with self._activity_lock:
+            self._active_requests += 1
+
+    def request_finished(self):
+        with self._activity_lock:
+            self._active_requests -= 1
+            self._last_request = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds since the last live request ended; 0 while one is running."""
+        with self._activity_lock:
+            return 0.0 if self._active_requests else time.monotonic() - self._last_request
+
+    def session_lock(self, session_id: str) -> threading.Lock:
+        """Lock serializing actions performed with one hh.ru account."""
+        with self._session_locks_guard:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Request queue is full, rejecting {client_address[0]}")
+            self._reject(request)
+            return
+        self._executor.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def _reject(self, request):
+        body = json.dumps({"error": "Server busy, retry later"}).encode("utf-8")
+        head = (
+            "HTTP/1.0 503 Service Unavailable\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Retry-After: 5\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1")
+        try:
+            request.sendall(head + body)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 # -------------------- MAIN --------------------
 
+def _register_metrics(httpd):
+    """Component state read at scrape time."""
+    cache = httpd.description_cache
+    metrics.REGISTRY.callback(
+        "hh_description_cache_lookups_total", "Description cache lookups",
+        lambda: {"hit": cache.stats()["hits"], "miss": cache.stats()["misses"]}, kind="counter", label="result")
+    metrics.REGISTRY.callback(
+        "hh_description_cache_bytes", "Size of the cached descriptions", lambda: cache.stats()["bytes"])
+    metrics.REGISTRY.callback(
+        "hh_apply_queue_items", "Batch apply items pending or running", httpd.job_store.queued)
+    result_cache = httpd.result_cache
+    metrics.REGISTRY.callback(
+        "hh_result_cache_lookups_total", "/search result cache lookups (coalesced - waited for an identical call)",
+        lambda: {"hit": result_cache.stats()["hits"], "miss": result_cache.stats()["misses"],
+                 "coalesced": result_cache.stats()["coalesced"]}, kind="counter", label="result")
+    metrics.REGISTRY.callback(
+        "hh_result_cache_bytes", "Size of the cached /search results", lambda: result_cache.stats()["bytes"])
+    if LIMITER.enabled:
+        metrics.REGISTRY.callback(
+            "hh_rate_limit_rps", "Current request rate allowed towards hh.ru", lambda: LIMITER.rps)
+        metrics.REGISTRY.callback(
+            "hh_rate_limit_pause_seconds", "Seconds left of the pause after bot protection", LIMITER.pause_remaining)
+    metrics.REGISTRY.callback(
+        "hh_duplicate_vacancies_total", "Vacancies that repeat the description of one returned earlier",
+        lambda: httpd.duplicate_index.stats()["duplicates"], kind="counter")
+    metrics.REGISTRY.callback("hh_ready", "1 while /ready answers 200", lambda: int(_readiness(httpd)[0]))
+    sessions = httpd.sessions.sessions
+    pools = [session.browser_pool for session in sessions if session.browser_pool is not None]
+    if pools:
+        metrics.REGISTRY.callback(
+            "hh_browser_pool_idle", "Idle pooled browsers", lambda: sum(pool.stats()["idle"] for pool in pools))
+    metrics.REGISTRY.callback(
+        "hh_session_requests_total", "Work routed to each hh.ru session",
+        lambda: {session.name: session.requests for session in sessions}, kind="counter", label="session")
+    metrics.REGISTRY.callback(
+        "hh_session_in_flight", "Work running on each hh.ru session",
+        lambda: {session.name: session.in_flight for session in sessions}, label="session")
+    metrics.REGISTRY.callback(
+        "hh_session_up", "1 while a session is healthy (not expired, no recent captcha)",
+        lambda: {session.name: int(session.status() == "ok") for session in sessions}, label="session")
+    prefetcher = httpd.prefetcher
+    if prefetcher.targets:
+        metrics.REGISTRY.callback(
+            "hh_prefetch_requests_total", "Requests to hh.ru spent on background prefetch",
+            lambda: prefetcher.stats()["requests"], kind="counter")
+        metrics.REGISTRY.callback(
+            "hh_prefetch_budget_left", "Prefetch requests left in the last hour",
+            lambda: prefetcher.stats()["budget_left"])
+    http_fetchers = [session.http_fetcher for session in sessions if session.http_fetcher is not None]
+    if http_fetchers:
+        metrics.REGISTRY.callback(
+            "hh_http_fetch_total", "HTTP fast path outcomes", lambda: {
+                "parsed": sum(fetcher.stats()["parsed"] for fetcher in http_fetchers),
+                "fallback": sum(fetcher.stats()["fallbacks"] for fetcher in http_fetchers),
+            }, kind="counter", label="result")
+    if resource_blocker.LEAN_PAGES:
+        metrics.REGISTRY.callback(
+            "hh_lean_blocked_requests_total", "Browser requests aborted by the lean page profiles",
+            lambda: {(name, reason): count for name, profile in resource_blocker.stats().items()
+                     for reason, count in profile["blocked_by_reason"].items()},
+            kind="counter", label=("profile", "reason"))
+        metrics.REGISTRY.callback(
+            "hh_lean_allowed_requests_total", "Browser requests the lean page profiles let through",
+            lambda: {name: profile["allowed_requests"] for name, profile in resource_blocker.stats().items()},
+            kind="counter", label="profile")
+        metrics.REGISTRY.callback(
+            "hh_lean_allowed_bytes_total", "Content-Length of the responses to the requests let through",
+            lambda: {name: profile["allowed_bytes"] for name, profile in resource_blocker.stats().items()},
+            kind="counter", label="profile")
+
+
 def run_server():
     server_address = (HOST, PORT)
     
-    httpd = http.server.HTTPServer(server_address, HHRequestHandler)
-    logger.info(f"HH Proxy Server running on http://{HOST}:{PORT}")
+    httpd = PooledHTTPServer(server_address, HHRequestHandler)
+
+    httpd.description_cache = DescriptionCache()
+    logger.info(f"Description cache: {httpd.description_cache.path} {httpd.description_cache.stats()}")
+
+    # hh.ru accounts; /search and /apply are routed between them
+    httpd.sessions = SessionManager()
+    multi = len(httpd.sessions) > 1
+    pool_size = POOL_SIZE
+    if multi and pool_size == 0:
+        # A browser launched per call would not know which account to use
+        logger.warning("BROWSER_POOL_SIZE=0 with several sessions: using one pooled browser per session")
+        pool_size = 1
+    fetchers = {}
+    for session in httpd.sessions.sessions:
+        # Browsers of each account: launched in the background, borrowed by /search and /apply
+        if pool_size > 0:
+            session.browser_pool = BrowserPool(session, size=pool_size, name=session.name if multi else "browser")
+            session.browser_pool.start()
+
+            # Descriptions of one SERP page are loaded in parallel tabs; started by the warm-up
+            if DESCRIPTION_CONCURRENCY > 1:
+                fetchers[session.name] = DescriptionFetcher(session)
+
+        # Read-only pages over plain HTTP; the browsers above are the fallback
+        if FETCH_MODE == "http":
+            session.http_fetcher = HttpFetcher(session)
+            logger.info(f"HTTP fast path: {session.http_fetcher.base.geturl()} "
+                        f"({session.http_fetcher.max_connections} connections)")
+    logger.info(f"Sessions ({httpd.sessions.routing}): "
+                + ", ".join(f"{session.name} [{session.status()}]" for session in httpd.sessions.sessions))
+
+    # Repeated and concurrent identical /search calls share one scrape
+    httpd.result_cache = ResultCache()
+    logger.info(f"Result cache: TTL {httpd.result_cache.ttl:.0f}s, {httpd.result_cache.max_bytes // (1024 * 1024)} MB")
+    compress_from = response_encoding.COMPRESS_MIN_BYTES
+    logger.info(f"Responses: {response_encoding.encoder_name()} JSON, "
+                + (f"gzip/deflate from {compress_from} bytes" if compress_from >= 0 else "not compressed"))
+
+    # Include/exclude rules and scores, applied before descriptions are fetched
+    httpd.vacancy_filter = VacancyFilter()
+    logger.info(f"Filter rules: {httpd.vacancy_filter.path} ({'active' if httpd.vacancy_filter.rules() else 'none'})")
+
+    # since=last: vacancies already returned for a query are not returned again
+    httpd.seen_index = SeenIndex()
+
+    # dup_of: re-posts of a description already returned
+    httpd.duplicate_index = DuplicateIndex()
+
+    # Vacancies already applied to are skipped without a browser
+    httpd.applied_ledger = AppliedLedger()
+    logger.info(f"Applied ledger: {httpd.applied_ledger.path} {httpd.applied_ledger.stats()}")
+
+    if LIMITER.enabled:
+        logger.info(f"Rate limit towards hh.ru: {LIMITER.rps:g} req/s (burst {LIMITER.burst})")
+    else:
+        logger.info("Rate limit towards hh.ru: off")
+
+    # Batch applications survive restarts in SQLite
+    httpd.job_store = ApplyJobStore(JOBS_FILE)
+    httpd.job_runner = ApplyJobRunner(
+        httpd.job_store, lambda url, message: _apply_with_session(httpd, url, message)
+    )
+    httpd.job_runner.start()
+
+    # Configured queries are searched again in quiet periods, so /search finds them cached
+    httpd.prefetcher = PrefetchScheduler(
+        parse_targets(PREFETCH_QUERIES, SEARCH_MAX_PAGES),
+        lambda search_text, page_num: _prefetch_page(httpd, search_text, page_num),
+        httpd.idle_for
+    )
+    httpd.prefetcher.start()
+
+    _register_metrics(httpd)
+
+    # Requests are served meanwhile; /ready answers 200 once this is done
+    threading.Thread(target=_warm_up, args=(httpd, fetchers), name="warm-up", daemon=True).start()
+
+    logger.info(f"HH Proxy Server running on http://{HOST}:{PORT} ({httpd.workers} workers)")
     logger.info("Endpoints:")
     logger.info(f"  GET  /search?text=Frontend")
-    logger.info(f"  POST /apply  {{ 'url': '...', 'message': '...' }}")
+    logger.info(f"  GET  /search?text=Frontend&stream=1  (NDJSON)")
+    logger.info(f"  GET  /search?text=Frontend&pages=0-3  (or &limit=60)")
+    logger.info(f"  GET  /search?text=Frontend&exclude_applied=1")
+    logger.info(f"  GET  /search?text=Frontend&exclude_duplicates=1")
+    logger.info(f"  GET  /search?text=Frontend&since=last  (or since=<X-Search-Cursor>)")
+    logger.info(f"  GET  /search?text=Frontend&fields=title,url,employer  (no descriptions)")
+    logger.info(f"  GET  /search?text=Frontend&min_score=3&top_k=10  (rules: {httpd.vacancy_filter.path})")
+    logger.info(f"  GET  /vacancy/<vacancy_id>")
+    logger.info(f"  POST /vacancies  {{ 'ids': [123, 'https://hh.ru/vacancy/456'] }}")
+    logger.info(f"  POST /apply  {{ 'url': '...', 'message': '...', 'session': '<name>' (optional) }}")
+    logger.info(f"  POST /apply/batch  {{ 'items': [{{ 'url': '...', 'message': '...' }}] }}")
+    logger.info(f"  GET  /jobs/<job_id>")
+    logger.info(f"  GET  /sessions")
+    logger.info(f"  GET  /health, /ready")
+    logger.info(f"  GET  /metrics  (Prometheus)")
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         logger.info("Stopping server...")
+    finally:
+        httpd.prefetcher.shutdown()
+        httpd.job_runner.shutdown()
+        httpd.job_store.close()
+        httpd.applied_ledger.close()
+        httpd.seen_index.close()
+        for session in httpd.sessions.sessions:
+            if session.http_fetcher is not None:
+                logger.info(f"HTTP fast path ({session.name}): {session.http_fetcher.stats()}")
+                session.http_fetcher.shutdown()
+            if session.description_fetcher is not None:
+                session.description_fetcher.shutdown()
+            if session.browser_pool is not None:
+                session.browser_pool.shutdown()
+        logger.info(f"Sessions: {httpd.sessions.stats()}")
+        logger.info(f"Result cache: {httpd.result_cache.stats()}")
+        logger.info(f"Description cache: {httpd.description_cache.stats()}")
+        if LIMITER.enabled:
+            logger.info(f"Rate limiter: {LIMITER.stats()}")
+        httpd.description_cache.close()
         httpd.server_close()
 
 if __name__ == "__main__":
@@ -0,0 +1,464 @@
+import gzip
+import http.client
+import itertools
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import hh_login
+import metrics
+from browser_pool import current_storage_state
+from rate_limiter import LIMITER, THROTTLED, RateLimited
+from search_vacancies import AREA_CODE, DESCRIPTION_SELECTOR, HH_BASE_URL, SERP_SELECTORS, card_record, extract_vacancy_id
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+FETCH_MODE = os.getenv("FETCH_MODE", "browser")  # browser | http
+HTTP_CONNECTIONS = int(os.getenv("HTTP_CONNECTIONS", 4))  # keep-alive connections to hh.ru
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))  # seconds per request
+HTTP_CAPTCHA_COOLDOWN = float(os.getenv("HTTP_CAPTCHA_COOLDOWN", 300))  # browser only after a captcha
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+logger = logging.getLogger("HttpFetcher")
+
+
+class CaptchaError(Exception):
+    """hh.ru answered with bot protection instead of the page."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# -------------------- HTML PARSING --------------------
+
+_ATTR_SELECTOR_RE = re.compile(r"\[([\w-]+)(\^?=)'([^']*)'\]")
+
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+))
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol",
+    "pre", "section", "table", "tr", "ul",
+))
+SKIP_TAGS = frozenset(("script", "style", "template", "noscript"))
+
+# What ends together with an element, besides the capture of a field name
+_SKIP, _TITLE, _SCOPE = object(), object(), object()
+
+
+def _compile_selector(selector: str) -> Callable[[Dict[str, str]], bool]:
+    """[attr='value'] and [attr^='value'] - all the selectors hh.ru markup needs."""
+    match = _ATTR_SELECTOR_RE.fullmatch(selector)
+    if match is None:
+        raise ValueError(f"Unsupported selector: {selector}")
+    name, op, value = match.groups()
+    if op == "^=":
+        return lambda attrs: (attrs.get(name) or "").startswith(value)
+    return lambda attrs: attrs.get(name) == value
+
+
+def _inner_text(chunks: list) -> str:
+    """
+    innerText-like rendering of collected chunks: whitespace collapsed,
+    ints between text runs are required line breaks (1 for blocks, 2 for <p>)
+    """
+    parts, pending = [], 0
+    for is_break, group in itertools.groupby(chunks, key=lambda chunk: isinstance(chunk, int)):
+        if is_break:
+            pending = max(pending, *group)
+            continue
+        text = " ".join("".join(group).split())
+        if text:
+            if parts:
+                parts.append("\n" * pending)
+            parts.append(text)
+            pending = 0
+    return "".join(parts)
+
+
+class _SelectorParser(HTMLParser):
+    """
+    Text and attributes of the first element matching each field selector,
+    inside every element matching `scope` (or in the whole document).
+    """
+
+    def __init__(self, fields: Dict[str, str], scope: Optional[str] = None):
+        super().__init__(convert_charrefs=True)
+        self.fields = {name: _compile_selector(selector) for name, selector in fields.items()}
+        self.scope = _compile_selector(scope) if scope else None
+        self.records: List[Dict[str, dict]] = [] if scope else [{}]
+        self.title_chunks: list = []
+
+        self._record = None if scope else self.records[0]
+        self._stack: List[Tuple[str, list]] = []  # (tag, what ends with it)
+        self._capturing: Dict[str, list] = {}
+        self._in_title = False
+        self._skip = 0
+
+    @property
+    def title(self) -> str:
+        return _inner_text(self.title_chunks)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        ends = []
+
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            ends.append(_SKIP)
+        elif tag == "title":
+            self._in_title = True
+            ends.append(_TITLE)
+
+        if self.scope is not None and self._record is None and self.scope(attrs):
+            self._record = {}
+            self.records.append(self._record)
+            ends.append(_SCOPE)
+
+        if self._record is not None:
+            for name, matches in self.fields.items():
+                if name not in self._record and matches(attrs):
+                    self._record[name] = {"attrs": attrs, "chunks": []}
+                    self._capturing[name] = self._record[name]["chunks"]
+                    ends.append(name)
+
+        self._line_break(tag)
+        if tag in VOID_TAGS:
+            self._end(ends)
+        else:
+            self._stack.append((tag, ends))
+
+    def handle_startendtag(self, tag, attrs):
+        # <div/> is an open tag in HTML; void elements end by themselves
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return  # stray end tag
+        while self._stack:
+            open_tag, ends = self._stack.pop()
+            self._line_break(open_tag)
+            self._end(ends)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        for chunks in self._capturing.values():
+            chunks.append(data)
+        if self._in_title:
+            self.title_chunks.append(data)
+
+    def _line_break(self, tag):
+        if tag == "p":
+            count = 2
+        elif tag in BLOCK_TAGS or tag == "br":
+            count = 1
+        else:
+            return
+        for chunks in self._capturing.values():
+            chunks.append(count)
+
+    def _end(self, ends):
+        for end in ends:
+            if end is _SKIP:
+                self._skip -= 1
+            elif end is _TITLE:
+                self._in_title = False
+            elif end is _SCOPE:
+                self._record = None
+                self._capturing.clear()
+            else:
+                self._capturing.pop(end, None)
+
+
+def _parse(html: str, fields: Dict[str, str], scope: Optional[str] = None) -> _SelectorParser:
+    parser = _SelectorParser(fields, scope)
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def _is_captcha_title(title: str) -> bool:
+    title = title.lower()
+    return "captcha" in title or "робот" in title
+
+
+def parse_serp(html: str) -> Optional[List[Dict[str, object]]]:
+    """
+    Cards of a SERP page in the same shape as the browser path returns,
+    or None when the markup has no cards (changed layout, empty result).
+    Raises CaptchaError on a bot-protection page.
+    """
+    fields = {name: selector for name, selector in SERP_SELECTORS.items() if name != "card"}
+    parser = _parse(html, fields, scope=SERP_SELECTORS["card"])
+    if _is_captcha_title(parser.title):
+        raise CaptchaError(parser.title)
+
+    cards = []
+    for record in parser.records:
+        title = record.get("title")
+        if title is None or not title["attrs"].get("href"):
+            continue
+        raw = {name: " ".join(_inner_text(field["chunks"]).split()) or None for name, field in record.items()}
+        raw["url"] = title["attrs"]["href"]
+        cards.append(card_record(raw))
+    return cards or None
+
+
+def parse_description(html: str) -> Optional[str]:
+    """Vacancy description text, or None when the page has no description block."""
+    parser = _parse(html, {"description": DESCRIPTION_SELECTOR})
+    if _is_captcha_title(parser.title):
+        raise CaptchaError(parser.title)
+    field = parser.records[0].get("description")
+    if field is None:
+        return None
+    return _inner_text(field["chunks"]).strip()
+
+
+# -------------------- HTTP CLIENT --------------------
+
+class HttpFetcher:
+    """
+    Reads SERP and vacancy pages with plain HTTP GETs over a small pool of
+    keep-alive connections, using the cookies of the saved browser session.
+
+    Every method returns None when the browser has to take over: a captcha
+    (after which HTTP is not tried for `captcha_cooldown` seconds), an error
+    status or markup the parser does not recognise. collect_cards raises
+    RateLimited while requests to hh.ru are paused.
+    """
+
+    def __init__(
+        self,
+        storage_state,
+        base_url: str = HH_BASE_URL,
+        connections: int = HTTP_CONNECTIONS,
+        timeout: float = HTTP_TIMEOUT,
+        captcha_cooldown: float = HTTP_CAPTCHA_COOLDOWN,
+    ):
+        self.storage_state = storage_state  # a file path, a dict or a Session, as for BrowserPool
+        self.base = urllib.parse.urlsplit(base_url)
+        self.max_connections = max(1, connections)
+        self.timeout = timeout
+        self.captcha_cooldown = captcha_cooldown
+
+        # None marks a free slot without an open connection yet
+        self._connections: "queue.LifoQueue" = queue.LifoQueue()
+        for _ in range(self.max_connections):
+            self._connections.put(None)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="hh-http")
+
+        self._lock = threading.Lock()
+        self._cookie_header = None
+        self._cookie_source = None
+        self._cookie_mtime = None
+        self._blocked_until = 0.0
+        self._stats = {"requests": 0, "bytes": 0, "parsed": 0, "fallbacks": 0, "captchas": 0}
+
+    # ---- public API ----
+
+    def collect_cards(self, query: str, page_num: int, order_by: Optional[str] = None) -> Optional[List[Dict[str, object]]]:
+        params = {"text": query, "area": AREA_CODE, "items_on_page": 20, "page": page_num}
+        if order_by:
+            params["order_by"] = order_by
+        params = urllib.parse.urlencode(params)
+        return self._fetch_parsed(f"/search/vacancy?{params}", parse_serp)
+
+    def get_description(self, url: str) -> Optional[str]:
+        vacancy_id = extract_vacancy_id(url)
+        if vacancy_id is not None:
+            # The canonical page: no ad redirects, no tracking parameters
+            path = f"/vacancy/{vacancy_id}"
+        else:
+            path = self._local_path(url)
+            if path is None:
+                return None
+        try:
+            return self._fetch_parsed(path, parse_description)
+        except RateLimited:
+            return None
+
+    def iter_descriptions(self, urls: List[str]) -> Iterator[Tuple[int, Optional[str]]]:
+        """Yield (index, description or None) as soon as each page is parsed."""
+        get_description = metrics.bind(self.get_description)
+        futures = {self._executor.submit(get_description, url): i for i, url in enumerate(urls)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {**self._stats, "blocked": time.monotonic() < self._blocked_until}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                connection = self._connections.get_nowait()
+            except queue.Empty:
+                break
+            if connection is not None:
+                connection.close()
+
+    # ---- internals ----
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _fetch_parsed(self, path: str, parse):
+        if time.monotonic() < self._blocked_until:
+            self._count("fallbacks")
+            return None
+        try:
+            html = self._get(path)
+            with metrics.stage("http_parse"):
+                result = parse(html)
+        except CaptchaError as e:
+            self._captcha(path, e.retry_after)
+            return None
+        except RateLimited:
+            # The browser would have to wait just as long
+            self._count("fallbacks")
+            raise
+        except Exception as e:
+            logger.warning(f"HTTP fetch of {path} failed, falling back to the browser: {e!r}")
+            result = None
+        self._count("parsed" if result is not None else "fallbacks")
+        return result
+
+    def _captcha(self, path: str, retry_after: Optional[float] = None):
+        logger.warning(f"Bot protection on {path}, using the browser for {self.captcha_cooldown:.0f}s")
+        metrics.captcha("http")
+        # Softer than a browser captcha: plain HTTP is flagged sooner, and the browser is still fine
+        LIMITER.report(THROTTLED, retry_after)
+        with self._lock:
+            self._stats["captchas"] += 1
+            self._stats["fallbacks"] += 1
+            self._blocked_until = time.monotonic() + self.captcha_cooldown
+
+    def _local_path(self, url: str) -> Optional[str]:
+        """Path of an hh.ru URL on the configured host, None for foreign hosts."""
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if host and host != self.base.hostname and host != "hh.ru" and not host.endswith(".hh.ru"):
+            return None
+        return urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+    def _cookies(self) -> Optional[str]:
+        state = current_storage_state(self.storage_state)
+        if not isinstance(state, str):
+            # A Session re-reads its file itself: a new object means a new login,
+            # the same state the browsers of this account get
+            with self._lock:
+                if state is not self._cookie_source:
+                    cookies = (state or {}).get("cookies", [])
+                    self._cookie_header = "; ".join(f"{c['name']}={c['value']}" for c in cookies) or None
+                    self._cookie_source = state
+                return self._cookie_header
+
+        # Re-read after hh_login.py saved a fresh session
+        try:
+            mtime = os.stat(state).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            if state != self._cookie_source or mtime != self._cookie_mtime:
+                self._cookie_header = hh_login.get_cookies(state)
+                self._cookie_source = state
+                self._cookie_mtime = mtime
+            return self._cookie_header
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.base.scheme == "https":
+            return http.client.HTTPSConnection(self.base.hostname, self.base.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.base.hostname, self.base.port, timeout=self.timeout)
+
+    def _get(self, path: str, redirects: int = 3) -> str:
+        headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "ru-RU,ru;q=0.9",
+            "Accept-Encoding": "gzip",
+        }
+        cookies = self._cookies()
+        if cookies:
+            headers["Cookie"] = cookies
+
+        LIMITER.acquire()
+        try:
+            with metrics.stage("http_get"):
+                status, response_headers, body = self._request(path, headers)
+        except Exception as e:
+            LIMITER.report_error(e)
+            raise
+        self._count("requests")
+        self._count("bytes", len(body))
+
+        location = response_headers.get("location") or ""
+        if status in (403, 429) or "captcha" in location:
+            retry_after = response_headers.get("retry-after") or ""
+            raise CaptchaError(f"HTTP {status} {location}".strip(),
+                               float(retry_after) if retry_after.isdigit() else None)
+        LIMITER.report_response(status)
+        if status in (301, 302, 303, 307, 308) and location and redirects > 0:
+            next_path = self._local_path(urllib.parse.urljoin(path, location))
+            if next_path is not None:
+                return self._get(next_path, redirects - 1)
+        if status != 200:
+            raise http.client.HTTPException(f"HTTP {status} for {path}")
+
+        if response_headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        charset = re.search(r"charset=([\w-]+)", response_headers.get("content-type", ""))
+        return body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+
+    def _request(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        connection = self._connections.get()
+        try:
+            for attempt in range(2):
+                reused = connection is not None
+                if connection is None:
+                    connection = self._new_connection()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    connection.close()
+                    connection = None
+                    if reused and attempt == 0:
+                        continue  # the server dropped an idle keep-alive connection
+                    raise
+                except Exception:
+                    connection.close()
+                    connection = None
+                    raise
+                response_headers = {name.lower(): value for name, value in response.getheaders()}
+                if response.will_close:
+                    connection.close()
+                    connection = None
+                return response.status, response_headers, body
+        finally:
+            self._connections.put(connection)
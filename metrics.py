@@ -0,0 +1,283 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))  # log the stage breakdown of slower requests (0 - off)
+
+# Seconds: from a cached lookup up to a full multi-page search
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, key)} {_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[n] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in values:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class _Callback:
+    """A value read from a component at scrape time (pool size, cache bytes...)."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Union[float, Dict[object, float]]],
+                 kind: str = "gauge", label: Union[str, Tuple[str, ...], None] = None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+        self.label = label
+
+    def collect(self) -> List[str]:
+        value = self.fn()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.label is None:
+            lines.append(f"{self.name} {_number(value)}")
+        elif isinstance(self.label, str):
+            lines += [f"{self.name}{_labels((self.label,), (key,))} {_number(v)}" for key, v in sorted(value.items())]
+        else:
+            lines += [f"{self.name}{_labels(self.label, key)} {_number(v)}" for key, v in sorted(value.items())]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, fn: Callable, kind: str = "gauge",
+                 label: Union[str, Tuple[str, ...], None] = None):
+        """
+        fn() returns a number, or {label value: number} when `label` is set;
+        with a tuple of label names the keys are tuples of values.
+        """
+        self._add(_Callback(name, help, fn, kind, label))
+
+    def exposition(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines += metric.collect()
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "hh_stage_seconds", "Duration of one stage of a search or an apply flow", ("stage",))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "hh_request_seconds", "Latency of requests to this server", ("route", "status"))
+CAPTCHAS = REGISTRY.counter(
+    "hh_captcha_total", "Bot-protection pages hit", ("source",))
+TIMEOUTS = REGISTRY.counter(
+    "hh_timeout_total", "Waits that ran out of time", ("stage",))
+APPLY_OUTCOMES = REGISTRY.counter(
+    "hh_apply_total", "Results of apply_to_vacancy", ("status",))
+FILTERED = REGISTRY.counter(
+    "hh_filtered_total", "Vacancies dropped by the filter rules", ("stage",))
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "hh_upstream_responses_total", "Answers of hh.ru as seen by the rate limiter", ("outcome",))
+SLOW_REQUESTS = REGISTRY.counter(
+    "hh_slow_request_total", "Requests slower than SLOW_REQUEST_MS", ("route",))
+
+
+# -------------------- PER-REQUEST TRACE --------------------
+
+class Trace:
+    """
+    Stage durations of one request. Stages that run in parallel (description
+    pages) are summed, so their total may exceed the request time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, list] = {}  # stage -> [calls, seconds]
+        self._events: Dict[str, int] = {}  # e.g. captchas met while serving the request
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def mark(self, event: str):
+        with self._lock:
+            self._events[event] = self._events.get(event, 0) + 1
+
+    def events(self, event: str) -> int:
+        with self._lock:
+            return self._events.get(event, 0)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: {"calls": calls, "ms": round(seconds * 1000, 1)}
+                    for stage, (calls, seconds) in self._stages.items()}
+
+    def server_timing(self) -> str:
+        """Value of the Server-Timing response header."""
+        parts = []
+        for stage, entry in self.breakdown().items():
+            desc = f';desc="x{entry["calls"]}"' if entry["calls"] > 1 else ""
+            parts.append(f"{stage};dur={entry['ms']}{desc}")
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("hh_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def use_trace(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """Make `trace` current in this thread, e.g. in a worker serving a request."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def traced() -> contextlib.AbstractContextManager:
+    """Start a new trace for the current request."""
+    return use_trace(Trace())
+
+
+def bind(fn: Callable) -> Callable:
+    """fn running in another thread still reports to the caller's trace."""
+    trace = current_trace()
+
+    def run(*args, **kwargs):
+        with use_trace(trace):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+def is_timeout(error: BaseException) -> bool:
+    # Playwright has its own TimeoutError class
+    return isinstance(error, TimeoutError) or type(error).__name__ == "TimeoutError"
+
+
+def record(stage: str, seconds: float, trace: Optional[Trace] = None):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+def captcha(source: str, trace: Optional[Trace] = None):
+    """A bot-protection page: counted, and noted on the request's trace."""
+    CAPTCHAS.inc(source=source)
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.mark("captcha")
+
+
+@contextlib.contextmanager
+def stage(name: str, trace: Optional[Trace] = None) -> Iterator[None]:
+    """Time a block as `name`; a timeout raised inside is counted too."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        if is_timeout(e):
+            TIMEOUTS.inc(stage=name)
+        raise
+    finally:
+        record(name, time.perf_counter() - started, trace)
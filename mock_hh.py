@@ -0,0 +1,194 @@
+"""
+Local stand-in for hh.ru that serves recorded pages from bench_fixtures/.
+
+    python mock_hh.py [--port 9000] [--latency-ms 150] [--jitter-ms 50]
+                      [--error-rate 0.02] [--captcha-rate 0.01] [--fixtures DIR]
+
+    GET  /search/vacancy?text=...&page=N   serp.html, vacancy IDs shifted per query and page
+    GET  /vacancy/<id>                     vacancy.html (description, apply buttons, response popup)
+    POST /applicant/vacancy_response/popup the response sent from the popup
+    GET  /showcaptcha                      bot-protection page
+    GET  /__mock/stats                     served requests per route
+
+Point the project at it with HH_BASE_URL=http://127.0.0.1:9000. To replay
+real markup, save pages with the session cookies over the fixtures, e.g.
+
+    curl -H "Cookie: $(python hh_login.py --get-cookies)" "https://hh.ru/vacancy/123" > bench_fixtures/vacancy.html
+"""
+import argparse
+import gzip
+import http.server
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+CAPTCHA_PAGE = (
+    "<!DOCTYPE html><html><head><title>Captcha</title></head>"
+    "<body><p>Подтвердите, что вы не робот</p></body></html>"
+)
+
+VACANCY_LINK_RE = re.compile(r"(/vacancy/|[?&](?:amp;)?vacancyId=)(\d+)")
+
+
+class MockSettings:
+    """Latency and failure injection, adjustable while the server runs."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, captcha_rate: float = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+
+class MockHHServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, settings: MockSettings, fixtures_dir: str = FIXTURES_DIR):
+        super().__init__(server_address, MockHHHandler)
+        self.settings = settings
+        self.fixtures = {}
+        for name in ("serp", "vacancy"):
+            with open(os.path.join(fixtures_dir, f"{name}.html"), encoding="utf-8") as f:
+                self.fixtures[name] = f.read()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route: str):
+        with self._stats_lock:
+            self._stats[route] = self._stats.get(route, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+class MockHHHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path == "/__mock/stats":
+            self._send(200, json.dumps(self.server.stats()), "application/json")
+            return
+        if parsed.path == "/showcaptcha":
+            self.server.count("captcha")
+            self._send(200, CAPTCHA_PAGE)
+            return
+
+        if parsed.path == "/search/vacancy":
+            route = "serp"
+        elif re.fullmatch(r"/vacancy/\d+", parsed.path):
+            route = "vacancy"
+        else:
+            self.server.count("not_found")
+            self._send(404, "<html><head><title>404</title></head><body>Not found</body></html>")
+            return
+
+        if not self._simulate(route):
+            return
+        if route == "serp":
+            query = urllib.parse.parse_qs(parsed.query)
+            text = query.get("text", [""])[0]
+            page_num = int(query.get("page", ["0"])[0])
+            self._send(200, self._serp(text, page_num))
+        else:
+            self._send(200, self.server.fixtures["vacancy"])
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if urllib.parse.urlsplit(self.path).path != "/applicant/vacancy_response/popup":
+            self._send(404, "")
+            return
+        if self._simulate("apply"):
+            self._send(200, json.dumps({"success": True}), "application/json")
+
+    def _simulate(self, route: str) -> bool:
+        """Latency and injected failures; False when a failure was sent."""
+        settings = self.server.settings
+        time.sleep(settings.delay())
+        roll = random.random()
+        if roll < settings.error_rate:
+            self.server.count(f"{route}_error")
+            self._send(503, "<html><head><title>503</title></head><body>Service Unavailable</body></html>")
+            return False
+        if roll < settings.error_rate + settings.captcha_rate:
+            self.server.count(f"{route}_captcha")
+            self.send_response(302)
+            self.send_header("Location", "/showcaptcha?backurl=" + urllib.parse.quote(self.path))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return False
+        self.server.count(route)
+        return True
+
+    def _serp(self, text: str, page_num: int) -> str:
+        # Different queries and pages must not collapse into the same 20 vacancies
+        offset = (zlib.crc32(text.encode("utf-8")) % 1000) * 1_000_000 + page_num * 1000
+        return VACANCY_LINK_RE.sub(
+            lambda m: f"{m.group(1)}{int(m.group(2)) + offset}", self.server.fixtures["serp"]
+        )
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            data = gzip.compress(data, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock(port: int = 0, settings: MockSettings = None, fixtures_dir: str = FIXTURES_DIR) -> MockHHServer:
+    """Run the mock in a background thread; port 0 picks a free one."""
+    server = MockHHServer(("127.0.0.1", port), settings or MockSettings(), fixtures_dir)
+    threading.Thread(target=server.serve_forever, name="mock-hh", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="share of 503 answers")
+    parser.add_argument("--captcha-rate", type=float, default=0, help="share of redirects to the captcha")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    settings = MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.captcha_rate)
+    server = MockHHServer(("127.0.0.1", args.port), settings, args.fixtures)
+    print(f"Mock hh.ru on {server.base_url} (fixtures: {args.fixtures})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
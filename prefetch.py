@@ -0,0 +1,169 @@
+import collections
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+import metrics
+from rate_limiter import LIMITER
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+PREFETCH_QUERIES = os.getenv("PREFETCH_QUERIES", "")  # "Python Developer:0-2;Frontend" (empty - off)
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", 240))  # seconds between refreshes of one page
+PREFETCH_BUDGET_PER_HOUR = int(os.getenv("PREFETCH_BUDGET_PER_HOUR", 300))  # requests to hh.ru
+PREFETCH_IDLE_SECONDS = float(os.getenv("PREFETCH_IDLE_SECONDS", 10))  # quiet time before a refresh
+
+logger = logging.getLogger("Prefetch")
+
+# Stages that are one request to hh.ru each
+UPSTREAM_STAGES = ("http_get", "serp_goto", "description_goto", "description_page")
+
+PAGES_RE = re.compile(r"\d+(?:-\d+)?(?:,\d+(?:-\d+)?)*")
+
+
+def parse_targets(spec: str, max_pages: int) -> List[Tuple[str, int]]:
+    """
+    "Python Developer:0-2;Frontend" -> [("Python Developer", 0), ("Python Developer", 1),
+    ("Python Developer", 2), ("Frontend", 0)]: one /search?text=...&page=N call each,
+    the way the n8n flow pages through the results. A query may name at most
+    `max_pages` pages, as many as one /search call may ask for.
+    """
+    targets = []
+    for entry in spec.split(";"):
+        query, _, pages = entry.strip().rpartition(":")
+        if not query or not PAGES_RE.fullmatch(pages.strip()):
+            query, pages = entry.strip(), "0"
+        if not query:
+            continue
+        page_nums = set()
+        for part in pages.split(","):
+            first, _, last = part.strip().partition("-")
+            first, last = int(first), int(last or first)
+            # Checked before the range is built, like the pages= of /search
+            if last < first or last - first + 1 > max_pages:
+                raise ValueError(f"PREFETCH_QUERIES: invalid pages {part.strip()!r} of {query!r}")
+            page_nums.update(range(first, last + 1))
+            if len(page_nums) > max_pages:
+                raise ValueError(f"PREFETCH_QUERIES: at most {max_pages} pages per query ({query!r})")
+        targets.extend((query, page_num) for page_num in sorted(page_nums))
+    return list(dict.fromkeys(targets))
+
+
+class PrefetchScheduler:
+    """
+    Re-runs configured searches in the background so that /search finds
+    its result and the descriptions already cached.
+
+    A page is refreshed every `interval` seconds, but only after the server
+    had no live request for `idle_seconds`, and only while the requests to
+    hh.ru spent by prefetching in the last hour stay below `budget`. One
+    page is refreshed at a time, so a live request waits for one page at most.
+    """
+
+    def __init__(
+        self,
+        targets: List[Tuple[str, int]],
+        warm: Callable[[str, int], None],
+        idle_for: Callable[[], float],
+        interval: float = PREFETCH_INTERVAL,
+        budget: int = PREFETCH_BUDGET_PER_HOUR,
+        idle_seconds: float = PREFETCH_IDLE_SECONDS,
+    ):
+        self.targets = targets
+        self.warm = warm
+        self.idle_for = idle_for
+        self.interval = interval
+        self.budget = budget
+        self.idle_seconds = idle_seconds
+
+        self._due = {target: 0.0 for target in targets}  # first round right after the start
+        self._spent: Deque[Tuple[float, int]] = collections.deque()  # (time, requests) in the last hour
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"refreshed": 0, "failed": 0, "requests": 0, "deferred_busy": 0, "deferred_budget": 0}
+
+    def start(self):
+        if not self.targets:
+            return
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+        logger.info(f"Prefetching {len(self.targets)} page(s) every {self.interval:.0f}s, "
+                    f"at most {self.budget} requests per hour")
+
+    def shutdown(self, timeout: float = 5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, budget_left=max(0, self.budget - self._spent_last_hour()))
+
+    def _spent_last_hour(self) -> int:
+        cutoff = time.monotonic() - 3600
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return sum(requests for _, requests in self._spent)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _run(self):
+        deferred = None  # the last reason a due page waited, logged once
+        while not self._stopping.is_set():
+            target, due = min(self._due.items(), key=lambda item: item[1])
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stopping.wait(min(wait, 60))
+                continue
+
+            idle = self.idle_for()
+            if idle < self.idle_seconds:
+                # Live traffic first: try again once it could have been quiet long enough
+                if deferred != "busy":
+                    self._count("deferred_busy")
+                    deferred = "busy"
+                self._stopping.wait(max(1.0, self.idle_seconds - idle))
+                continue
+            pause = LIMITER.pause_remaining()
+            if pause > 0:
+                # hh.ru showed a captcha: nothing is worth prefetching until the pause is over
+                self._stopping.wait(pause)
+                continue
+            with self._lock:
+                over_budget = self._spent_last_hour() >= self.budget
+            if over_budget:
+                if deferred != "budget":
+                    self._count("deferred_budget")
+                    logger.info("Prefetch budget for this hour is spent, waiting")
+                    deferred = "budget"
+                self._stopping.wait(30)
+                continue
+            deferred = None
+
+            self._refresh(*target)
+            self._due[target] = time.monotonic() + self.interval
+
+    def _refresh(self, query: str, page_num: int):
+        with metrics.traced() as trace:
+            try:
+                self.warm(query, page_num)
+                self._count("refreshed")
+            except Exception as e:
+                self._count("failed")
+                logger.warning(f"Prefetch of {query!r} page {page_num} failed: {e}")
+            breakdown = trace.breakdown()
+        requests = sum(breakdown.get(stage, {}).get("calls", 0) for stage in UPSTREAM_STAGES)
+        with self._lock:
+            self._spent.append((time.monotonic(), requests))
+            self._stats["requests"] += requests
+        logger.info(f"Prefetched {query!r} page {page_num}: {requests} request(s) in {trace.elapsed_ms():.0f} ms")
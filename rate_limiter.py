@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", 2))  # starting navigations per second to hh.ru (0 - no limit)
+RATE_LIMIT_MIN_RPS = float(os.getenv("RATE_LIMIT_MIN_RPS", 0.2))
+RATE_LIMIT_MAX_RPS = float(os.getenv("RATE_LIMIT_MAX_RPS", 8))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", 4))  # navigations allowed back to back
+RATE_LIMIT_STEP = float(os.getenv("RATE_LIMIT_STEP", 0.2))  # rps added after RATE_LIMIT_CLEAN_STREAK clean answers
+RATE_LIMIT_CLEAN_STREAK = int(os.getenv("RATE_LIMIT_CLEAN_STREAK", 20))
+RATE_LIMIT_CAPTCHA_PAUSE = float(os.getenv("RATE_LIMIT_CAPTCHA_PAUSE", 30))  # seconds, doubled on every repeat
+RATE_LIMIT_MAX_PAUSE = float(os.getenv("RATE_LIMIT_MAX_PAUSE", 900))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 30))  # longer waits fail with RateLimited
+
+logger = logging.getLogger("RateLimiter")
+
+OK, CAPTCHA, THROTTLED, TIMEOUT, ERROR = "ok", "captcha", "throttled", "timeout", "error"
+
+# outcome -> (rate multiplier, first pause in seconds)
+_BACKOFF = {
+    CAPTCHA: (0.5, RATE_LIMIT_CAPTCHA_PAUSE),
+    THROTTLED: (0.5, 5.0),
+    TIMEOUT: (0.8, 1.0),
+}
+
+
+class RateLimited(RuntimeError):
+    """hh.ru is paused for longer than a caller may wait."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Requests to hh.ru are paused after bot protection, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AdaptiveRateLimiter:
+    """
+    One token bucket for every navigation and HTTP request to hh.ru.
+
+    The rate grows by `step` after every `clean_streak` clean answers up to
+    `max_rps`. A captcha, a 429 or a timeout cuts it (down to `min_rps`)
+    and pauses all requests; the pause doubles with every further failure
+    in a row, up to `max_pause` (answers to requests already in flight when
+    the pause began do not count). Callers that would wait longer than
+    `max_wait` get RateLimited instead.
+    """
+
+    def __init__(
+        self,
+        rps: float = RATE_LIMIT_RPS,
+        min_rps: float = RATE_LIMIT_MIN_RPS,
+        max_rps: float = RATE_LIMIT_MAX_RPS,
+        burst: int = RATE_LIMIT_BURST,
+        step: float = RATE_LIMIT_STEP,
+        clean_streak: int = RATE_LIMIT_CLEAN_STREAK,
+        max_pause: float = RATE_LIMIT_MAX_PAUSE,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+    ):
+        self.enabled = rps > 0
+        self.min_rps = min_rps
+        self.max_rps = max(max_rps, rps)
+        self.burst = max(1, burst)
+        self.step = step
+        self.clean_streak = max(1, clean_streak)
+        self.max_pause = max_pause
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._rps = rps
+        self._tat = 0.0  # theoretical arrival time of the next request (GCRA)
+        self._paused_until = 0.0
+        self._clean = 0
+        self._failures = 0
+
+    @property
+    def rps(self) -> float:
+        return self._rps
+
+    def pause_remaining(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        """Take a slot; the result is how many seconds to wait for it."""
+        if not self.enabled:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            interval = 1 / self._rps
+            start = max(now, self._tat - (self.burst - 1) * interval, self._paused_until)
+            if start - now > max_wait:
+                raise RateLimited(start - now)
+            self._tat = max(self._tat, now, start) + interval
+        return start - now
+
+    def acquire(self, max_wait: Optional[float] = None):
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        metrics.record("rate_wait", wait)
+
+    async def acquire_async(self, max_wait: Optional[float] = None, trace: Optional[metrics.Trace] = None):
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        metrics.record("rate_wait", wait, trace)
+
+    def report(self, outcome: str, retry_after: Optional[float] = None):
+        """How hh.ru answered: OK, CAPTCHA, THROTTLED (429), TIMEOUT or ERROR (5xx, counted only)."""
+        metrics.UPSTREAM_RESPONSES.inc(outcome=outcome)
+        if not self.enabled or outcome == ERROR:
+            return
+        with self._lock:
+            if outcome == OK:
+                self._failures = 0
+                self._clean += 1
+                if self._clean >= self.clean_streak and self._rps < self.max_rps:
+                    self._clean = 0
+                    self._rps = min(self.max_rps, self._rps + self.step)
+                return
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                # Sent before the pause began: the rate was already cut for this burst
+                return
+            factor, first_pause = _BACKOFF[outcome]
+            self._clean = 0
+            self._failures += 1
+            self._rps = max(self.min_rps, self._rps * factor)
+            pause = min(self.max_pause, max(retry_after or 0, first_pause * 2 ** (self._failures - 1)))
+            self._paused_until = max(self._paused_until, now + pause)
+            # No burst once the pause is over: the next requests come one interval apart
+            self._tat = self._paused_until + (self.burst - 1) / self._rps
+            rps, failures = self._rps, self._failures
+        logger.warning(f"{outcome} from hh.ru ({failures} in a row): {rps:.2f} req/s, pausing for {pause:.0f}s")
+
+    def report_response(self, status: Optional[int], captcha: bool = False, retry_after: Optional[str] = None):
+        if captcha:
+            self.report(CAPTCHA)
+        elif status == 429:
+            self.report(THROTTLED, float(retry_after) if retry_after and retry_after.isdigit() else None)
+        elif status is not None and status >= 500:
+            self.report(ERROR)
+        else:
+            self.report(OK)
+
+    def report_error(self, error: BaseException):
+        """Only timeouts say something about the rate; other errors are ignored."""
+        if metrics.is_timeout(error):
+            self.report(TIMEOUT)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "rps": round(self._rps, 3),
+                "pause_remaining": round(self.pause_remaining(), 1),
+                "failures_in_a_row": self._failures,
+            }
+
+
+# Shared by search, descriptions and apply in this process
+LIMITER = AdaptiveRateLimiter()
+
+
+def is_captcha_url(url: str) -> bool:
+    # hh.ru sends suspicious clients to /showcaptcha?backurl=...
+    return "captcha" in (url or "").lower()
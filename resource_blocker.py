@@ -0,0 +1,145 @@
+import os
+import threading
+import urllib.parse
+import weakref
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+LEAN_PAGES = os.getenv("LEAN_PAGES", "1") != "0"
+
+
+def _env_list(name: str, default: Iterable[str]) -> tuple:
+    value = os.getenv(name)
+    if value is None:
+        return tuple(default)
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+HEAVY_TYPES = _env_list("LEAN_BLOCK_TYPES", ("image", "font", "media"))
+FIRST_PARTY_DOMAINS = _env_list("LEAN_ALLOW_DOMAINS", ("hh.ru", "hhcdn.ru"))
+TRACKER_DOMAINS = _env_list("LEAN_DENY_DOMAINS", (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "mc.yandex.ru", "an.yandex.ru", "adfox.ru", "top-fwz1.mail.ru", "ad.mail.ru",
+    "vk.com", "facebook.net", "facebook.com", "hotjar.com", "criteo.com", "mediator.media",
+))
+
+
+def _host_matches(host: str, domains: tuple) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class RequestFilter:
+    """
+    Request-routing profile for Playwright pages and contexts.
+
+    A request is aborted when its resource type is in block_types, its host
+    is in deny_domains, or allow_domains is set and does not contain it.
+    """
+
+    def __init__(self, name: str, block_types: Iterable[str] = (),
+                 allow_domains: Iterable[str] = (), deny_domains: Iterable[str] = ()):
+        self.name = name
+        self.block_types = frozenset(block_types)
+        self.allow_domains = tuple(allow_domains)
+        self.deny_domains = tuple(deny_domains)
+
+        self._lock = threading.Lock()
+        self._installed = weakref.WeakSet()
+        self.blocked: Dict[str, int] = {}
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    def decide(self, url: str, resource_type: str) -> Optional[str]:
+        """Return why the request should be blocked, or None to let it through."""
+        if resource_type in self.block_types:
+            return resource_type
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        if not host:
+            return None  # data:, blob: and the like never leave the browser
+        if _host_matches(host, self.deny_domains):
+            return "denied_domain"
+        if self.allow_domains and not _host_matches(host, self.allow_domains):
+            return "third_party"
+        return None
+
+    # ---- sync API ----
+
+    def install(self, target):
+        """Route every request of a sync page or context through this filter (once)."""
+        if target in self._installed:
+            return
+        self._installed.add(target)
+        target.route("**/*", self._route)
+        target.on("response", self._count_response)
+
+    def _route(self, route, request):
+        reason = self.decide(request.url, request.resource_type)
+        if reason is None:
+            route.continue_()
+        else:
+            self._count_blocked(reason)
+            route.abort()
+
+    # ---- async API ----
+
+    async def install_async(self, target):
+        """Same as install() for async Playwright pages and contexts."""
+        if target in self._installed:
+            return
+        self._installed.add(target)
+        await target.route("**/*", self._route_async)
+        target.on("response", self._count_response)
+
+    async def _route_async(self, route, request):
+        reason = self.decide(request.url, request.resource_type)
+        if reason is None:
+            await route.continue_()
+        else:
+            self._count_blocked(reason)
+            await route.abort()
+
+    # ---- counters ----
+
+    def _count_blocked(self, reason: str):
+        with self._lock:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+
+    def _count_response(self, response):
+        # Content-Length is free to read; chunked responses count as 0 bytes
+        size = response.headers.get("content-length", "0")
+        with self._lock:
+            self.allowed_requests += 1
+            self.allowed_bytes += int(size) if size.isdigit() else 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "profile": self.name,
+                "blocked_requests": sum(self.blocked.values()),
+                "blocked_by_reason": dict(self.blocked),
+                "allowed_requests": self.allowed_requests,
+                "allowed_bytes": self.allowed_bytes,
+            }
+
+
+# Search only reads hh.ru markup: anything not first-party is dropped.
+# Apply keeps third-party scripts (modals may depend on them) but not trackers.
+PROFILES: Dict[str, RequestFilter] = {
+    "search": RequestFilter("search", HEAVY_TYPES, FIRST_PARTY_DOMAINS, TRACKER_DOMAINS),
+    "apply": RequestFilter("apply", HEAVY_TYPES, (), TRACKER_DOMAINS),
+    "login": RequestFilter("login", ("media",), (), TRACKER_DOMAINS),
+}
+
+
+def lean_profile(name: str) -> Optional[RequestFilter]:
+    """The filter for a flow, or None when LEAN_PAGES=0."""
+    return PROFILES[name] if LEAN_PAGES else None
+
+
+def stats() -> Dict[str, Dict[str, object]]:
+    return {name: profile.stats() for name, profile in PROFILES.items()}
@@ -0,0 +1,98 @@
+import json
+import os
+import zlib
+from typing import Any, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# orjson is optional: several times faster than json and writes UTF-8 bytes directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# -------------------- CONFIGURATION --------------------
+
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")  # auto (orjson when installed) | json
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))  # smaller bodies go as is (-1 - never)
+COMPRESS_LEVEL = int(os.getenv("RESPONSE_COMPRESS_LEVEL", 5))  # zlib level, 1 - fastest
+
+# Content-Encoding -> zlib wbits; "deflate" in HTTP is the zlib format
+ENCODINGS = {"gzip": 31, "deflate": 15}
+
+if JSON_ENCODER not in ("auto", "json", "orjson"):
+    raise ValueError(f"JSON_ENCODER must be auto, json or orjson, not {JSON_ENCODER!r}")
+if JSON_ENCODER == "orjson" and orjson is None:
+    raise ImportError("JSON_ENCODER=orjson, but orjson is not installed (pip install orjson)")
+USE_ORJSON = orjson is not None and JSON_ENCODER != "json"
+
+
+def encoder_name() -> str:
+    return "orjson" if USE_ORJSON else "json"
+
+
+def dumps(data: Any, use_orjson: Optional[bool] = None) -> bytes:
+    """Compact UTF-8 JSON, the same text either encoder writes."""
+    if USE_ORJSON if use_orjson is None else use_orjson:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:  # e.g. an integer beyond 64 bits: json can still write it
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_pieces(data: Any, use_orjson: Optional[bool] = None) -> List[bytes]:
+    """
+    The JSON of `data` in parts whose concatenation is the body: a list is
+    encoded item by item, so the whole body never exists as one str and
+    once more as bytes.
+    """
+    if not isinstance(data, list) or not data:
+        return [dumps(data, use_orjson)]
+    pieces = [b"["]
+    for n, item in enumerate(data):
+        if n:
+            pieces.append(b",")
+        pieces.append(dumps(item, use_orjson))
+    pieces.append(b"]")
+    return pieces
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The Content-Encoding to use for this Accept-Encoding header (None - identity)."""
+    if not accept_encoding or COMPRESS_MIN_BYTES < 0:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(name, wildcard), name) for name in ENCODINGS]
+    quality, name = max(candidates, key=lambda candidate: candidate[0])  # gzip wins a tie
+    return name if quality > 0 else None
+
+
+def compressor(encoding: str, level: int = COMPRESS_LEVEL):
+    return zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+
+
+def compress(pieces: Iterable[bytes], encoding: str, level: int = COMPRESS_LEVEL) -> List[bytes]:
+    """The compressed body, fed piece by piece."""
+    stream = compressor(encoding, level)
+    compressed = [stream.compress(piece) for piece in pieces]
+    compressed.append(stream.flush())
+    return [piece for piece in compressed if piece]
+
+
+def should_compress(size: int) -> bool:
+    return 0 <= COMPRESS_MIN_BYTES <= size
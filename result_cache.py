@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 300))  # seconds a /search result is reused (0 - off)
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", 32))
+
+
+class _Flight:
+    """A computation other callers with the same key are waiting for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    Finished results in memory, keyed by the normalized request.
+
+    Entries expire after `ttl` seconds; above `max_bytes` (size of the
+    result as JSON) the least recently used ones are evicted. Callers asking
+    for a key that is being computed wait for that computation instead of
+    starting their own (single flight) - this works with ttl=0 as well.
+    """
+
+    def __init__(self, ttl: float = RESULT_CACHE_TTL, max_bytes: int = int(RESULT_CACHE_MAX_MB * 1024 * 1024)):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()  # key -> (value, size, expires)
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Callable[[Any], bool] = lambda value: value is not None,
+                       refresh: bool = False) -> Tuple[Any, str]:
+        """
+        (value, source): source is "hit", "coalesced" (another caller computed
+        it meanwhile) or "miss". Only values passing `cacheable` are stored;
+        an exception of compute() reaches every waiting caller.
+        refresh=True computes even if a fresh entry exists (the entry keeps
+        answering other callers meanwhile).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh:
+                if entry[2] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], "hit"
+                self._remove(key)
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                if not refresh:
+                    self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "coalesced"
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            if self.ttl > 0 and cacheable(flight.value):
+                self._store(key, flight.value)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, "miss"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "in_flight": len(self._flights),
+            }
+
+    def _store(self, key: Hashable, value: Any):
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
@@ -1,9 +1,16 @@
 import json
 import os
+import re
 import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from playwright.sync_api import sync_playwright
 from dotenv import load_dotenv
 
+import metrics
+from rate_limiter import LIMITER, RateLimited, is_captcha_url
+from resource_blocker import lean_profile
+
 load_dotenv()
 
 # Configuration
@@ -11,112 +18,515 @@ N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
 SESSION_FILE = os.path.join(N8N_FILES_DIR, "hh_session.json")
 SEARCH_TEXT = os.getenv("DEFAULT_SEARCH_TEXT", "Frontend") # Default, can be overridden by args
 AREA_CODE = os.getenv("AREA_CODE", "113") # Russia
+HH_BASE_URL = os.getenv("HH_BASE_URL", "https://hh.ru").rstrip("/") # a local stand-in server for tests
+
+DESCRIPTION_SELECTOR = "[data-qa='vacancy-description']"
+VACANCY_ID_RE = re.compile(r"(?:/vacancy/|[?&]vacancyId=)(\d+)")
+
+def extract_vacancy_id(url):
+    """
+    Числовой ID вакансии из ссылки hh.ru (None, если его нет)
+    """
+    match = VACANCY_ID_RE.search(url or "")
+    return int(match.group(1)) if match else None
+
+def _use_lean_profile(page):
+    # Картинки, шрифты и сторонние скрипты для чтения выдачи не нужны
+    profile = lean_profile("search")
+    if profile is not None:
+        profile.install(page)
+
+def _navigate(page, url, stage, timeout=30000):
+    """
+    page.goto через общий ограничитель частоты запросов к hh.ru.
+    Возвращает True, если вместо страницы открылась капча
+    """
+    LIMITER.acquire()
+    try:
+        with metrics.stage(stage):
+            response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    except Exception as e:
+        LIMITER.report_error(e)
+        raise
+    # Капча - редирект на /showcaptcha или её заголовок, без выгрузки всего HTML
+    captcha = is_captcha_url(page.url) or "captcha" in page.title().lower()
+    LIMITER.report_response(response.status if response else None, captcha,
+                            response.headers.get("retry-after") if response else None)
+    if captcha:
+        metrics.captcha("browser")
+    return captcha
 
 def get_vacancy_description(page, vacancy_url):
     """
     Переходит на страницу вакансии и извлекает полное описание
     """
     try:
-        page.goto(vacancy_url, wait_until="domcontentloaded", timeout=15000)
-        
+        _use_lean_profile(page)
+        if _navigate(page, vacancy_url, "description_goto", timeout=15000):
+            print(f"Warning: Bot protection on {vacancy_url}", file=sys.stderr)
+            return ""
+
         # Ждем загрузки описания вакансии
-        page.wait_for_selector("[data-qa='vacancy-description']", timeout=10000)
-        
+        with metrics.stage("description_wait"):
+            page.wait_for_selector(DESCRIPTION_SELECTOR, timeout=10000)
+
         # Получаем полное описание
-        description_el = page.locator("[data-qa='vacancy-description']")
-        full_description = description_el.inner_text() if description_el.count() > 0 else ""
-        
+        with metrics.stage("description_read"):
+            description_el = page.locator(DESCRIPTION_SELECTOR)
+            full_description = description_el.inner_text() if description_el.count() > 0 else ""
+
         return full_description.strip()
+    except RateLimited:
+        raise
     except Exception as e:
         print(f"Warning: Failed to get description for {vacancy_url}: {str(e)}", file=sys.stderr)
         return ""
 
-def search_vacancies(query=SEARCH_TEXT, page_num=0):
-    if not os.path.exists(SESSION_FILE):
-        print(json.dumps({"error": "Session file not found. Run hh_login.py first."}))
-        return
+SERP_SELECTORS = {
+    "card": "[data-qa='vacancy-serp__vacancy']",
+    "title": "[data-qa='serp-item__title']",
+    "employer": "[data-qa='vacancy-serp__vacancy-employer']",
+    "salary": "[data-qa='vacancy-serp__vacancy-compensation']",
+    "area": "[data-qa='vacancy-serp__vacancy-address']",
+    "experience": "[data-qa^='vacancy-serp__vacancy-work-experience']",
+    "published": "[data-qa='vacancy-serp__vacancy-date']",
+}
+
+SERP_CARDS_JS = """
+(sel) => Array.from(document.querySelectorAll(sel.card)).map((card) => {
+    const text = (selector) => {
+        const el = card.querySelector(selector);
+        return el ? el.innerText.replace(/\\s+/g, " ").trim() : null;
+    };
+    const title = card.querySelector(sel.title);
+    return {
+        title: title ? title.innerText.trim() : null,
+        url: title ? title.getAttribute("href") : null,
+        employer: text(sel.employer),
+        salary: text(sel.salary),
+        area: text(sel.area),
+        experience: text(sel.experience),
+        published: text(sel.published),
+    };
+})
+"""
+
+CURRENCIES = {"₽": "RUR", "руб": "RUR", "$": "USD", "€": "EUR", "₸": "KZT", "br": "BYR", "сум": "UZS"}
+
+def _parse_salary(text):
+    """
+    "от 150 000 до 200 000 ₽ за месяц" -> (150000, 200000, "RUR")
+    """
+    if not text:
+        return None, None, None
+    normalized = re.sub(r"(?<=\d)\s+(?=\d)", "", text.lower())
+    numbers = [int(n) for n in re.findall(r"\d+", normalized)]
+    currency = next((code for sign, code in CURRENCIES.items() if sign in normalized), None)
+    if not numbers:
+        return None, None, currency
+    # "до вычета налогов" не граница вилки: смотрим только "от"/"до" перед числом
+    has_from = re.search(r"\bот\s*\d", normalized) is not None
+    has_to = re.search(r"\bдо\s*\d", normalized) is not None
+    if has_from and has_to and len(numbers) > 1:
+        return numbers[0], numbers[1], currency
+    if has_to and not has_from:
+        return None, numbers[0], currency
+    if has_from:
+        return numbers[0], None, currency
+    return numbers[0], numbers[-1], currency
+
+CARD_FIELDS = ("title", "url", "employer", "vacancy_id", "salary", "salary_from", "salary_to", "salary_currency",
+               "area", "experience", "published")
+
+def vacancy_url(vacancy_id):
+    return f"{HH_BASE_URL}/vacancy/{vacancy_id}"
+
+def card_record(raw):
+    """
+    Карточка выдачи в виде записи с ID вакансии и разобранной зарплатой
+    """
+    url = urllib.parse.urljoin(HH_BASE_URL, raw["url"])
+    salary_from, salary_to, currency = _parse_salary(raw.get("salary"))
+    return {
+        "title": raw["title"],
+        "url": url,
+        "employer": raw.get("employer") or "Unknown",
+        "vacancy_id": extract_vacancy_id(url),
+        "salary": raw.get("salary"),
+        "salary_from": salary_from,
+        "salary_to": salary_to,
+        "salary_currency": currency,
+        "area": raw.get("area"),
+        "experience": raw.get("experience"),
+        "published": raw.get("published"),
+    }
+
+def _collect_cards(page, query, page_num, order_by=None):
+    """
+    Собирает карточки со страницы поиска, используя уже открытую вкладку.
+    Возвращает список карточек, None при срабатывании защиты или {"error": ...}
+    """
+    # Build Search URL with pagination
+    url = f"{HH_BASE_URL}/search/vacancy?text={query}&area={AREA_CODE}&items_on_page=20&page={page_num}"
+    if order_by:
+        url += f"&order_by={order_by}"
+
+    try:
+        _use_lean_profile(page)
+        # Check if we triggered bot protection
+        if _navigate(page, url, "serp_goto"):
+           print(json.dumps({"error": "Bot protection triggered"}))
+           return
+
+        # Wait for results to appear
+        with metrics.stage("serp_wait"):
+            page.wait_for_selector(SERP_SELECTORS["card"], timeout=10000)
+
+        # Все карточки страницы за один вызов evaluate
+        with metrics.stage("serp_parse"):
+            raw_cards = page.evaluate(SERP_CARDS_JS, SERP_SELECTORS)
+
+            vacancy_data = []
+            for i, raw in enumerate(raw_cards):
+                if not raw.get("title") or not raw.get("url"):
+                    print(f"Warning: Failed to parse vacancy card {i}: no title link", file=sys.stderr)
+                    continue
+                vacancy_data.append(card_record(raw))
+
+        return vacancy_data
+
+    except RateLimited:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+def _iter_descriptions(urls, page=None, fetcher=None, cache=None, http=None, pool=None, session_file=SESSION_FILE):
+    """
+    Пары (индекс, описание) по мере готовности: сначала из кэша,
+    остальные через http, fetcher или по очереди в page.
+    session_file - сессия браузера, запускаемого на вызов, если нет ни pool, ни page
+    """
+    ids = [extract_vacancy_id(url) for url in urls]
+    cached = cache.get_many(vid for vid in ids if vid is not None) if cache is not None else {}
+
+    missing = []
+    for n, vid in enumerate(ids):
+        if vid in cached:
+            yield n, cached[vid]
+        else:
+            missing.append(n)
+
+    missing_urls = [urls[n] for n in missing]
+    for i, description in _fetch_descriptions(missing_urls, page, fetcher, http, pool, session_file):
+        n = missing[i]
+        if cache is not None and ids[n] is not None:
+            cache.put(ids[n], description)
+        yield n, description
+
+def _fetch_descriptions(urls, page=None, fetcher=None, http=None, pool=None, session_file=SESSION_FILE):
+    """
+    Пары (индекс, описание) для urls. С http страницы читаются без браузера,
+    браузер нужен только для тех, что не удалось разобрать
+    """
+    if http is not None:
+        fallback = []
+        for i, description in http.iter_descriptions(urls):
+            if description is None:
+                fallback.append(i)
+            else:
+                yield i, description
+        if fallback:
+            rest = [urls[i] for i in fallback]
+            for j, description in _fetch_descriptions(rest, page, fetcher, pool=pool, session_file=session_file):
+                yield fallback[j], description
+    elif fetcher is not None:
+        yield from fetcher.iter_descriptions(urls)
+    elif page is not None:
+        for i, url in enumerate(urls):
+            yield i, get_vacancy_description(page, url)
+    elif urls:
+        descriptions = _in_browser(pool, _descriptions_on_page, urls, session_file=session_file) or [""] * len(urls)
+        yield from enumerate(descriptions)
+
+def _descriptions_on_page(page, urls):
+    return [get_vacancy_description(page, url) for url in urls]
+
+def _in_browser(pool, fn, *args, session_file=SESSION_FILE):
+    """
+    fn(page, *args) во вкладке из pool или в браузере, запущенном на один вызов
+    с сессией session_file
+    """
+    if pool is not None:
+        return pool.run(fn, *args)
+    return _run_with_local_browser(fn, *args, session_file=session_file)
+
+def _deliver(vacancy_data, descriptions, on_vacancy=None):
+    """
+    Собирает вакансии из карточек и пар (индекс, описание).
+    Без on_vacancy возвращает список в порядке карточек; с ним отдаёт
+    каждую вакансию сразу по готовности и возвращает их количество
+    """
+    with metrics.stage("descriptions"):
+        if on_vacancy is None:
+            vacancies = [None] * len(vacancy_data)
+            for n, description in descriptions:
+                vacancies[n] = _build_vacancy(vacancy_data[n], description)
+            return vacancies
+
+        count = 0
+        for n, description in descriptions:
+            vacancy = _build_vacancy(vacancy_data[n], description)
+            vacancy["index"] = n
+            on_vacancy(vacancy)
+            count += 1
+        return count
+
+def _deliver_cards(vacancy_data, on_vacancy=None):
+    """
+    Карточки без описаний: список или, с on_vacancy, по одной и их количество
+    """
+    if on_vacancy is None:
+        return vacancy_data
+    for n, data in enumerate(vacancy_data):
+        on_vacancy({**data, "index": n})
+    return len(vacancy_data)
+
+def _build_vacancy(data, description):
+    return {**data, "description": description}
+
+def _collect_pages(query, page_nums, pool=None, page=None, http=None, is_new=None, limit=None,
+                   session_file=SESSION_FILE):
+    """
+    Карточки с нескольких страниц выдачи без повторов (по ID вакансии).
+    С pool или http страницы загружаются параллельно, иначе по очереди в page.
+    Страницы, которые http не смог разобрать, открываются в браузере.
+    is_new - см. search_pages
+    """
+    order_by = "publication_time" if is_new is not None else None
 
+    def collect(page_num):
+        if page is not None:
+            return _collect_cards(page, query, page_num, order_by)
+        if http is not None:
+            cards = http.collect_cards(query, page_num, order_by)
+            if cards is not None:
+                return cards
+        try:
+            return _in_browser(pool, _collect_cards, query, page_num, order_by, session_file=session_file)
+        except RateLimited:
+            raise
+        except Exception as e:
+            return {"error": str(e)}
+
+    if is_new is not None:
+        with metrics.stage("serp_pages"):
+            return _collect_new_pages(collect, page_nums, is_new, limit)
+
+    with metrics.stage("serp_pages"):
+        if page is not None:
+            results = [_collect_cards(page, query, page_num) for page_num in page_nums]
+        else:
+            workers = http.max_connections if http is not None else pool.size
+            with ThreadPoolExecutor(max_workers=min(len(page_nums), workers)) as executor:
+                results = list(executor.map(metrics.bind(collect), page_nums))
+
+    vacancy_data = []
+    seen = set()
+    failures = []
+    for page_num, cards in zip(page_nums, results):
+        if not isinstance(cards, list):
+            print(f"Warning: Failed to collect page {page_num}: {cards}", file=sys.stderr)
+            failures.append(cards)
+            continue
+        for data in cards:
+            # Продвигаемые вакансии часто повторяются на разных страницах
+            key = data["vacancy_id"] or data["url"]
+            if key in seen:
+                continue
+            seen.add(key)
+            vacancy_data.append(data)
+
+    if not vacancy_data and failures:
+        return failures[0]
+    return vacancy_data
+
+def _collect_new_pages(collect, page_nums, is_new, limit=None):
+    """
+    Новые карточки со страниц выдачи (свежие сверху), по одной странице:
+    страница без новых вакансий значит, что дальше только известные
+    """
+    vacancy_data = []
+    seen = set()
+    for page_num in page_nums:
+        cards = collect(page_num)
+        if not isinstance(cards, list):
+            print(f"Warning: Failed to collect page {page_num}: {cards}", file=sys.stderr)
+            return vacancy_data or cards
+
+        new_ids = is_new([data["vacancy_id"] for data in cards])
+        fresh = 0
+        for data in cards:
+            key = data["vacancy_id"] or data["url"]
+            if key in seen or (data["vacancy_id"] is not None and data["vacancy_id"] not in new_ids):
+                continue
+            seen.add(key)
+            vacancy_data.append(data)
+            fresh += 1
+
+        if not fresh or (limit and len(vacancy_data) >= limit):
+            break
+    return vacancy_data
+
+def _describe_on_page(page, vacancy_data, cache=None, on_vacancy=None):
+    """
+    Описания для готовых карточек по очереди в одной вкладке
+    """
+    urls = [data["url"] for data in vacancy_data]
+    return _deliver(vacancy_data, _iter_descriptions(urls, page=page, cache=cache), on_vacancy)
+
+def _select(vacancy_data, select=None, limit=None):
+    if select is not None:
+        vacancy_data = select(vacancy_data)
+    return vacancy_data[:limit]
+
+def _search_on_page(page, query, page_nums, cache=None, limit=None, on_vacancy=None, select=None, is_new=None,
+                    describe=True):
+    """
+    Поиск целиком в одной вкладке: карточки, затем описания по очереди
+    """
+    vacancy_data = _collect_pages(query, page_nums, page=page, is_new=is_new, limit=limit)
+    if not isinstance(vacancy_data, list):
+        return vacancy_data
+    vacancy_data = _select(vacancy_data, select, limit)
+    if not describe:
+        return _deliver_cards(vacancy_data, on_vacancy)
+    return _describe_on_page(page, vacancy_data, cache, on_vacancy)
+
+def _run_with_local_browser(fn, *args, session_file=SESSION_FILE):
+    """
+    Запускает браузер на один вызов и выполняет fn(page, *args)
+    """
     with sync_playwright() as p:
         # Launch browser (headless for automation)
-        browser = p.chromium.launch(headless=True)
+        with metrics.stage("browser_launch"):
+            browser = p.chromium.launch(headless=True)
         # Create context with saved storage state (cookies/local storage)
         try:
-            context = browser.new_context(storage_state=SESSION_FILE)
+            context = browser.new_context(storage_state=session_file)
         except Exception as e:
             print(json.dumps({"error": f"Failed to load session: {str(e)}"}))
             browser.close()
             return
 
         page = context.new_page()
-        
-        # Build Search URL with pagination
-        url = f"https://hh.ru/search/vacancy?text={query}&area={AREA_CODE}&items_on_page=20&page={page_num}"
-        
+
         try:
-            page.goto(url, wait_until="domcontentloaded")
-            
-            # Check if we triggered bot protection
-            if "captcha" in page.title().lower() or "robot" in page.content().lower():
-               print(json.dumps({"error": "Bot protection triggered"}))
-               return
-
-            # Wait for results to appear
-            page.wait_for_selector("[data-qa='vacancy-serp__vacancy']", timeout=10000)
-            
-            # Сначала собираем все базовые данные со страницы поиска
-            vacancy_data = []
-            cards = page.locator("[data-qa='vacancy-serp__vacancy']").all()
-            
-            for i, card in enumerate(cards):
-                try:
-                    title_el = card.locator("[data-qa='serp-item__title']")
-                    
-                    # Ждем появления элемента перед получением атрибутов
-                    title_el.wait_for(state="visible", timeout=5000)
-                    
-                    href = title_el.get_attribute("href")
-                    title = title_el.inner_text()
-                    
-                    # Employer
-                    employer_el = card.locator("[data-qa='vacancy-serp__vacancy-employer']").first
-                    employer = employer_el.inner_text() if employer_el.count() > 0 else "Unknown"
-                    
-                    vacancy_data.append({
-                        "title": title,
-                        "url": href,
-                        "employer": employer
-                    })
-                except Exception as e:
-                    print(f"Warning: Failed to parse vacancy card {i}: {str(e)}", file=sys.stderr)
-                    continue
-            
-            # Теперь получаем полные описания для каждой вакансии
-            vacancies = []
-            for data in vacancy_data:
-                full_description = get_vacancy_description(page, data["url"])
-                
-                vacancies.append({
-                    "title": data["title"],
-                    "url": data["url"],
-                    "employer": data["employer"],
-                    "description": full_description
-                })
-                
-            # Output JSON for n8n
-            if __name__ == "__main__":
-                print(json.dumps(vacancies, ensure_ascii=False, indent=2))
-            
-            return vacancies
-            
-        except Exception as e:
-            err = {"error": str(e)}
-            if __name__ == "__main__":
-                print(json.dumps(err))
-            return err
+            return fn(page, *args)
         finally:
             browser.close()
 
+def search_pages(query, page_nums, pool=None, fetcher=None, cache=None, limit=None, on_vacancy=None, select=None,
+                 http=None, is_new=None, describe=True, session_file=SESSION_FILE):
+    """
+    Поиск по нескольким страницам выдачи за один вызов: страницы грузятся
+    параллельно, повторы убираются, описание каждой вакансии загружается
+    один раз. limit - максимум вакансий в результате.
+    select - функция над списком карточек до загрузки описаний
+    (пометки, фильтры); limit применяется после неё.
+    is_new - инкрементальный режим: функция над списком ID вакансий,
+    возвращающая множество новых. Выдача идёт по дате публикации, страницы
+    грузятся по очереди до первой без новых вакансий, известные отбрасываются
+    до загрузки описаний.
+    describe=False - только карточки выдачи, страницы вакансий не открываются.
+    session_file - сессия аккаунта для браузера, запускаемого на вызов.
+    Остальные параметры - как у search_vacancies
+    """
+    if not os.path.exists(session_file):
+        print(json.dumps({"error": "Session file not found. Run hh_login.py first."}))
+        return
+
+    page_nums = list(page_nums)
+
+    if http is not None:
+        # Браузер (pool или запущенный на вызов) - только для того, что не разобрал http
+        vacancy_data = _collect_pages(query, page_nums, pool=pool, http=http, is_new=is_new, limit=limit,
+                                      session_file=session_file)
+        if not isinstance(vacancy_data, list):
+            return vacancy_data
+        vacancy_data = _select(vacancy_data, select, limit)
+        if not describe:
+            return _deliver_cards(vacancy_data, on_vacancy)
+        urls = [data["url"] for data in vacancy_data]
+        descriptions = _iter_descriptions(urls, fetcher=fetcher, cache=cache, http=http, pool=pool,
+                                          session_file=session_file)
+        return _deliver(vacancy_data, descriptions, on_vacancy)
+
+    if pool is None:
+        return _run_with_local_browser(_search_on_page, query, page_nums, cache, limit, on_vacancy, select, is_new,
+                                       describe, session_file=session_file)
+
+    if fetcher is None and (len(page_nums) == 1 or is_new is not None):
+        # Инкрементальный поиск и так идёт по одной странице - в одной вкладке
+        return pool.run(_search_on_page, query, page_nums, cache, limit, on_vacancy, select, is_new, describe)
+
+    vacancy_data = _collect_pages(query, page_nums, pool=pool, is_new=is_new, limit=limit)
+    if not isinstance(vacancy_data, list):
+        return vacancy_data
+    vacancy_data = _select(vacancy_data, select, limit)
+    if not describe:
+        return _deliver_cards(vacancy_data, on_vacancy)
+
+    if fetcher is None:
+        return pool.run(_describe_on_page, vacancy_data, cache, on_vacancy)
+
+    # Описания грузятся параллельно, порядок карточек сохраняется
+    urls = [data["url"] for data in vacancy_data]
+    return _deliver(vacancy_data, _iter_descriptions(urls, fetcher=fetcher, cache=cache), on_vacancy)
+
+def get_descriptions(urls, pool=None, fetcher=None, cache=None, http=None, session_file=SESSION_FILE):
+    """
+    Описания вакансий по ссылкам в том же порядке ("" - не удалось загрузить).
+    Кэш, http, fetcher, pool и session_file используются так же, как в search_pages
+    """
+    if not os.path.exists(session_file):
+        print(json.dumps({"error": "Session file not found. Run hh_login.py first."}))
+        return
+
+    descriptions = [""] * len(urls)
+    with metrics.stage("descriptions"):
+        for n, description in _iter_descriptions(list(urls), fetcher=fetcher, cache=cache, http=http, pool=pool,
+                                                  session_file=session_file):
+            descriptions[n] = description
+    return descriptions
+
+def search_vacancies(query=SEARCH_TEXT, page_num=0, pool=None, fetcher=None, cache=None, on_vacancy=None, http=None):
+    """
+    pool - BrowserPool из hh_server; без него браузер запускается на один вызов
+    fetcher - DescriptionFetcher для параллельной загрузки описаний (вместе с pool)
+    http - HttpFetcher (FETCH_MODE=http): выдача и описания читаются HTTP-запросами,
+    браузер открывается только при капче или непонятной разметке
+    cache - DescriptionCache; описания из кэша не требуют перехода на страницу
+    on_vacancy - callback для потоковой выдачи: вызывается для каждой вакансии
+    сразу по готовности описания, вместо списка возвращается их количество
+    """
+    result = search_pages(query, [page_num], pool=pool, fetcher=fetcher, cache=cache, on_vacancy=on_vacancy, http=http)
+
+    # Output JSON for n8n
+    if __name__ == "__main__" and result is not None:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    return result
+
 if __name__ == "__main__":
     query = sys.argv[1] if len(sys.argv) > 1 else SEARCH_TEXT
     page_num = int(sys.argv[2]) if len(sys.argv) > 2 else 0
-    search_vacancies(query, page_num)
+
+    http = None
+    from http_fetcher import FETCH_MODE, HttpFetcher
+    if FETCH_MODE == "http":
+        http = HttpFetcher(SESSION_FILE)
+    try:
+        search_vacancies(query, page_num, http=http)
+    finally:
+        if http is not None:
+            http.shutdown()
@@ -0,0 +1,112 @@
+import os
+import time
+from typing import Iterable, Set
+
+from dotenv import load_dotenv
+
+from sqlite_store import SQLiteStore
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+SEEN_FILE = os.getenv("SEEN_INDEX_FILE", os.path.join(N8N_FILES_DIR, "hh_seen.sqlite3"))
+SEEN_TTL_DAYS = float(os.getenv("SEEN_INDEX_TTL_DAYS", 30))  # forget vacancies seen longer ago
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued for this query."""
+
+
+class SeenIndex(SQLiteStore):
+    """
+    Vacancy IDs already returned per search query, grouped into runs.
+
+    A run is one incremental search that returned something; its ID is the
+    cursor of the response. "New as of a cursor" means not returned by that
+    run or any earlier run of the same query, so repeating a request with an
+    old cursor returns the same vacancies again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+            query_key  TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS seen (
+            query_key  TEXT    NOT NULL,
+            vacancy_id INTEGER NOT NULL,
+            run_id     INTEGER NOT NULL,
+            first_seen REAL    NOT NULL,
+            PRIMARY KEY (query_key, vacancy_id)
+        );
+        CREATE INDEX IF NOT EXISTS runs_query ON runs (query_key, run_id);
+    """
+
+    def __init__(self, path: str = SEEN_FILE, ttl: float = SEEN_TTL_DAYS * 86400):
+        super().__init__(path)
+        self.ttl = ttl
+        if ttl > 0:
+            cutoff = time.time() - ttl
+            with self._lock:
+                self._conn.execute("DELETE FROM seen WHERE first_seen < ?", (cutoff,))
+                self._conn.execute(
+                    "DELETE FROM runs WHERE created_at < ? AND run_id NOT IN (SELECT MAX(run_id) FROM runs GROUP BY query_key)",
+                    (cutoff,),
+                )
+
+    @staticmethod
+    def query_key(query: str, area: str = "") -> str:
+        """Queries differing only in case and spacing share one index."""
+        return f"{area}:{' '.join(query.lower().split())}"
+
+    def resolve(self, key: str, since: str) -> int:
+        """Run ID for since=last or since=<cursor>; 0 when nothing was seen yet."""
+        with self._lock:
+            if since == "last":
+                row = self._conn.execute("SELECT MAX(run_id) FROM runs WHERE query_key = ?", (key,)).fetchone()
+                return row[0] or 0
+            if since == "0":
+                return 0
+            if since.isdigit():
+                row = self._conn.execute("SELECT query_key FROM runs WHERE run_id = ?", (int(since),)).fetchone()
+                if row is not None and row["query_key"] == key:
+                    return int(since)
+        raise InvalidCursor(f"Unknown cursor for this query: {since!r}")
+
+    def unseen(self, key: str, vacancy_ids: Iterable[int], as_of: int) -> Set[int]:
+        """The IDs among vacancy_ids not returned by run `as_of` or earlier."""
+        ids = list(dict.fromkeys(vid for vid in vacancy_ids if vid is not None))
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT vacancy_id FROM seen WHERE query_key = ? AND run_id <= ? AND vacancy_id IN ({placeholders})",
+                (key, as_of, *ids),
+            ).fetchall()
+        return set(ids) - {row["vacancy_id"] for row in rows}
+
+    def mark(self, key: str, vacancy_ids: Iterable[int], as_of: int) -> int:
+        """
+        Record the returned vacancies as a new run and return its cursor;
+        without vacancies nothing changes and `as_of` stays the cursor.
+        """
+        ids = [vid for vid in dict.fromkeys(vacancy_ids) if vid is not None]
+        if not ids:
+            return as_of
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            run_id = self._conn.execute(
+                "INSERT INTO runs (query_key, created_at) VALUES (?, ?)", (key, now)
+            ).lastrowid
+            # A vacancy returned again after an old cursor keeps its first run
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (query_key, vacancy_id, run_id, first_seen) VALUES (?, ?, ?, ?)",
+                [(key, vid, run_id, now) for vid in ids],
+            )
+            self._conn.execute("COMMIT")
+        return run_id
@@ -0,0 +1,205 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+SESSION_FILE = os.path.join(N8N_FILES_DIR, "hh_session.json")
+# Storage states of several hh.ru accounts, comma separated (empty - SESSION_FILE only)
+SESSION_FILES = [path.strip() for path in os.getenv("HH_SESSION_FILES", "").split(",") if path.strip()]
+SESSION_ROUTING = os.getenv("SESSION_ROUTING", "least_loaded")  # least_loaded | sticky
+SESSION_CAPTCHA_COOLDOWN = float(os.getenv("SESSION_CAPTCHA_COOLDOWN", 600))  # seconds a session is avoided
+
+logger = logging.getLogger("Sessions")
+
+OK, CAPTCHA, EXPIRED, MISSING = "ok", "captcha", "expired", "missing"
+
+# Preferred first; MISSING sessions are never used
+_RANK = {OK: 0, CAPTCHA: 1, EXPIRED: 2}
+
+_NO_STATE = {"cookies": [], "origins": []}
+
+
+class NoSessionAvailable(RuntimeError):
+    """None of the configured session files can be used."""
+
+
+class Session:
+    """
+    One hh.ru account: its storage state kept in memory, re-read only after
+    the file changes on disk (e.g. hh_login.py saved a new login).
+
+    A Session is callable and returns the current storage state, so it can
+    be handed to BrowserPool and DescriptionFetcher as `storage_state`; the
+    components serving this account are attached by hh_server.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._state: Optional[Dict[str, Any]] = None
+
+        self.in_flight = 0
+        self.requests = 0
+        self.captchas = 0
+        self.blocked_until = 0.0
+
+        self.browser_pool = None
+        self.description_fetcher = None
+        self.http_fetcher = None
+
+        self.refresh()
+
+    def __call__(self) -> Dict[str, Any]:
+        self.refresh()
+        return self._state or _NO_STATE
+
+    def refresh(self) -> bool:
+        """Re-read the file if it changed; True when it did."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            if mtime is None:
+                self._state = None
+                return True
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Session {self.name}: cannot read {self.path}: {e}")
+                self._state = None
+                return True
+            # A new object: browsers holding the old one swap their cookies
+            self._state = state
+        logger.info(f"Session {self.name}: loaded {len(state.get('cookies', []))} cookie(s) from {self.path}")
+        return True
+
+    def status(self) -> str:
+        with self._lock:
+            state = self._state
+        if state is None:
+            return MISSING
+        if time.monotonic() < self.blocked_until:
+            return CAPTCHA
+        # Cookies with an expiry date that have all run out: hh.ru will show the login page
+        expiring = [cookie["expires"] for cookie in state.get("cookies", []) if (cookie.get("expires") or -1) > 0]
+        if not state.get("cookies") or (expiring and max(expiring) < time.time()):
+            return EXPIRED
+        return OK
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "status": self.status(),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "captchas": self.captchas,
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic())),
+        }
+
+
+class SessionManager:
+    """
+    Routes work to the configured accounts.
+
+    least_loaded picks the session with the fewest requests in flight;
+    sticky sends the same key (query text, vacancy link) to the same session
+    as long as it stays usable, by rendezvous hashing, so losing one session
+    moves only its own keys. Healthy sessions are preferred; one that met a
+    captcha is avoided for `captcha_cooldown` seconds and an expired one is
+    used only when nothing better is left.
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None, routing: str = SESSION_ROUTING,
+                 captcha_cooldown: float = SESSION_CAPTCHA_COOLDOWN):
+        if routing not in ("least_loaded", "sticky"):
+            raise ValueError(f"SESSION_ROUTING must be least_loaded or sticky, not {routing!r}")
+        self.routing = routing
+        self.captcha_cooldown = captcha_cooldown
+        self.sessions = [Session(path) for path in dict.fromkeys(paths or SESSION_FILES or [SESSION_FILE])]
+        self._by_name = {session.name: session for session in self.sessions}
+        if len(self._by_name) != len(self.sessions):
+            raise ValueError("Session files must have different names")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, name: str) -> Optional[Session]:
+        return self._by_name.get(name)
+
+    def _candidates(self, name: Optional[str] = None) -> List[Session]:
+        """Usable sessions of the best health; `name` asks for one explicitly."""
+        if name is not None:
+            session = self._by_name.get(name)
+            if session is None:
+                raise KeyError(name)
+            session.refresh()
+            if session.status() == MISSING:
+                raise NoSessionAvailable(f"Session file of {name} not found. Run hh_login.py first.")
+            return [session]
+
+        ranked: Dict[int, List[Session]] = {}
+        for session in self.sessions:
+            session.refresh()
+            status = session.status()
+            if status != MISSING:
+                ranked.setdefault(_RANK[status], []).append(session)
+        if not ranked:
+            raise NoSessionAvailable("Session file not found. Run hh_login.py first.")
+        return ranked[min(ranked)]
+
+    @contextlib.contextmanager
+    def lease(self, key: Optional[str] = None, name: Optional[str] = None) -> Iterator[Session]:
+        """
+        Hold a session while working with it. A captcha met meanwhile (noted
+        on the current trace) takes the session out of rotation for a while.
+        """
+        candidates = self._candidates(name)
+        trace = metrics.current_trace()
+        captchas = trace.events("captcha") if trace is not None else 0
+        with self._lock:
+            if self.routing == "sticky" and key is not None:
+                session = max(candidates, key=lambda candidate: hashlib.blake2b(
+                    f"{candidate.name}\0{key}".encode("utf-8"), digest_size=8).digest())
+            else:
+                session = min(candidates, key=lambda candidate: (candidate.in_flight, candidate.requests))
+            session.in_flight += 1
+            session.requests += 1
+        try:
+            yield session
+        finally:
+            with self._lock:
+                session.in_flight -= 1
+            if trace is not None and trace.events("captcha") > captchas:
+                self.mark_captcha(session)
+
+    def mark_captcha(self, session: Session):
+        with self._lock:
+            session.captchas += 1
+            session.blocked_until = time.monotonic() + self.captcha_cooldown
+        if len(self.sessions) > 1:
+            logger.warning(f"Session {session.name}: bot protection, avoided for {self.captcha_cooldown:.0f}s")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [session.stats() for session in self.sessions]
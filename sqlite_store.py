@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Small base for the on-disk stores of the server.
+
+    One connection shared by all server threads, guarded by a lock.
+    Subclasses put their CREATE statements into SCHEMA.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self.SCHEMA:
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,8 +2,13 @@ import os
 import subprocess
 import sys
 import time
+import urllib.request
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
 # Папки и файлы
 SESSION_DIR = Path("session")
 HH_LOGIN_SCRIPT = Path("hh_login.py")
@@ -13,6 +18,8 @@ N8N_GIT = "https://github.com/n8n-io/n8n.git"
 N8N_VOLUME = "n8n_data"
 N8N_CONTAINER_NAME = "n8n"
 N8N_PORT = 5678
+HH_SERVER_URL = f"http://{os.getenv('SERVER_HOST', '127.0.0.1')}:{os.getenv('SERVER_PORT', 8000)}"
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", 120))  # секунд ожидания готовности каждого сервиса
 
 
 def ensure_session():
@@ -51,17 +58,41 @@ def run_n8n():
 
 
 def run_hh_server():
-    """Запускаем hh_server.py в текущей консоли PyCharm с логами."""
+    """Запускаем hh_server.py в текущей консоли PyCharm с логами, не дожидаясь n8n."""
     print("Запускаем HH Server в текущей консоли PyCharm...")
-    subprocess.run([sys.executable, str(HH_SERVER_SCRIPT)])
+    return subprocess.Popen([sys.executable, str(HH_SERVER_SCRIPT)])
+
+
+def wait_ready(name, url, process=None, timeout=READY_TIMEOUT):
+    """Опрашиваем url, пока он не ответит 200, вместо фиксированной паузы."""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if process is not None and process.poll() is not None:
+            print(f"{name} завершился с кодом {process.returncode}")
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                print(f"{name} готов за {time.monotonic() - started:.1f} с")
+                return True
+        except OSError:  # ещё не слушает порт или отвечает 503
+            time.sleep(0.5)
+    print(f"{name} не готов за {timeout:.0f} с ({url}), продолжаем без него")
+    return False
 
 
 def main():
     ensure_session()
     ensure_n8n()
     run_n8n()
-    time.sleep(5)  # Ждем немного, чтобы n8n поднялся
-    run_hh_server()
+    # n8n и сервер поднимаются одновременно
+    server = run_hh_server()
+    try:
+        wait_ready("HH Server", f"{HH_SERVER_URL}/ready", process=server)
+        wait_ready("n8n", f"http://127.0.0.1:{N8N_PORT}/healthz")
+        server.wait()
+    except KeyboardInterrupt:
+        # Ctrl+C получает и сервер, он останавливается сам
+        server.wait()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+import unittest
+
+from description_compact import DuplicateIndex, compact, minhash, similarity, strip_boilerplate, trim
+
+DESCRIPTION = """О компании:
+Мы крупнейший сервис онлайн-записи, у нас 500 сотрудников.
+Обязанности:
+• разрабатывать личный кабинет на React и TypeScript
+• поддерживать дизайн-систему и библиотеку компонентов
+• писать unit и e2e тесты, участвовать в код-ревью
+Требования:
+— опыт коммерческой разработки от двух лет
+— уверенное знание JavaScript, HTML и CSS
+Мы предлагаем:
+- ДМС и компенсацию спорта
+- гибкий график"""
+
+TASKS = ("разрабатывать новые разделы личного кабинета на React и TypeScript, поддерживать дизайн-систему "
+         "и библиотеку компонентов, писать unit и e2e тесты, участвовать в код-ревью и планировании, "
+         "оптимизировать производительность страниц, работать вместе с дизайнерами и бэкенд-разработчиками "
+         "над новыми функциями сервиса онлайн-записи для клиник по всей стране")
+REPOST = TASKS.replace("по всей стране", "по всей России")
+
+
+class CompactTest(unittest.TestCase):
+    def test_boilerplate_sections_are_dropped(self):
+        self.assertEqual(strip_boilerplate(DESCRIPTION).splitlines(), [
+            "Обязанности:",
+            "- разрабатывать личный кабинет на React и TypeScript",
+            "- поддерживать дизайн-систему и библиотеку компонентов",
+            "- писать unit и e2e тесты, участвовать в код-ревью",
+            "Требования:",
+            "- опыт коммерческой разработки от двух лет",
+            "- уверенное знание JavaScript, HTML и CSS",
+        ])
+
+    def test_only_boilerplate_is_kept(self):
+        self.assertEqual(strip_boilerplate("О компании:\nМы   лучшие"), "О компании:\nМы лучшие")
+
+    def test_trim_at_a_boundary(self):
+        self.assertEqual(trim("Одна довольно длинная фраза. Вторая фраза", 35), "Одна довольно длинная фраза. …")
+        # A sentence end far back loses to the last word
+        self.assertEqual(trim("Первая фраза. Вторая фраза длиннее", 30), "Первая фраза. Вторая фраза …")
+        self.assertEqual(trim("коротко", 30), "коротко")
+        self.assertEqual(trim("без ограничения", 0), "без ограничения")
+
+    def test_compact_budget(self):
+        text = compact(DESCRIPTION, budget=80)
+        self.assertLessEqual(len(text), 82)
+        self.assertTrue(text.startswith("Обязанности:\n- разрабатывать"))
+        self.assertEqual(compact(""), "")
+
+
+class MinHashTest(unittest.TestCase):
+    def test_similarity(self):
+        self.assertEqual(similarity(minhash(TASKS), minhash(TASKS)), 1.0)
+        self.assertGreater(similarity(minhash(TASKS), minhash(REPOST)), 0.8)
+        self.assertLess(similarity(minhash(TASKS), minhash("вёрстка лендингов на Tilda и поддержка WordPress")), 0.2)
+        self.assertIsNone(minhash("!!! ..."))
+
+
+class DuplicateIndexTest(unittest.TestCase):
+    def _vacancy(self, vacancy_id, description):
+        return {"vacancy_id": vacancy_id, "description": description}
+
+    def test_repost_points_to_the_first_vacancy(self):
+        index = DuplicateIndex()
+        vacancies = [
+            self._vacancy(1, "О компании:\nМы банк\nЗадачи:\n" + TASKS),
+            self._vacancy(2, "О нас:\nМы кадровое агентство\nЗадачи:\n" + REPOST),
+            self._vacancy(3, "вёрстка лендингов на Tilda, поддержка сайтов на WordPress и настройка рекламы"),
+            self._vacancy(4, ""),
+        ]
+        self.assertEqual([vacancy["dup_of"] for vacancy in index.annotate(vacancies)], [None, 1, None, None])
+        # A repost of the repost still points to the first one, and the answer is stable
+        again = index.annotate([self._vacancy(5, TASKS), self._vacancy(2, "что угодно")])
+        self.assertEqual([vacancy["dup_of"] for vacancy in again], [1, 1])
+        self.assertEqual(index.stats(), {"entries": 4, "duplicates": 2})
+
+    def test_exclude_drops_duplicates(self):
+        index = DuplicateIndex()
+        selected = index.annotate([self._vacancy(1, TASKS), self._vacancy(2, TASKS)], exclude=True)
+        self.assertEqual([vacancy["vacancy_id"] for vacancy in selected], [1])
+
+    def test_oldest_entries_are_evicted(self):
+        index = DuplicateIndex(size=1)
+        index.annotate([self._vacancy(1, TASKS), self._vacancy(2, "вёрстка лендингов на Tilda и WordPress")])
+        self.assertIsNone(index.dup_of(3, TASKS))
+        self.assertEqual(index.stats()["entries"], 1)
+
+    def test_disabled(self):
+        index = DuplicateIndex(size=0)
+        self.assertEqual([vacancy["dup_of"] for vacancy in index.annotate([self._vacancy(1, TASKS)] * 2)],
+                         [None, None])
+
+    def test_similarity_bounds(self):
+        for value in (0, 1.5):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                DuplicateIndex(min_similarity=value)
+
+
+if __name__ == "__main__":
+    unittest.main()
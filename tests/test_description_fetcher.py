@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import description_fetcher
+from description_fetcher import DescriptionFetcher
+from rate_limiter import RateLimited
+from session_manager import Session
+
+
+class _FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self, storage_state):
+        self.storage_state = storage_state
+        self.cookies = list(storage_state.get("cookies", []))
+        self.pages = []
+
+    async def new_page(self):
+        self.pages.append(_FakePage())
+        return self.pages[-1]
+
+    async def clear_cookies(self):
+        self.cookies = []
+
+    async def add_cookies(self, cookies):
+        self.cookies += cookies
+
+    async def close(self):
+        pass
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self, storage_state=None):
+        self.contexts.append(_FakeContext(storage_state))
+        return self.contexts[-1]
+
+    async def close(self):
+        pass
+
+
+class _FakeChromium:
+    def __init__(self):
+        self.launches = 0
+
+    async def launch(self, headless=True):
+        self.launches += 1
+        return _FakeBrowser()
+
+
+class _FakePlaywright:
+    def __init__(self):
+        self.chromium = _FakeChromium()
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+def _write_state(path, value):
+    cookie = {"name": "hhtoken", "value": value, "domain": "hh.ru", "path": "/", "expires": -1}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cookies": [cookie], "origins": []}, f)
+
+
+class _FetcherTestCase(unittest.TestCase):
+    """A DescriptionFetcher on a Session, as hh_server hands it over, with a fake browser."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "hh_session.json")
+        _write_state(self.path, "first")
+        self.playwright = _FakePlaywright()
+        patches = [
+            mock.patch.object(description_fetcher, "async_playwright", lambda: self.playwright),
+            mock.patch.object(description_fetcher, "lean_profile", lambda name: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.session = Session(self.path)
+        self.fetcher = DescriptionFetcher(self.session, concurrency=2)
+        self.addCleanup(self.dir.cleanup)
+
+    def tearDown(self):
+        self.fetcher.shutdown(timeout=5)
+
+    def _ensure_context(self):
+        future = description_fetcher.asyncio.run_coroutine_threadsafe(
+            self.fetcher._ensure_context(), self.fetcher._loop)
+        future.result(timeout=5)
+
+
+class DescriptionFetcherSessionTest(_FetcherTestCase):
+    """The fetcher gets its cookies from the Session."""
+
+    def test_start_launches_with_session_state(self):
+        with self.assertNoLogs("DescriptionFetcher", level=logging.ERROR):
+            self.fetcher.start()
+        self.assertEqual(self.playwright.chromium.launches, 1)
+        self.assertIs(self.fetcher._context_state, self.session())
+        self.assertEqual([c["value"] for c in self.fetcher._context.cookies], ["first"])
+
+    def test_new_login_swaps_cookies_without_relaunch(self):
+        self.fetcher.start()
+        _write_state(self.path, "second")
+        stat = os.stat(self.path)
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 1))  # coarse mtime on some file systems
+
+        self._ensure_context()
+
+        self.assertEqual(self.playwright.chromium.launches, 1)
+        self.assertIs(self.fetcher._context_state, self.session())
+        self.assertEqual([c["value"] for c in self.fetcher._context.cookies], ["second"])
+
+
+class _PausedLimiter:
+    def __init__(self):
+        self.errors = []
+
+    async def acquire_async(self, max_wait=None, trace=None):
+        raise RateLimited(30)
+
+    def report_error(self, error):
+        self.errors.append(error)
+
+
+class DescriptionFetcherRateLimitTest(_FetcherTestCase):
+    def test_pause_reaches_the_caller(self):
+        limiter = _PausedLimiter()
+        self.fetcher.start()
+        with mock.patch.object(description_fetcher, "LIMITER", limiter):
+            with self.assertRaises(RateLimited) as raised:
+                list(self.fetcher.iter_descriptions(["https://hh.ru/vacancy/1"]))
+        self.assertEqual(raised.exception.retry_after, 30)
+        self.assertEqual(limiter.errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+
+import hh_server
+from description_compact import DuplicateIndex, compact
+from vacancy_filter import FilterRules
+
+
+def _parse(query):
+    return hh_server._parse_page_range({name: [value] for name, value in query.items()})
+
+
+class PageRangeTest(unittest.TestCase):
+    def test_single_page_by_default(self):
+        self.assertEqual(_parse({}), ([0], None))
+        self.assertEqual(_parse({"page": "3"}), ([3], None))
+
+    def test_ranges_and_lists_are_merged(self):
+        self.assertEqual(_parse({"pages": "0-2"})[0], [0, 1, 2])
+        self.assertEqual(_parse({"pages": "5, 0-1,1"})[0], [0, 1, 5])
+
+    def test_limit_spans_enough_pages(self):
+        self.assertEqual(_parse({"page": "1", "limit": "50"}), ([1, 2, 3], 50))
+
+    def test_invalid_ranges(self):
+        for query in ({"limit": "0"}, {"page": "-1"}, {"pages": "a-b"}, {"pages": "-2"}):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                _parse(query)
+
+    def test_page_count_is_bounded(self):
+        with mock.patch.object(hh_server, "SEARCH_MAX_PAGES", 3):
+            self.assertEqual(_parse({"pages": "0-2"})[0], [0, 1, 2])
+            self.assertEqual(_parse({"pages": "0-2,1,2-2"})[0], [0, 1, 2])
+            for query in ({"pages": "0-3"}, {"pages": "0-1,5-6"}, {"limit": "61"}):
+                with self.subTest(query=query), self.assertRaises(ValueError):
+                    _parse(query)
+
+    def test_huge_range_is_rejected_before_it_is_built(self):
+        def bounded_range(*args):
+            pages = range(*args)
+            self.assertLessEqual(len(pages), hh_server.SEARCH_MAX_PAGES)
+            return pages
+
+        with mock.patch.object(hh_server, "range", bounded_range, create=True):
+            for query in ({"pages": "0-999999999999"}, {"pages": "0,1-999999999999"}, {"limit": "999999999999999"}):
+                with self.subTest(query=query), self.assertRaisesRegex(ValueError, "pages per request"):
+                    _parse(query)
+
+    def test_reversed_range_is_rejected(self):
+        for pages in ("5-2", "0,3-1"):
+            with self.subTest(pages=pages), self.assertRaisesRegex(ValueError, "Invalid page range"):
+                _parse({"pages": pages})
+
+
+TEXT = ("Разработка backend сервисов на Python, проектирование API, код ревью, "
+        "работа с PostgreSQL и Redis, участие в планировании и оценке задач команды")
+
+
+def _vacancy(vacancy_id):
+    return {"vacancy_id": vacancy_id, "description": TEXT, "dup_of": None}
+
+
+class FlagDuplicatesTest(unittest.TestCase):
+    def _scoring(self):
+        return hh_server._Scoring(FilterRules(), None, None, describe=True)
+
+    def test_cached_vacancies_are_not_annotated(self):
+        index = DuplicateIndex()
+        cached = [_vacancy(1), _vacancy(2)]
+
+        flagged = self._scoring().flag_duplicates(index, cached, exclude=False)
+
+        self.assertEqual([vacancy["dup_of"] for vacancy in flagged], [None, 1])
+        self.assertEqual([vacancy["dup_of"] for vacancy in cached], [None, None])
+
+    def test_exclude_drops_duplicates(self):
+        scoring = self._scoring()
+
+        flagged = scoring.flag_duplicates(DuplicateIndex(), [_vacancy(1), _vacancy(2)], exclude=True)
+
+        self.assertEqual([vacancy["vacancy_id"] for vacancy in flagged], [1])
+        self.assertEqual(scoring.rejected, [2])
+
+
+class ProjectTest(unittest.TestCase):
+    def test_compact_description_only_on_request(self):
+        vacancy = {**_vacancy(1), "title": "Python"}
+
+        self.assertNotIn("description_compact", hh_server._project(vacancy, None))
+        self.assertEqual(hh_server._project(vacancy, ("title", "description_compact")),
+                         {"title": "Python", "description_compact": compact(TEXT)})
+        self.assertNotIn("description_compact", vacancy)
+
+    def test_bookkeeping_fields_survive(self):
+        vacancy = {"vacancy_id": 1, "description": None, "index": 4, "error": "Description unavailable"}
+
+        self.assertEqual(hh_server._project(vacancy, ("vacancy_id", "description_compact")),
+                         {"vacancy_id": 1, "description_compact": "", "index": 4, "error": "Description unavailable"})
+
+
+class ScoringCursorTest(unittest.TestCase):
+    def test_top_k_cuts_stay_out_of_the_cursor(self):
+        rules = FilterRules({"include": {"react": 3, "typescript": 2}, "exclude": ["стажёр"]})
+        scoring = hh_server._Scoring(rules, None, 1, describe=True)
+        cards = [{"vacancy_id": 1, "title": "React"}, {"vacancy_id": 2, "title": "TypeScript"},
+                 {"vacancy_id": 3, "title": "Стажёр React"}]
+
+        selected = scoring.select(cards)
+
+        self.assertEqual([card["vacancy_id"] for card in selected], [1])
+        self.assertEqual(scoring.rejected, [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
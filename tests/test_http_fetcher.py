@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+
+import mock_hh
+from http_fetcher import CaptchaError, HttpFetcher, parse_description, parse_serp
+from session_manager import Session
+
+
+def _fixture(name):
+    with open(os.path.join(mock_hh.FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+class ParseFixturesTest(unittest.TestCase):
+    """The HTTP parsers against the pages the local stand-in serves."""
+
+    def test_serp_cards(self):
+        cards = parse_serp(_fixture("serp"))
+        self.assertEqual(len(cards), 20)
+        self.assertEqual(cards[0], {
+            "title": "Team Lead Frontend",
+            "url": "https://hh.ru/vacancy/100001?query=frontend&hhtmFrom=vacancy_search_list",
+            "employer": "ООО Ромашка",
+            "vacancy_id": 100001,
+            "salary": "до 3 500 $ за месяц, на руки",
+            "salary_from": None,
+            "salary_to": 3500,
+            "salary_currency": "USD",
+            "area": "Москва",
+            "experience": "Опыт 1–3 года",
+            "published": "27 октября",
+        })
+        self.assertEqual(len({card["vacancy_id"] for card in cards}), 20)
+        self.assertTrue(all(card["title"] and card["employer"] for card in cards))
+
+    def test_description(self):
+        description = parse_description(_fixture("vacancy"))
+        self.assertTrue(description.startswith("Мы — продуктовая команда"))
+        self.assertIn("\nЧем предстоит заниматься:\n", description)
+        self.assertNotIn("<", description)
+
+    def test_no_cards(self):
+        self.assertIsNone(parse_serp("<html><head><title>hh.ru</title></head><body></body></html>"))
+
+    def test_captcha_page(self):
+        with self.assertRaises(CaptchaError):
+            parse_serp(mock_hh.CAPTCHA_PAGE)
+        with self.assertRaises(CaptchaError):
+            parse_description(mock_hh.CAPTCHA_PAGE)
+
+
+class MockServerSerpTest(unittest.TestCase):
+    def setUp(self):
+        self.server = mock_hh.start_mock()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _cards(self, text, page):
+        url = f"{self.server.base_url}/search/vacancy?text={text}&page={page}"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return parse_serp(response.read().decode("utf-8"))
+
+    def test_pages_and_queries_have_their_own_vacancies(self):
+        first, second, other = self._cards("frontend", 0), self._cards("frontend", 1), self._cards("python", 0)
+        ids = [{card["vacancy_id"] for card in cards} for cards in (first, second, other)]
+        self.assertEqual([len(page_ids) for page_ids in ids], [20, 20, 20])
+        self.assertFalse(ids[0] & ids[1] or ids[0] & ids[2])
+        self.assertEqual([card["title"] for card in first], [card["title"] for card in second])
+        self.assertEqual(self.server.stats(), {"serp": 3})
+
+
+def _write_state(path, value, mtime_shift=0):
+    cookie = {"name": "hhtoken", "value": value, "domain": "hh.ru", "path": "/", "expires": -1}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cookies": [cookie], "origins": []}, f)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + mtime_shift))  # coarse mtime on some file systems
+
+
+class HttpFetcherCookiesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, "hh_session.json")
+        _write_state(self.path, "first")
+
+    def _fetcher(self, storage_state):
+        fetcher = HttpFetcher(storage_state, connections=1)
+        self.addCleanup(fetcher.shutdown)
+        return fetcher
+
+    def test_session_state_is_shared_with_the_browsers(self):
+        session = Session(self.path)
+        fetcher = self._fetcher(session)
+        self.assertEqual(fetcher._cookies(), "hhtoken=first")
+
+        _write_state(self.path, "second", mtime_shift=1)
+        self.assertEqual(fetcher._cookies(), "hhtoken=second")
+        self.assertIs(fetcher._cookie_source, session())
+
+    def test_missing_session_sends_no_cookies(self):
+        self.assertIsNone(self._fetcher(Session(os.path.join(self.dir.name, "absent.json")))._cookies())
+
+    def test_file_path_is_still_accepted(self):
+        fetcher = self._fetcher(self.path)
+        self.assertEqual(fetcher._cookies(), "hhtoken=first")
+        _write_state(self.path, "second", mtime_shift=1)
+        self.assertEqual(fetcher._cookies(), "hhtoken=second")
+
+
+if __name__ == "__main__":
+    unittest.main()
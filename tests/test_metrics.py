@@ -0,0 +1,36 @@
+import unittest
+
+import metrics
+
+
+class CallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_plain_and_labelled(self):
+        self.registry.callback("hh_up", "Up", lambda: 1)
+        self.registry.callback("hh_hits_total", "Hits", lambda: {"miss": 2, "hit": 3}, kind="counter", label="result")
+        self.assertEqual(self.registry.exposition().splitlines(), [
+            "# HELP hh_up Up", "# TYPE hh_up gauge", "hh_up 1",
+            "# HELP hh_hits_total Hits", "# TYPE hh_hits_total counter",
+            'hh_hits_total{result="hit"} 3', 'hh_hits_total{result="miss"} 2',
+        ])
+
+    def test_several_labels(self):
+        self.registry.callback("hh_blocked_total", "Blocked", lambda: {("search", "image"): 4, ("apply", "tracker"): 1},
+                               kind="counter", label=("profile", "reason"))
+        self.assertEqual(self.registry.exposition().splitlines()[2:], [
+            'hh_blocked_total{profile="apply",reason="tracker"} 1',
+            'hh_blocked_total{profile="search",reason="image"} 4',
+        ])
+
+    def test_failing_callback_does_not_break_the_scrape(self):
+        self.registry.callback("hh_broken", "Broken", lambda: 1 / 0)
+        self.registry.callback("hh_up", "Up", lambda: 1)
+        lines = self.registry.exposition().splitlines()
+        self.assertEqual(lines[0], "# hh_broken unavailable: division by zero")
+        self.assertIn("hh_up 1", lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
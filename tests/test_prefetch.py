@@ -0,0 +1,24 @@
+import unittest
+
+from prefetch import parse_targets
+
+
+class ParseTargetsTest(unittest.TestCase):
+    def test_queries_and_pages(self):
+        self.assertEqual(parse_targets("Python Developer:0-2;Frontend; ;QA:1,0-1", 10), [
+            ("Python Developer", 0), ("Python Developer", 1), ("Python Developer", 2),
+            ("Frontend", 0), ("QA", 0), ("QA", 1),
+        ])
+
+    def test_colon_without_pages_belongs_to_the_query(self):
+        self.assertEqual(parse_targets("C++: junior", 10), [("C++: junior", 0)])
+
+    def test_page_count_is_bounded(self):
+        self.assertEqual(len(parse_targets("Frontend:0-9", 10)), 10)
+        for spec in ("Frontend:0-10", "Frontend:0-5,6-10", "Frontend:0-999999999999", "Frontend:5-2"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_targets(spec, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
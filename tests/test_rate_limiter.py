@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+import rate_limiter
+from rate_limiter import CAPTCHA, OK, TIMEOUT, AdaptiveRateLimiter, RateLimited
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class AdaptiveRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patch = mock.patch.object(rate_limiter.time, "monotonic", self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def _limiter(self, **kwargs):
+        settings = dict(rps=2, min_rps=0.5, max_rps=4, burst=2, step=1, clean_streak=3, max_pause=60, max_wait=10)
+        settings.update(kwargs)
+        return AdaptiveRateLimiter(**settings)
+
+    def test_burst_then_one_interval_apart(self):
+        limiter = self._limiter()
+        self.assertEqual([limiter.reserve() for _ in range(4)], [0, 0, 0.5, 1.0])
+
+    def test_disabled(self):
+        limiter = self._limiter(rps=0)
+        self.assertEqual([limiter.reserve() for _ in range(10)], [0.0] * 10)
+        limiter.report(CAPTCHA)
+        self.assertEqual(limiter.pause_remaining(), 0)
+
+    def test_captcha_pauses_and_doubles(self):
+        limiter = self._limiter()
+        limiter.report(CAPTCHA)
+        self.assertEqual(limiter.rps, 1)
+        self.assertEqual(limiter.pause_remaining(), rate_limiter.RATE_LIMIT_CAPTCHA_PAUSE)
+
+        # Answers to requests sent before the pause do not count again
+        limiter.report(CAPTCHA)
+        self.assertEqual(limiter.rps, 1)
+
+        self.clock.now += limiter.pause_remaining()
+        limiter.report(CAPTCHA)
+        self.assertEqual(limiter.rps, 0.5)
+        self.assertEqual(limiter.pause_remaining(), min(60, rate_limiter.RATE_LIMIT_CAPTCHA_PAUSE * 2))
+
+    def test_long_pause_raises_with_retry_after(self):
+        limiter = self._limiter()
+        limiter.report(TIMEOUT)  # a 1s pause fits into max_wait
+        self.assertAlmostEqual(limiter.reserve(), 1.0)
+
+        self.clock.now += 1
+        limiter.report_response(429, retry_after="40")
+        with self.assertRaises(RateLimited) as raised:
+            limiter.reserve()
+        self.assertAlmostEqual(raised.exception.retry_after, 40)
+        self.assertAlmostEqual(limiter.reserve(max_wait=60), 40)
+
+    def test_no_burst_after_a_pause(self):
+        limiter = self._limiter()
+        limiter.report_response(429, retry_after="5")
+        self.clock.now += 5
+        self.assertEqual([limiter.reserve() for _ in range(2)], [0, 1.0])
+
+    def test_clean_answers_raise_the_rate(self):
+        limiter = self._limiter()
+        limiter.report(TIMEOUT)
+        self.assertEqual(limiter.rps, 1.6)
+        for _ in range(3):
+            limiter.report(OK)
+        self.assertEqual(limiter.rps, 2.6)
+        for _ in range(6):
+            limiter.report(OK)
+        self.assertEqual(limiter.rps, 4)
+        self.assertEqual(limiter.stats()["failures_in_a_row"], 0)
+
+    def test_errors_other_than_timeouts_are_ignored(self):
+        limiter = self._limiter()
+        limiter.report_response(503)
+        limiter.report_error(ValueError("parse"))
+        self.assertEqual((limiter.rps, limiter.pause_remaining()), (2, 0))
+        limiter.report_error(TimeoutError())
+        self.assertEqual(limiter.rps, 1.6)
+
+    def test_captcha_url(self):
+        self.assertTrue(rate_limiter.is_captcha_url("https://hh.ru/showcaptcha?backurl=/search"))
+        self.assertFalse(rate_limiter.is_captcha_url(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import gzip
+import json
+import unittest
+import zlib
+from unittest import mock
+
+import response_encoding
+from response_encoding import compress, dumps, json_pieces, negotiate
+
+DATA = [{"title": "Frontend-разработчик", "vacancy_id": 1, "score": 2.5, "dup_of": None}, {"title": "QA"}]
+
+
+class NegotiateTest(unittest.TestCase):
+    def test_preferences(self):
+        self.assertEqual(negotiate("gzip, deflate, br"), "gzip")
+        self.assertEqual(negotiate("deflate"), "deflate")
+        self.assertEqual(negotiate("gzip;q=0.5, deflate;q=0.8"), "deflate")
+        self.assertEqual(negotiate("br, *;q=0.1"), "gzip")
+        self.assertEqual(negotiate("GZIP"), "gzip")
+
+    def test_identity(self):
+        for header in (None, "", "br", "identity", "gzip;q=0, deflate;q=0", "gzip;q=x", "*;q=0"):
+            with self.subTest(header=header):
+                self.assertIsNone(negotiate(header))
+
+    def test_compression_off(self):
+        with mock.patch.object(response_encoding, "COMPRESS_MIN_BYTES", -1):
+            self.assertIsNone(negotiate("gzip"))
+            self.assertFalse(response_encoding.should_compress(10 ** 6))
+
+
+class EncodeTest(unittest.TestCase):
+    def test_pieces_make_the_same_json(self):
+        for use_orjson in (False, True) if response_encoding.orjson else (False,):
+            for data in (DATA, [], {"error": "x"}, None):
+                with self.subTest(data=data, use_orjson=use_orjson):
+                    body = b"".join(json_pieces(data, use_orjson))
+                    self.assertEqual(json.loads(body), data)
+                    self.assertEqual(body, dumps(data, use_orjson=False))
+
+    def test_dumps_is_compact_utf8(self):
+        self.assertEqual(dumps({"a": "ё"}, use_orjson=False), '{"a":"ё"}'.encode("utf-8"))
+
+    def test_compress_round_trip(self):
+        pieces = json_pieces(DATA * 50)
+        body = b"".join(pieces)
+        gzipped = b"".join(compress(pieces, "gzip"))
+        self.assertEqual(gzip.decompress(gzipped), body)
+        self.assertEqual(zlib.decompress(b"".join(compress(pieces, "deflate"))), body)
+        self.assertLess(len(gzipped), len(body))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import threading
+import unittest
+from unittest import mock
+
+import result_cache
+from result_cache import ResultCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patch = mock.patch.object(result_cache.time, "monotonic", self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_hit_until_ttl(self):
+        cache = ResultCache(ttl=10)
+        self.assertEqual(cache.get_or_compute("a", lambda: [1]), ([1], "miss"))
+        self.assertEqual(cache.get_or_compute("a", lambda: [2]), ([1], "hit"))
+        self.clock.now += 10
+        self.assertEqual(cache.get_or_compute("a", lambda: [3]), ([3], "miss"))
+
+    def test_uncacheable_values_are_not_stored(self):
+        cache = ResultCache(ttl=10)
+        cache.get_or_compute("a", lambda: None)
+        cache.get_or_compute("b", lambda: {"error": "x"}, cacheable=lambda value: "error" not in value)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResultCache(ttl=10, max_bytes=20)  # room for two "[1, 2, 3]"
+        cache.get_or_compute("a", lambda: [1, 2, 3])
+        cache.get_or_compute("b", lambda: [1, 2, 3])
+        cache.get_or_compute("a", lambda: None)  # a is now the most recent
+        cache.get_or_compute("c", lambda: [1, 2, 3])
+        self.assertEqual(cache.get_or_compute("a", lambda: None)[1], "hit")
+        self.assertEqual(cache.get_or_compute("b", lambda: None)[1], "miss")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 18)
+
+    def test_value_above_the_budget_is_not_stored(self):
+        cache = ResultCache(ttl=10, max_bytes=4)
+        cache.get_or_compute("a", lambda: [1, 2, 3])
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_concurrent_callers_share_one_computation(self):
+        cache = ResultCache(ttl=0)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return [42]
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+                     for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while cache.stats()["coalesced"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(source for _, source in results), ["coalesced"] * 3 + ["miss"])
+        self.assertTrue(all(value == [42] for value, _ in results))
+        self.assertEqual(cache.stats()["entries"], 0)  # ttl=0 only coalesces
+
+    def test_error_reaches_waiting_callers(self):
+        cache = ResultCache(ttl=10)
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                cache.get_or_compute("k", compute)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads.append(threading.Thread(target=call))
+        threads[1].start()
+        while cache.stats()["coalesced"] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(errors, ["boom", "boom"])
+        self.assertEqual(cache.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
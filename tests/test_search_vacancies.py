@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import search_vacancies
+from rate_limiter import RateLimited
+from search_vacancies import _parse_salary
+
+
+class ParseSalaryTest(unittest.TestCase):
+    def test_range(self):
+        self.assertEqual(_parse_salary("от 150 000 до 200 000 ₽ за месяц, до вычета налогов"), (150000, 200000, "RUR"))
+
+    def test_open_ranges(self):
+        self.assertEqual(_parse_salary("от 90 000 ₽ на руки"), (90000, None, "RUR"))
+        self.assertEqual(_parse_salary("до 3 500 $ за месяц, на руки"), (None, 3500, "USD"))
+
+    def test_before_tax_is_not_an_upper_bound(self):
+        self.assertEqual(_parse_salary("от 120 000 руб. до вычета налогов"), (120000, None, "RUR"))
+
+    def test_bare_numbers(self):
+        self.assertEqual(_parse_salary("2 000 – 3 000 €"), (2000, 3000, "EUR"))
+        self.assertEqual(_parse_salary("500 000 ₸"), (500000, 500000, "KZT"))
+
+    def test_no_salary(self):
+        self.assertEqual(_parse_salary(None), (None, None, None))
+        self.assertEqual(_parse_salary("з/п не указана"), (None, None, None))
+
+
+class _UnparsedHttp:
+    """An HttpFetcher whose pages all need the browser."""
+
+    max_connections = 1
+
+    def iter_descriptions(self, urls):
+        for i, _ in enumerate(urls):
+            yield i, None
+
+    def collect_cards(self, query, page_num, order_by=None):
+        return None
+
+
+class LocalBrowserSessionTest(unittest.TestCase):
+    """Without a pool, the browser launched for the call uses the routed account."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.session_file = os.path.join(self.dir.name, "hh_session_2.json")
+        with open(self.session_file, "w", encoding="utf-8") as f:
+            f.write('{"cookies": [], "origins": []}')
+
+    def test_description_fallback(self):
+        with mock.patch.object(search_vacancies, "_run_with_local_browser", return_value=["text"]) as run:
+            descriptions = search_vacancies.get_descriptions(
+                [search_vacancies.vacancy_url(1)], http=_UnparsedHttp(), session_file=self.session_file)
+        self.assertEqual(descriptions, ["text"])
+        self.assertEqual(run.call_args.kwargs["session_file"], self.session_file)
+
+    def test_serp_fallback(self):
+        with mock.patch.object(search_vacancies, "_run_with_local_browser", return_value=[]) as run:
+            search_vacancies.search_pages("Frontend", [0], http=_UnparsedHttp(), describe=False,
+                                          session_file=self.session_file)
+        self.assertEqual(run.call_args.kwargs["session_file"], self.session_file)
+
+
+class DescriptionRateLimitTest(unittest.TestCase):
+    def test_pause_reaches_the_caller(self):
+        page = mock.Mock()
+        with mock.patch.object(search_vacancies, "_use_lean_profile"), \
+                mock.patch.object(search_vacancies.LIMITER, "acquire", side_effect=RateLimited(30)):
+            with self.assertRaises(RateLimited):
+                search_vacancies.get_vacancy_description(page, search_vacancies.vacancy_url(1))
+        page.goto.assert_not_called()
+
+    def test_other_errors_give_an_empty_description(self):
+        page = mock.Mock()
+        page.goto.side_effect = RuntimeError("net::ERR_CONNECTION_RESET")
+        with mock.patch.object(search_vacancies, "_use_lean_profile"), \
+                mock.patch.object(search_vacancies.LIMITER, "acquire"):
+            self.assertEqual(search_vacancies.get_vacancy_description(page, search_vacancies.vacancy_url(1)), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from seen_index import InvalidCursor, SeenIndex
+
+
+class SeenIndexTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = SeenIndex(os.path.join(directory.name, "seen.sqlite3"))
+        self.addCleanup(self.index.close)
+        self.key = SeenIndex.query_key("Python  Developer", "1")
+
+    def test_query_key_ignores_case_and_spacing(self):
+        self.assertEqual(self.key, SeenIndex.query_key("python developer", "1"))
+        self.assertNotEqual(self.key, SeenIndex.query_key("python developer", "2"))
+
+    def test_first_run_sees_everything(self):
+        as_of = self.index.resolve(self.key, "last")
+        self.assertEqual(as_of, 0)
+        self.assertEqual(self.index.unseen(self.key, [1, 2, None], as_of), {1, 2})
+
+    def test_cursor_hides_what_it_returned(self):
+        first = self.index.mark(self.key, [1, 2], 0)
+        self.assertEqual(self.index.resolve(self.key, "last"), first)
+        self.assertEqual(self.index.unseen(self.key, [1, 2, 3], first), {3})
+
+        second = self.index.mark(self.key, [3], first)
+        self.assertEqual(self.index.unseen(self.key, [1, 2, 3, 4], second), {4})
+        # An old cursor repeats what came after it
+        self.assertEqual(self.index.unseen(self.key, [1, 2, 3, 4], first), {3, 4})
+        self.assertEqual(self.index.resolve(self.key, str(first)), first)
+
+    def test_empty_run_keeps_the_cursor(self):
+        first = self.index.mark(self.key, [1], 0)
+        self.assertEqual(self.index.mark(self.key, [], first), first)
+        self.assertEqual(self.index.resolve(self.key, "last"), first)
+
+    def test_cursor_of_another_query_is_rejected(self):
+        cursor = self.index.mark(SeenIndex.query_key("java"), [1], 0)
+        for since in (str(cursor), "999", "yesterday"):
+            with self.subTest(since=since), self.assertRaises(InvalidCursor):
+                self.index.resolve(self.key, since)
+        self.assertEqual(self.index.resolve(self.key, "0"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
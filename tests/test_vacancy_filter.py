@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import unittest
+
+from vacancy_filter import FilterRules, KeywordMatcher, VacancyFilter
+
+RULES = {
+    "include": {"react": 3, "typescript": 2, "удалён*": 1},
+    "exclude": ["стажёр"],
+    "exclude_employers": ["ООО  Рога и копыта"],
+    "exclude_regex": ["\\b(senior|lead)\\b"],
+    "description": {"include": {"next.js": 1}, "exclude": ["битрикс"]},
+}
+
+
+def _card(title, employer="VK", vacancy_id=1):
+    return {"vacancy_id": vacancy_id, "title": title, "employer": employer, "area": "Москва", "experience": None}
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def test_whole_words_and_prefixes(self):
+        matcher = KeywordMatcher(["react", "удалён*", "react native"])
+        self.assertEqual(matcher.matches("React Native, удалённо"), {"react native", "удалён*"})
+        self.assertEqual(matcher.matches("reactive preact"), set())
+
+    def test_weights(self):
+        self.assertEqual(KeywordMatcher({"react": 3, "typescript": 2}).score("React + TypeScript + react"), 5)
+
+    def test_weight_must_be_a_number(self):
+        with self.assertRaises(TypeError):
+            KeywordMatcher({"react": "3"})
+
+
+class FilterRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.rules = FilterRules(RULES)
+
+    def test_card_score(self):
+        self.assertEqual(self.rules.card_score(_card("React/TypeScript разработчик, удалённо")), 6)
+        self.assertIsNone(self.rules.card_score(_card("Стажёр React")))
+        self.assertIsNone(self.rules.card_score(_card("Senior React")))
+        self.assertIsNone(self.rules.card_score(_card("React", employer="ооо рога и копыта")))
+
+    def test_select_keeps_serp_order_and_reports_drops(self):
+        cards = [_card("Vue", vacancy_id=1), _card("Стажёр React", vacancy_id=2), _card("React", vacancy_id=3)]
+        rejected = []
+        selected = self.rules.select(cards, rejected=rejected)
+        self.assertEqual([card["vacancy_id"] for card in selected], [1, 3])
+        self.assertEqual([card["score"] for card in selected], [0, 3])
+        self.assertEqual([card["vacancy_id"] for card in rejected], [2])
+
+    def test_min_score_counts_the_description_bonus(self):
+        cards = [_card("Vue", vacancy_id=1), _card("TypeScript", vacancy_id=2)]
+        self.assertEqual([card["vacancy_id"] for card in self.rules.select(cards, min_score=3)], [2])
+        cards = [_card("Vue", vacancy_id=1), _card("TypeScript", vacancy_id=2)]
+        self.assertEqual(self.rules.select(cards, min_score=3, describe=False), [])
+
+    def test_top_k_keeps_the_best(self):
+        cards = [_card("Vue", vacancy_id=1), _card("React", vacancy_id=2), _card("TypeScript", vacancy_id=3),
+                 _card("Angular", vacancy_id=4)]
+        rejected = []
+        selected = self.rules.select(cards, top_k=3, rejected=rejected)
+        self.assertEqual([card["vacancy_id"] for card in selected], [2, 3, 1])
+        self.assertEqual(rejected, [])  # a rank cut is not a rejection
+
+    def test_rescore_on_the_description(self):
+        vacancy = {"score": 3, "description": "Next.js и React"}
+        self.assertTrue(self.rules.rescore(vacancy, min_score=4))
+        self.assertEqual(vacancy["score"], 4)
+        self.assertFalse(self.rules.rescore({"score": 3, "description": "1С-Битрикс"}))
+        self.assertFalse(self.rules.rescore({"score": 3, "description": "Vue"}, min_score=4))
+
+    def test_no_rules(self):
+        self.assertFalse(FilterRules())
+        cards = [_card("Стажёр")]
+        self.assertEqual(FilterRules().select(cards), cards)
+
+
+class VacancyFilterTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "hh_filter.json")
+        self.filter = VacancyFilter(self.path)
+
+    def _write(self, text, mtime):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_missing_file_means_no_rules(self):
+        self.assertFalse(self.filter.rules())
+
+    def test_reloaded_after_a_change(self):
+        self._write(json.dumps({"exclude": ["php"]}), 1000)
+        rules = self.filter.rules()
+        self.assertIs(self.filter.rules(), rules)
+        self.assertIsNone(rules.card_score(_card("PHP")))
+
+        self._write(json.dumps({"exclude": ["java"]}), 2000)
+        self.assertEqual(self.filter.rules().card_score(_card("PHP")), 0)
+        self.assertEqual(self.filter.rules().version, 2000)
+
+    def test_broken_edit_keeps_the_previous_rules(self):
+        self._write(json.dumps({"exclude": ["php"]}), 1000)
+        rules = self.filter.rules()
+        self._write('{"exclude": ["php"', 2000)
+        with self.assertLogs("VacancyFilter", level="ERROR"):
+            self.assertIs(self.filter.rules(), rules)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import time
+from typing import Dict, Iterable
+
+from dotenv import load_dotenv
+
+from sqlite_store import SQLiteStore
+
+load_dotenv()
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+CACHE_FILE = os.getenv("DESCRIPTION_CACHE_FILE", os.path.join(N8N_FILES_DIR, "hh_cache.sqlite3"))
+CACHE_TTL_HOURS = float(os.getenv("DESCRIPTION_CACHE_TTL_HOURS", 72))
+CACHE_MAX_MB = float(os.getenv("DESCRIPTION_CACHE_MAX_MB", 64))
+
+
+class DescriptionCache(SQLiteStore):
+    """
+    Vacancy descriptions keyed by the numeric hh.ru vacancy ID.
+
+    Entries expire after `ttl` seconds; when the stored text exceeds
+    `max_bytes` the least recently read entries are evicted.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS descriptions (
+            vacancy_id  INTEGER PRIMARY KEY,
+            description TEXT    NOT NULL,
+            size        INTEGER NOT NULL,
+            fetched_at  REAL    NOT NULL,
+            accessed_at REAL    NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS descriptions_accessed ON descriptions (accessed_at);
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_FILE,
+        ttl: float = CACHE_TTL_HOURS * 3600,
+        max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+    ):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions").fetchone()
+        self._entries, self._bytes = row[0], row[1]
+
+    def get_many(self, vacancy_ids: Iterable[int]) -> Dict[int, str]:
+        """Return {vacancy_id: description} for the fresh entries among vacancy_ids."""
+        ids = list(dict.fromkeys(vacancy_ids))
+        if not ids:
+            return {}
+
+        now = time.time()
+        found: Dict[int, str] = {}
+        expired = []
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            rows = self._conn.execute(
+                f"SELECT vacancy_id, description, fetched_at FROM descriptions WHERE vacancy_id IN ({placeholders})",
+                ids,
+            ).fetchall()
+            for row in rows:
+                if now - row["fetched_at"] > self.ttl:
+                    expired.append(row["vacancy_id"])
+                else:
+                    found[row["vacancy_id"]] = row["description"]
+
+            if found:
+                placeholders = ",".join("?" * len(found))
+                self._conn.execute(
+                    f"UPDATE descriptions SET accessed_at = ? WHERE vacancy_id IN ({placeholders})",
+                    [now, *found],
+                )
+            if expired:
+                self._delete(expired)
+
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+        return found
+
+    def put(self, vacancy_id: int, description: str):
+        # Empty text means the page failed to load - nothing worth keeping
+        if not description:
+            return
+        size = len(description.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM descriptions WHERE vacancy_id = ?", (vacancy_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO descriptions (vacancy_id, description, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (vacancy_id, description, size, now, now),
+            )
+            if old is None:
+                self._entries += 1
+            else:
+                self._bytes -= old["size"]
+            self._bytes += size
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": self._entries,
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _delete(self, vacancy_ids):
+        placeholders = ",".join("?" * len(vacancy_ids))
+        rows = self._conn.execute(
+            f"SELECT size FROM descriptions WHERE vacancy_id IN ({placeholders})", vacancy_ids
+        ).fetchall()
+        self._conn.execute(f"DELETE FROM descriptions WHERE vacancy_id IN ({placeholders})", vacancy_ids)
+        self._entries -= len(rows)
+        self._bytes -= sum(row["size"] for row in rows)
+        return len(rows)
+
+    def _evict(self):
+        excess = self._bytes - self.max_bytes
+        if excess <= 0:
+            return
+        victims, freed = [], 0
+        for row in self._conn.execute("SELECT vacancy_id, size FROM descriptions ORDER BY accessed_at"):
+            victims.append(row["vacancy_id"])
+            freed += row["size"]
+            if freed >= excess:
+                break
+        if victims:
+            self.evictions += self._delete(victims)
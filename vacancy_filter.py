@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("VacancyFilter")
+
+# -------------------- CONFIGURATION --------------------
+
+N8N_FILES_DIR = os.getenv("N8N_FILES_DIR", r"C:\Users\Joindev\.n8n-files")
+FILTER_FILE = os.getenv("VACANCY_FILTER_FILE", os.path.join(N8N_FILES_DIR, "hh_filter.json"))
+
+# Card fields the card rules look at
+CARD_TEXT_FIELDS = ("title", "employer", "area", "experience")
+
+
+class KeywordMatcher:
+    """
+    Which of many keywords occur in a text, found in one pass of a single
+    precompiled pattern. Matching ignores case; a keyword matches whole
+    words, "разработ*" any word starting with it.
+    """
+
+    def __init__(self, keywords: Union[Dict[str, float], Iterable[str]]):
+        if not isinstance(keywords, dict):
+            keywords = {keyword: 1 for keyword in keywords}
+        self.weights: Dict[str, float] = {}
+        alternatives = []
+        for keyword, weight in keywords.items():
+            keyword = keyword.strip().lower()
+            prefix = keyword.endswith("*")
+            stem = keyword.rstrip("*").strip()
+            if not stem or keyword in self.weights:
+                continue
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                raise TypeError(f"Weight of {keyword!r} must be a number")
+            self.weights[keyword] = weight
+            boundary = "" if prefix else r"(?!\w)"
+            alternatives.append((stem, f"(?P<k{len(alternatives)}>{re.escape(stem)}{boundary})"))
+        self._keywords = list(self.weights)
+        # Longer keywords first, so "react native" is not cut short by "react"
+        alternatives.sort(key=lambda item: len(item[0]), reverse=True)
+        self._pattern = (
+            re.compile(r"(?<!\w)(?:" + "|".join(pattern for _, pattern in alternatives) + ")")
+            if alternatives else None
+        )
+
+    def __bool__(self):
+        return self._pattern is not None
+
+    def matches(self, text: str) -> Set[str]:
+        if self._pattern is None or not text:
+            return set()
+        return {self._keywords[int(match.lastgroup[1:])] for match in self._pattern.finditer(text.lower())}
+
+    def score(self, text: str) -> float:
+        return sum(self.weights[keyword] for keyword in self.matches(text))
+
+
+class _RuleSet:
+    """include / exclude / exclude_regex of one pass (cards or descriptions)."""
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.include = KeywordMatcher(rules.get("include") or {})
+        self.exclude = KeywordMatcher(rules.get("exclude") or ())
+        self.exclude_regex = [re.compile(pattern, re.IGNORECASE) for pattern in rules.get("exclude_regex") or ()]
+
+    def __bool__(self):
+        return bool(self.include or self.exclude or self.exclude_regex)
+
+    def score(self, text: str) -> Optional[float]:
+        """None when the text is excluded."""
+        if self.exclude.matches(text) or any(regex.search(text) for regex in self.exclude_regex):
+            return None
+        return self.include.score(text)
+
+    @property
+    def max_bonus(self) -> float:
+        return sum(weight for weight in self.include.weights.values() if weight > 0)
+
+
+class FilterRules:
+    """
+    Compiled rules of one version of the rules file:
+
+        {
+          "include": {"react": 3, "typescript": 2, "удалён*": 1},
+          "exclude": ["стажёр", "1с*"],
+          "exclude_employers": ["ООО Рога и копыта"],
+          "exclude_regex": ["\\b(senior|lead)\\b"],
+          "description": {"include": {"next.js": 1}, "exclude": ["битрикс"]}
+        }
+
+    The top-level rules apply to the SERP card (title, employer, area,
+    experience) before any description is fetched; "description" is the
+    second pass over the description text. `score` is the sum of the
+    weights of the matched include keywords (a list means weight 1).
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None, version: float = 0):
+        rules = rules or {}
+        self.version = version
+        self.card = _RuleSet(rules)
+        self.description = _RuleSet(rules.get("description") or {})
+        self.excluded_employers = {_normalize(name) for name in rules.get("exclude_employers") or ()}
+
+    def __bool__(self):
+        return bool(self.card or self.description or self.excluded_employers)
+
+    def card_score(self, card: Dict[str, Any]) -> Optional[float]:
+        if _normalize(card.get("employer") or "") in self.excluded_employers:
+            return None
+        return self.card.score("\n".join(card.get(name) or "" for name in CARD_TEXT_FIELDS))
+
+    def select(self, cards: List[Dict[str, Any]], min_score: Optional[float] = None, top_k: Optional[int] = None,
+               describe: bool = True, rejected: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Set "score" on the cards and keep those worth a description.
+
+        A card is dropped by min_score only if even every description
+        keyword could not lift it there. top_k keeps the best cards by the
+        card score, best first; without it the SERP order stays. Cards the
+        rules dropped are appended to `rejected`; those cut by top_k are not,
+        another page or a later call may still rank them in.
+        """
+        bonus = self.description.max_bonus if describe else 0
+        selected = []
+        for card in cards:
+            score = self.card_score(card)
+            if score is None or (min_score is not None and score + bonus < min_score):
+                if rejected is not None:
+                    rejected.append(card)
+                continue
+            card["score"] = score
+            selected.append(card)
+
+        if top_k is not None:
+            selected.sort(key=lambda card: card["score"], reverse=True)  # stable: SERP order among equals
+            selected = selected[:top_k]
+        return selected
+
+    def rescore(self, vacancy: Dict[str, Any], min_score: Optional[float] = None) -> bool:
+        """Second pass on the description; False when the vacancy is dropped."""
+        if self.description and vacancy.get("description"):
+            extra = self.description.score(vacancy["description"])
+            if extra is None:
+                return False
+            vacancy["score"] = vacancy.get("score", 0) + extra
+        return min_score is None or vacancy.get("score", 0) >= min_score
+
+
+class VacancyFilter:
+    """
+    The rules file, compiled once and again only after it changes on disk;
+    a missing file means no rules.
+    """
+
+    def __init__(self, path: str = FILTER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._rules = FilterRules()
+
+    def rules(self) -> FilterRules:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._rules = self._load(mtime)
+            return self._rules
+
+    def _load(self, mtime: Optional[float]) -> FilterRules:
+        if mtime is None:
+            return FilterRules()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rules = FilterRules(json.load(f), version=mtime)
+        except (OSError, ValueError, re.error, AttributeError, TypeError) as e:
+            # A broken edit keeps the previous rules instead of letting everything through
+            logger.error(f"Invalid filter rules in {self.path}: {e}")
+            return self._rules
+        logger.info(f"Loaded filter rules from {self.path}")
+        return rules
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())